@@ -6,6 +6,8 @@ Fase 3: Backend Flask + MySQL
 """
 
 import os
+from datetime import date
+import click
 from app import create_app, db
 from app.models import Sensor, Reading, Alert, Statistics, User
 
@@ -152,6 +154,134 @@ def create_admin():
     print(f"✅ Administrador '{username}' criado com sucesso!")
 
 
+@app.cli.command()
+def ingest():
+    """Inicia o worker de ingestão MQTT → MySQL (gravação em lote)"""
+    from gateway.ingestion_worker import IngestionWorker
+    
+    print("Iniciando worker de ingestão (Ctrl+C para parar)...")
+    IngestionWorker(app).run_forever()
+
+
+@app.cli.command()
+def rollup():
+    """Agrega as leituras novas na tabela statistics (por sensor/hora)"""
+    from app.services.rollup_service import RollupService
+    
+    result = RollupService.catch_up()
+    print(
+        f"✅ {result['readings_processed']} leituras agregadas em "
+        f"{result['rows_upserted']} linhas (marca d'água: {result['watermark']})"
+    )
+
+
+@app.cli.command('rollup-rebuild')
+@click.argument('start')
+@click.argument('end')
+def rollup_rebuild(start, end):
+    """Recalcula a tabela statistics entre START e END (YYYY-MM-DD, UTC)"""
+    from app.services.rollup_service import RollupService
+    
+    result = RollupService.rebuild(date.fromisoformat(start), date.fromisoformat(end))
+    print(
+        f"✅ {result['rows_upserted']} linhas recalculadas "
+        f"({result['rows_deleted']} removidas) de {start} a {end}"
+    )
+
+
+@app.cli.command('peak-rebuild')
+@click.option('--weeks', type=int, default=None, help='Semanas de histórico (padrão: PEAK_HISTORY_WEEKS)')
+def peak_rebuild(weeks):
+    """Recria o histograma hora-da-semana da previsão de pico"""
+    from app.services.peak_prediction_service import PeakPredictionService
+    
+    result = PeakPredictionService.rebuild(weeks)
+    print(
+        f"✅ {result['slots_updated']} contadores atualizados a partir de "
+        f"{result['rows_read']} linhas (desde {result['start_date']})"
+    )
+
+
+@app.cli.command('readings-partitions')
+@click.option('--init', 'initialize', is_flag=True, help='Converter readings em tabela particionada')
+@click.option('--ahead', type=int, default=None, help='Meses futuros (padrão: READINGS_PARTITIONS_AHEAD)')
+@click.option('--retention', type=int, default=None, help='Meses mantidos (padrão: READINGS_RETENTION_MONTHS)')
+@click.option('--archive/--no-archive', default=None, help='Arquivar partições antes de remover')
+@click.option('--dry-run', is_flag=True, help='Apenas listar as alterações')
+def readings_partitions(initialize, ahead, retention, archive, dry_run):
+    """Cria as partições mensais futuras de readings e remove as expiradas"""
+    from app.services.partition_service import PartitionService
+    
+    if initialize:
+        result = PartitionService.initialize(ahead)
+        print(f"✅ readings particionada em {result['created']} partições")
+        return
+    
+    result = PartitionService.maintain(ahead, retention, archive, dry_run)
+    prefix = '(dry-run) ' if dry_run else ''
+    print(f"✅ {prefix}Criadas: {', '.join(result['created']) or '-'}")
+    print(f"   {prefix}Removidas: {', '.join(result['dropped']) or '-'}")
+    if result['archived']:
+        print(f"   Arquivadas em CSV: {', '.join(result['archived'])}")
+    if result['skipped']:
+        print(f"   ⚠️  Mantidas (leituras não agregadas ou não arquivadas): {', '.join(result['skipped'])}")
+
+
+@app.cli.command('readings-archive')
+@click.option('--hot-days', type=int, default=None, help='Dias mantidos no banco (padrão: READINGS_HOT_DAYS)')
+@click.option('--dry-run', is_flag=True, help='Apenas listar os dias que seriam arquivados')
+def readings_archive(hot_days, dry_run):
+    """Move as leituras antigas para arquivos CSV gzip diários"""
+    from app.services.archive_service import ArchiveService
+    
+    result = ArchiveService.run(hot_days, dry_run)
+    prefix = '(dry-run) ' if dry_run else ''
+    print(
+        f"✅ {prefix}{len(result['days'])} dias arquivados, "
+        f"{result['rows_archived']} leituras ({result['rows_deleted']} removidas do banco)"
+    )
+    if result['late_appended']:
+        print(f"   {result['late_appended']} leituras atrasadas acrescentadas ao arquivo")
+    if result['partitions_dropped']:
+        print(f"   Partições removidas: {', '.join(result['partitions_dropped'])}")
+    print(f"   Horizonte: {result['horizon'] or '-'}")
+
+
+@app.cli.command('report-sync')
+@click.option('--table', 'tables', multiple=True, help='Sincronizar só esta tabela (repetível)')
+@click.option('--reset', is_flag=True, help='Descartar as marcas d\'água e recopiar tudo')
+def report_sync(tables, reset):
+    """Copia as linhas novas/alteradas para o banco de relatórios"""
+    from app.services.report_sync_service import ReportSyncService
+    
+    result = ReportSyncService.sync(list(tables) or None, reset)
+    if result.get('skipped'):
+        print("⚠️  Sincronização já em andamento")
+        return
+    
+    for table, copied in result.items():
+        print(f"✅ {table}: {copied} linhas")
+
+
+@app.cli.command('pool-temperature-rebuild')
+@click.option('--days', type=int, default=365, help='Dias a recalcular (padrão: 365)')
+def pool_temperature_rebuild(days):
+    """Descarta as médias diárias de temperatura da piscina (recalculadas sob demanda)"""
+    from app.services.pool_service import PoolService
+    
+    deleted = PoolService.rebuild_daily_temperatures(days)
+    print(f"✅ {deleted} médias diárias descartadas (últimos {days} dias)")
+
+
+@app.cli.command('pool-latest-rebuild')
+def pool_latest_rebuild():
+    """Recalcula a última leitura de cada sensor da piscina (pool_latest)"""
+    from app.services.pool_service import PoolService
+    
+    found = PoolService.rebuild_latest()
+    print(f"✅ Últimas leituras recalculadas ({found} tipos de sensor com dados)")
+
+
 if __name__ == '__main__':
     app.run(
         host=os.getenv('API_HOST', '0.0.0.0'),
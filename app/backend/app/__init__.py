@@ -54,6 +54,10 @@ def create_app(config_name='development'):
     jwt.init_app(app)
     ma.init_app(app)
     
+    # Cache de respostas (memória ou Redis)
+    from app.utils.cache import cache
+    cache.init_app(app)
+    
     # Configurar CORS - Permitir todas as origens para desenvolvimento
     CORS(app, resources={
         r"/*": {
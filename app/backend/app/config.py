@@ -51,6 +51,51 @@ class Config:
     # Gateway Configuration
     GATEWAY_ID = os.environ.get('GATEWAY_ID', 'gateway_001')
     
+    # Ingestão MQTT → MySQL (worker em lote)
+    INGESTION_BATCH_SIZE = int(os.environ.get('INGESTION_BATCH_SIZE', 500))
+    INGESTION_FLUSH_INTERVAL_MS = int(os.environ.get('INGESTION_FLUSH_INTERVAL_MS', 1000))
+    
+    # Rollup horário readings → statistics
+    ROLLUP_BATCH_SIZE = int(os.environ.get('ROLLUP_BATCH_SIZE', 50000))
+    ROLLUP_INTERVAL_SECONDS = int(os.environ.get('ROLLUP_INTERVAL_SECONDS', 60))  # 0 = desativado no worker
+    # Leituras mais novas que isto esperam o próximo rollup (transações ainda abertas)
+    ROLLUP_GRACE_SECONDS = int(os.environ.get('ROLLUP_GRACE_SECONDS', 30))
+    
+    # Partições mensais de readings (meses pré-criados e retenção;
+    # retenção 0 = manter tudo)
+    READINGS_PARTITIONS_AHEAD = int(os.environ.get('READINGS_PARTITIONS_AHEAD', 3))
+    READINGS_RETENTION_MONTHS = int(os.environ.get('READINGS_RETENTION_MONTHS', 0))
+    READINGS_ARCHIVE_EXPIRED = os.environ.get('READINGS_ARCHIVE_EXPIRED', 'True').lower() == 'true'
+    
+    # Arquivo frio: dias mantidos no banco (0 = desativado), diretório
+    # dos arquivos diários e linhas removidas por lote (só com readings
+    # sem partições; particionada, remove por DROP PARTITION)
+    READINGS_HOT_DAYS = int(os.environ.get('READINGS_HOT_DAYS', 0))
+    READINGS_ARCHIVE_DIR = os.environ.get('READINGS_ARCHIVE_DIR', os.path.join(basedir, 'archive'))
+    READINGS_ARCHIVE_DELETE_BATCH = int(os.environ.get('READINGS_ARCHIVE_DELETE_BATCH', 5000))
+    
+    # Banco de relatórios (sincronização incremental: flask report-sync)
+    REPORT_DB_HOST = os.environ.get('REPORT_DB_HOST', DB_HOST)
+    REPORT_DB_PORT = int(os.environ.get('REPORT_DB_PORT', DB_PORT))
+    REPORT_DB_USER = os.environ.get('REPORT_DB_USER', DB_USER)
+    REPORT_DB_PASSWORD = os.environ.get('REPORT_DB_PASSWORD', DB_PASSWORD)
+    REPORT_DB_NAME = os.environ.get('REPORT_DB_NAME', 'smartceu_report_db')
+    REPORT_DATABASE_URI = (
+        f"mysql+pymysql://{REPORT_DB_USER}:{quote_plus(REPORT_DB_PASSWORD)}@"
+        f"{REPORT_DB_HOST}:{REPORT_DB_PORT}/{REPORT_DB_NAME}?charset=utf8mb4"
+    )
+    REPORT_SYNC_BATCH_SIZE = int(os.environ.get('REPORT_SYNC_BATCH_SIZE', 5000))
+    REPORT_SYNC_OVERLAP_SECONDS = int(os.environ.get('REPORT_SYNC_OVERLAP_SECONDS', 5))
+    
+    # Máximo de leituras por POST /readings/bulk
+    READINGS_BULK_MAX_ITEMS = int(os.environ.get('READINGS_BULK_MAX_ITEMS', 10000))
+    
+    # Cache serial_number → sensor (segundos)
+    SENSOR_REGISTRY_TTL = int(os.environ.get('SENSOR_REGISTRY_TTL', 300))
+    
+    # Gravação adiada dos contadores dos sensores (ms)
+    SENSOR_STATS_FLUSH_INTERVAL_MS = int(os.environ.get('SENSOR_STATS_FLUSH_INTERVAL_MS', 5000))
+    
     # API Configuration
     API_PREFIX = os.environ.get('API_PREFIX', '/api/v1')
     API_TITLE = os.environ.get('API_TITLE', 'CEU Tres Pontes API')
@@ -79,6 +124,37 @@ class Config:
     REDIS_PORT = int(os.environ.get('REDIS_PORT', 6379))
     REDIS_DB = int(os.environ.get('REDIS_DB', 0))
     
+    # Cache de respostas do dashboard
+    RESPONSE_CACHE_BACKEND = os.environ.get('RESPONSE_CACHE_BACKEND', 'memory')  # memory ou redis
+    RESPONSE_CACHE_TTL = int(os.environ.get('RESPONSE_CACHE_TTL', 15))  # 0 = desativado
+    RESPONSE_CACHE_INVALIDATE_ON_INGEST = os.environ.get('RESPONSE_CACHE_INVALIDATE_ON_INGEST', 'False').lower() == 'true'
+    
+    # Fluxo de pessoas do dashboard (largura do intervalo em horas, divisor de 24)
+    PEOPLE_FLOW_BUCKET_HOURS = int(os.environ.get('PEOPLE_FLOW_BUCKET_HOURS', 4))
+    
+    # Lista de alertas de qualidade da piscina em cache (segundos; a chave
+    # muda quando surge uma nova leitura de alerta)
+    POOL_ALERTS_CACHE_TTL = int(os.environ.get('POOL_ALERTS_CACHE_TTL', 300))
+    
+    # Exportação de leituras (linhas por lote do cursor)
+    EXPORT_CHUNK_SIZE = int(os.environ.get('EXPORT_CHUNK_SIZE', 5000))
+    
+    # Contadores de ocupação do dia (intervalo mínimo entre leituras da
+    # tabela readings e intervalo entre checkpoints)
+    OCCUPANCY_SYNC_INTERVAL_MS = int(os.environ.get('OCCUPANCY_SYNC_INTERVAL_MS', 1000))
+    OCCUPANCY_CHECKPOINT_SECONDS = int(os.environ.get('OCCUPANCY_CHECKPOINT_SECONDS', 60))
+    # Leituras mais novas que isto esperam a próxima sincronização (transações ainda abertas)
+    OCCUPANCY_GRACE_SECONDS = int(os.environ.get('OCCUPANCY_GRACE_SECONDS', 5))
+    
+    # Previsão de pico (histograma hora-da-semana)
+    PEAK_EWMA_ALPHA = float(os.environ.get('PEAK_EWMA_ALPHA', 0.3))
+    PEAK_CONFIDENCE_Z = float(os.environ.get('PEAK_CONFIDENCE_Z', 1.96))
+    PEAK_HISTORY_WEEKS = int(os.environ.get('PEAK_HISTORY_WEEKS', 12))
+    
+    # Stream ao vivo do dashboard (SSE)
+    DASHBOARD_STREAM_POLL_MS = int(os.environ.get('DASHBOARD_STREAM_POLL_MS', 1000))
+    DASHBOARD_STREAM_SNAPSHOT_SECONDS = int(os.environ.get('DASHBOARD_STREAM_SNAPSHOT_SECONDS', 60))
+    
     # RabbitMQ (opcional)
     RABBITMQ_HOST = os.environ.get('RABBITMQ_HOST', 'localhost')
     RABBITMQ_PORT = int(os.environ.get('RABBITMQ_PORT', 5672))
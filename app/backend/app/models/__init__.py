@@ -9,6 +9,11 @@ from app.models.alert import Alert
 from app.models.statistics import Statistics
 from app.models.user import User
 from app.models.pool_reading import PoolReading
+from app.models.pool_daily_temperature import PoolDailyTemperature
+from app.models.pool_latest import PoolLatest
+from app.models.rollup_watermark import RollupWatermark
+from app.models.hour_of_week_stat import HourOfWeekStat
+from app.models.occupancy_checkpoint import OccupancyCheckpoint
 
 __all__ = [
     'Sensor',
@@ -16,5 +21,10 @@ __all__ = [
     'Alert',
     'Statistics',
     'User',
-    'PoolReading'
+    'PoolReading',
+    'PoolDailyTemperature',
+    'PoolLatest',
+    'RollupWatermark',
+    'HourOfWeekStat',
+    'OccupancyCheckpoint'
 ]
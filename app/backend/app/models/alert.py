@@ -63,6 +63,13 @@ class Alert(db.Model):
     acknowledged_at = db.Column(db.DateTime)
     resolved_at = db.Column(db.DateTime)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = db.Column(
+        db.DateTime,
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+        nullable=False,
+        index=True
+    )
     
     # Índices compostos
     __table_args__ = (
@@ -97,7 +104,8 @@ class Alert(db.Model):
             'timestamp': self.timestamp.isoformat(),
             'acknowledged_at': self.acknowledged_at.isoformat() if self.acknowledged_at else None,
             'resolved_at': self.resolved_at.isoformat() if self.resolved_at else None,
-            'created_at': self.created_at.isoformat()
+            'created_at': self.created_at.isoformat(),
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
         
         if include_sensor and self.sensor:
@@ -120,14 +128,12 @@ class Alert(db.Model):
         Returns:
             Alert: Nova instância de alerta
         """
-        from app.models.sensor import Sensor
+        from app.services.sensor_registry import sensor_registry
         
         # Buscar sensor se especificado
         sensor_id = None
         if 'sensor' in mqtt_data.get('data', {}):
-            sensor = Sensor.get_by_serial(mqtt_data['data']['sensor'])
-            if sensor:
-                sensor_id = sensor.id
+            sensor_id = sensor_registry.get_id(mqtt_data['data']['sensor'])
         
         alert = cls(
             alert_id=mqtt_data.get('alert_id'),
@@ -0,0 +1,66 @@
+"""
+Hour of Week Stat Model
+Histograma de entradas por área, dia da semana e hora (horário de Brasília)
+"""
+
+from datetime import datetime
+from app import db
+
+
+class HourOfWeekStat(db.Model):
+    """
+    Modelo de Histograma Hora-da-Semana
+    
+    Uma linha por (área, dia da semana, hora local): 7×24 contadores por
+    área. Cada ocorrência do horário (ex.: toda segunda às 16h) é uma
+    observação; `mean` e `variance` são médias móveis exponenciais das
+    ocorrências já encerradas e `open_count` acumula a ocorrência de
+    `open_date`, ainda aberta.
+    """
+    __tablename__ = 'hour_of_week_stats'
+    
+    area = db.Column(db.String(100), primary_key=True)
+    weekday = db.Column(db.SmallInteger, primary_key=True)  # 0 = segunda
+    hour = db.Column(db.SmallInteger, primary_key=True)  # 0-23 (local)
+    
+    # Médias móveis exponenciais das ocorrências encerradas
+    mean = db.Column(db.Float, default=0.0, nullable=False)
+    variance = db.Column(db.Float, default=0.0, nullable=False)
+    samples = db.Column(db.Integer, default=0, nullable=False)
+    
+    # Ocorrência em andamento (data local)
+    open_date = db.Column(db.Date, nullable=True)
+    open_count = db.Column(db.Integer, default=0, nullable=False)
+    
+    # Total acumulado de entradas no horário
+    total_entries = db.Column(db.BigInteger, default=0, nullable=False)
+    
+    updated_at = db.Column(
+        db.DateTime,
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+        nullable=False
+    )
+    
+    def __repr__(self):
+        return f'<HourOfWeekStat {self.area} {self.weekday}/{self.hour:02d}h mean={self.mean:.1f}>'
+    
+    def to_dict(self):
+        """
+        Converte o contador para dicionário
+        
+        Returns:
+            dict: Representação do contador
+        """
+        return {
+            'area': self.area,
+            'weekday': self.weekday,
+            'hour': self.hour,
+            'mean': self.mean,
+            'variance': self.variance,
+            'samples': self.samples,
+            'open_date': self.open_date.isoformat() if self.open_date else None,
+            'open_count': self.open_count,
+            'total_entries': self.total_entries,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
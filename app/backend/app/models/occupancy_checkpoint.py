@@ -0,0 +1,51 @@
+"""
+Occupancy Checkpoint Model
+Estado persistido dos contadores de ocupação do dia
+"""
+
+from datetime import datetime
+from app import db
+
+
+class OccupancyCheckpoint(db.Model):
+    """
+    Modelo de Checkpoint de Ocupação
+    
+    Uma linha por escopo (total do CEU ou área) com as entradas e saídas
+    do dia local até `last_reading_id`. Na inicialização, os contadores
+    partem do checkpoint do dia e somam apenas as leituras posteriores.
+    """
+    __tablename__ = 'occupancy_checkpoints'
+    
+    scope = db.Column(db.String(100), primary_key=True)
+    day = db.Column(db.Date, nullable=False)  # Data local (Brasília)
+    entries = db.Column(db.Integer, default=0, nullable=False)
+    exits = db.Column(db.Integer, default=0, nullable=False)
+    last_reading_id = db.Column(db.BigInteger, default=0, nullable=False)
+    last_reading_at = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(
+        db.DateTime,
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+        nullable=False
+    )
+    
+    def __repr__(self):
+        return f'<OccupancyCheckpoint {self.scope} {self.day} +{self.entries}/-{self.exits}>'
+    
+    def to_dict(self):
+        """
+        Converte o checkpoint para dicionário
+        
+        Returns:
+            dict: Representação do checkpoint
+        """
+        return {
+            'scope': self.scope,
+            'day': self.day.isoformat() if self.day else None,
+            'entries': self.entries,
+            'exits': self.exits,
+            'last_reading_id': self.last_reading_id,
+            'last_reading_at': self.last_reading_at.isoformat() if self.last_reading_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
@@ -0,0 +1,54 @@
+"""
+Pool Daily Temperature Model
+Agregado diário de temperatura da piscina por tipo de sensor
+"""
+
+from datetime import datetime
+from app import db
+
+
+class PoolDailyTemperature(db.Model):
+    """
+    Modelo de Agregado Diário de Temperatura da Piscina
+    
+    Uma linha por (tipo de sensor, dia) já encerrado, com soma, contagem,
+    mínimo e máximo das temperaturas. Dias sem leituras também são
+    gravados (reading_count = 0) para não serem recalculados. O dia
+    atual é sempre calculado a partir de pool_readings.
+    """
+    __tablename__ = 'pool_daily_temperatures'
+    
+    sensor_type = db.Column(db.String(20), primary_key=True)
+    reading_date = db.Column(db.Date, primary_key=True)
+    
+    temperature_sum = db.Column(db.Numeric(12, 2), default=0, nullable=False)
+    reading_count = db.Column(db.Integer, default=0, nullable=False)
+    temperature_min = db.Column(db.Numeric(5, 2), nullable=True)
+    temperature_max = db.Column(db.Numeric(5, 2), nullable=True)
+    
+    updated_at = db.Column(
+        db.DateTime,
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+        nullable=False
+    )
+    
+    def __repr__(self):
+        return f'<PoolDailyTemperature {self.sensor_type} {self.reading_date} n={self.reading_count}>'
+    
+    def to_dict(self):
+        """
+        Converte o agregado para dicionário
+        
+        Returns:
+            dict: Representação do agregado
+        """
+        return {
+            'sensor_type': self.sensor_type,
+            'reading_date': self.reading_date.isoformat(),
+            'temperature_sum': float(self.temperature_sum),
+            'reading_count': self.reading_count,
+            'temperature_min': float(self.temperature_min) if self.temperature_min is not None else None,
+            'temperature_max': float(self.temperature_max) if self.temperature_max is not None else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
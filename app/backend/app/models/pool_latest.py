@@ -0,0 +1,66 @@
+"""
+Pool Latest Model
+Última leitura de cada tipo de sensor da piscina
+"""
+
+from datetime import datetime
+from app import db
+
+
+class PoolLatest(db.Model):
+    """
+    Modelo da Última Leitura da Piscina
+    
+    Uma linha por tipo de sensor com a cópia da leitura mais recente,
+    mantida por PoolService.create_reading (upsert que só avança se a
+    nova leitura for mais recente). Permite ler as últimas leituras por
+    chave primária, sem ORDER BY em pool_readings.
+    
+    Expõe os mesmos atributos de PoolReading (id = reading_id), então é
+    serializado pelos mesmos schemas.
+    """
+    __tablename__ = 'pool_latest'
+    
+    sensor_type = db.Column(db.String(20), primary_key=True)
+    reading_id = db.Column(db.BigInteger, nullable=False)
+    
+    reading_date = db.Column(db.Date, nullable=False)
+    reading_time = db.Column(db.Time, nullable=False)
+    reading_at = db.Column(db.DateTime, nullable=False)
+    
+    temperature = db.Column(db.Numeric(5, 2), nullable=True)
+    water_quality = db.Column(db.String(20), nullable=True)
+    
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = db.Column(
+        db.DateTime,
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+        nullable=False
+    )
+    
+    @property
+    def id(self):
+        """Id da leitura em pool_readings"""
+        return self.reading_id
+    
+    def __repr__(self):
+        return f'<PoolLatest {self.sensor_type} #{self.reading_id} @ {self.reading_at}>'
+    
+    def to_dict(self):
+        """
+        Converte a última leitura para dicionário (mesmo formato de PoolReading)
+        
+        Returns:
+            dict: Representação da leitura
+        """
+        return {
+            'id': self.reading_id,
+            'sensor_type': self.sensor_type,
+            'reading_date': self.reading_date.isoformat() if self.reading_date else None,
+            'reading_time': self.reading_time.strftime('%H:%M:%S') if self.reading_time else None,
+            'temperature': float(self.temperature) if self.temperature else None,
+            'water_quality': self.water_quality if self.water_quality else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
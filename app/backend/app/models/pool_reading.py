@@ -4,7 +4,7 @@ Armazena temperatura da água, temperatura ambiente e qualidade da água.
 """
 from datetime import datetime, date, time
 from app import db
-from sqlalchemy import Enum
+from sqlalchemy import Computed, Enum
 import enum
 
 
@@ -32,6 +32,7 @@ class PoolReading(db.Model):
         sensor_type: Tipo do sensor (water_temp, ambient_temp, water_quality)
         reading_date: Data da leitura
         reading_time: Hora da leitura
+        reading_at: Data e hora da leitura (coluna gerada, usada nas consultas por período)
         temperature: Temperatura medida (Celsius) - para sensores de temperatura
         water_quality: Qualidade da água - apenas para sensor water_quality
         created_at: Timestamp de criação do registro
@@ -39,6 +40,10 @@ class PoolReading(db.Model):
     """
     
     __tablename__ = 'pool_readings'
+    __table_args__ = (
+        db.Index('idx_sensor_reading_at', 'sensor_type', 'reading_at'),
+        db.Index('idx_reading_at', 'reading_at'),
+    )
     
     id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
     
@@ -53,6 +58,13 @@ class PoolReading(db.Model):
     reading_date = db.Column(db.Date, nullable=False, index=True)
     reading_time = db.Column(db.Time, nullable=False)
     
+    # Data e hora combinadas, calculadas pelo MySQL (ordenação e filtros por período)
+    reading_at = db.Column(
+        db.DateTime,
+        Computed('TIMESTAMP(reading_date, reading_time)', persisted=True),
+        nullable=False
+    )
+    
     # Valores das leituras
     temperature = db.Column(
         db.Numeric(5, 2),
@@ -3,8 +3,9 @@ Reading Model
 Representa uma leitura de sensor
 """
 
-from datetime import datetime
+from datetime import datetime, timezone
 from app import db
+from app.utils.pagination import keyset_before
 
 
 class Reading(db.Model):
@@ -19,7 +20,13 @@ class Reading(db.Model):
     __tablename__ = 'readings'
     
     # Campos principais
-    id = db.Column(db.BigInteger, primary_key=True)
+    # Chave primária (id, timestamp): a tabela é particionada por mês em
+    # timestamp (PartitionService) e toda chave única precisa conter a
+    # coluna de particionamento. Buscas por id usam filter_by(id=...).
+    id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
+    # A FK existe no banco só até `flask readings-partitions --init`
+    # (tabelas particionadas não aceitam FK); aqui ela define o join com
+    # Sensor e a exclusão em cascata, feita pelo ORM
     sensor_id = db.Column(
         db.Integer,
         db.ForeignKey('sensors.id', ondelete='CASCADE'),
@@ -29,7 +36,7 @@ class Reading(db.Model):
     
     # Dados da leitura
     activity = db.Column(db.SmallInteger, nullable=False)  # 0 = nada, 1 = detecção
-    timestamp = db.Column(db.DateTime, nullable=False, index=True)
+    timestamp = db.Column(db.DateTime, primary_key=True, nullable=False, index=True)
     
     # Metadados do sensor no momento da leitura (JSON)
     sensor_metadata = db.Column(db.JSON)  # battery_level, rssi, temperature, etc.
@@ -93,56 +100,118 @@ class Reading(db.Model):
         Returns:
             Reading: Nova instância de leitura
         """
-        from app.models.sensor import Sensor
+        from app.services.sensor_registry import sensor_registry
+        from app.services.sensor_stats import sensor_stats
         
-        # Buscar sensor pelo serial number
-        sensor = Sensor.get_by_serial(mqtt_data['sensor']['serial_number'])
+        # Buscar sensor pelo serial number (cache em memória, sem SELECT)
+        sensor_id = sensor_registry.get_id(mqtt_data['sensor']['serial_number'])
         
-        if not sensor:
+        if sensor_id is None:
             raise ValueError(f"Sensor não encontrado: {mqtt_data['sensor']['serial_number']}")
         
         # Criar leitura
-        reading = cls(
-            sensor_id=sensor.id,
-            activity=mqtt_data['data']['activity'],
-            timestamp=datetime.fromisoformat(mqtt_data['data']['timestamp'].replace('Z', '+00:00')),
-            sensor_metadata=mqtt_data.get('metadata', {}),
-            message_id=mqtt_data.get('message_id'),
-            gateway_id=mqtt_data.get('gateway_id')
+        reading = cls(**cls.row_from_mqtt(mqtt_data, sensor_id))
+        
+        # Atualizar estatísticas do sensor (gravação adiada, ver sensor_stats)
+        metadata = reading.sensor_metadata or {}
+        sensor_stats.record(
+            sensor_id,
+            reading.timestamp,
+            battery_level=metadata.get('battery_level'),
+            signal_strength=metadata.get('rssi_dbm')
         )
         
-        # Atualizar estatísticas do sensor
-        sensor.total_readings += 1
-        sensor.last_reading_at = reading.timestamp
+        return reading
+    
+    @staticmethod
+    def row_from_mqtt(mqtt_data, sensor_id):
+        """
+        Converte uma mensagem MQTT nos valores de coluna de uma leitura
         
-        # Atualizar battery_level e signal_strength se disponíveis
-        if reading.sensor_metadata:
-            if 'battery_level' in reading.sensor_metadata:
-                sensor.battery_level = reading.sensor_metadata['battery_level']
-            if 'rssi_dbm' in reading.sensor_metadata:
-                sensor.signal_strength = reading.sensor_metadata['rssi_dbm']
+        Usado tanto pelo ORM (create_from_mqtt) quanto pelos INSERTs em
+        lote do worker de ingestão, que não instanciam objetos Reading.
         
-        return reading
+        Args:
+            mqtt_data: Dicionário com dados da mensagem MQTT
+            sensor_id: ID do sensor já resolvido pelo serial number
+        
+        Returns:
+            dict: Valores das colunas da tabela readings
+        """
+        timestamp = datetime.fromisoformat(mqtt_data['data']['timestamp'].replace('Z', '+00:00'))
+        
+        # O banco armazena UTC sem timezone
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+        
+        return {
+            'sensor_id': sensor_id,
+            'activity': mqtt_data['data']['activity'],
+            'timestamp': timestamp,
+            'sensor_metadata': mqtt_data.get('metadata', {}),
+            'message_id': mqtt_data.get('message_id'),
+            'gateway_id': mqtt_data.get('gateway_id')
+        }
     
     @classmethod
-    def get_by_sensor(cls, sensor_id, limit=100, offset=0):
+    def get_by_sensor(cls, sensor_id, limit=100, offset=0, before=None):
         """
         Busca leituras de um sensor específico
         
         Args:
             sensor_id: ID do sensor
             limit: Número máximo de resultados
-            offset: Offset para paginação
+            offset: Offset para paginação (ignorado com before)
+            before: (timestamp, id) da última leitura da página anterior
         
         Returns:
             list: Lista de leituras
         """
-        return cls.query.filter_by(sensor_id=sensor_id)\
-            .order_by(cls.timestamp.desc())\
+        query = cls.query.filter_by(sensor_id=sensor_id)
+        
+        if before is not None:
+            query = query.filter(keyset_before((cls.timestamp, cls.id), before))
+            offset = 0
+        
+        return query.order_by(cls.timestamp.desc(), cls.id.desc())\
             .limit(limit)\
             .offset(offset)\
             .all()
     
+    @classmethod
+    def settled_max_id(cls, after_id, grace_seconds):
+        """
+        Maior id que um consumidor da cauda (id > after_id) pode alcançar
+        
+        Há mais de um escritor (worker de ingestão, endpoint bulk): um id
+        menor pode ser confirmado depois de um maior. Retorna o maior id
+        visível criado há mais de `grace_seconds`: ids menores foram
+        alocados antes dele, então as transações que os inseriram já
+        terminaram. Percorre só os ids acima de after_id (chave primária).
+        
+        Args:
+            after_id: Último id já consumido
+            grace_seconds: Janela de espera (0 = sem espera)
+        
+        Returns:
+            int: Limite superior de ids seguro para consumir
+        """
+        from sqlalchemy import func
+        from datetime import timedelta
+        
+        max_id = db.session.query(func.max(cls.id)).scalar() or 0
+        
+        if not grace_seconds:
+            return max_id
+        
+        cutoff = datetime.utcnow() - timedelta(seconds=grace_seconds)
+        settled = db.session.query(func.max(cls.id)).filter(
+            cls.id > after_id,
+            cls.created_at < cutoff
+        ).scalar()
+        
+        return settled or after_id
+    
     @classmethod
     def get_by_date_range(cls, start_date, end_date, sensor_id=None):
         """
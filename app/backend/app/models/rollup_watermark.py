@@ -0,0 +1,65 @@
+"""
+Rollup Watermark Model
+Marca d'água dos jobs de agregação incremental
+"""
+
+from datetime import datetime
+from app import db
+
+
+class RollupWatermark(db.Model):
+    """
+    Modelo de Marca d'Água de Agregação
+    
+    Guarda o maior readings.id já incorporado por um job de rollup.
+    Leituras com id acima da marca ainda não foram agregadas.
+    """
+    __tablename__ = 'rollup_watermarks'
+    
+    name = db.Column(db.String(50), primary_key=True)
+    last_reading_id = db.Column(db.BigInteger, default=0, nullable=False)
+    updated_at = db.Column(
+        db.DateTime,
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+        nullable=False
+    )
+    
+    def __repr__(self):
+        return f'<RollupWatermark {self.name} id={self.last_reading_id}>'
+    
+    def to_dict(self):
+        """
+        Converte a marca d'água para dicionário
+        
+        Returns:
+            dict: Representação da marca d'água
+        """
+        return {
+            'name': self.name,
+            'last_reading_id': self.last_reading_id,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+    
+    @classmethod
+    def acquire(cls, name):
+        """
+        Busca (ou cria) a marca d'água travando a linha até o commit
+        
+        O SELECT ... FOR UPDATE serializa execuções concorrentes do
+        mesmo job.
+        
+        Args:
+            name: Nome do job
+        
+        Returns:
+            RollupWatermark: Instância travada
+        """
+        watermark = cls.query.filter_by(name=name).with_for_update().first()
+        
+        if not watermark:
+            watermark = cls(name=name, last_reading_id=0)
+            db.session.add(watermark)
+            db.session.flush()
+        
+        return watermark
@@ -64,6 +64,7 @@ class Statistics(db.Model):
         db.UniqueConstraint('date', 'hour', 'sensor_id', name='uix_date_hour_sensor'),
         db.Index('idx_date_hour', 'date', 'hour'),
         db.Index('idx_date_sensor', 'date', 'sensor_id'),
+        db.Index('idx_updated_at', 'updated_at', 'id'),
     )
     
     def __repr__(self):
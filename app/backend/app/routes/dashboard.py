@@ -5,14 +5,23 @@ Retorna dados agregados e estatísticas para visualização
 APENAS DADOS REAIS DO BANCO - SEM SIMULAÇÃO
 """
 
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request, Response, current_app, make_response, stream_with_context
 from app import db
 from app.models.reading import Reading
 from app.models.sensor import Sensor
 from app.models.alert import Alert
-from app.models.pool_reading import PoolReading
+from app.services.areas import MAX_CAPACITY, area_index
+from app.services.live_feed import live_feed
+from app.services.occupancy_service import occupancy
+from app.services.peak_prediction_service import PeakPredictionService
+from app.services.pool_service import PoolService
+from app.services.statistics_service import StatisticsService
+from app.utils.cache import cache
 from datetime import datetime, timedelta
 from sqlalchemy import func, and_
+from queue import Empty
+import json
+import time
 import pytz
 
 # Timezone de Brasília
@@ -22,25 +31,19 @@ bp = Blueprint('dashboard', __name__)
 
 
 # ========== CONFIGURAÇÕES ==========
-MAX_CAPACITY = 300  # Capacidade máxima do CEU
 POOL_CAPACITY = 60  # Capacidade da piscina
 
-# Mapeamento de sensores para áreas
-AREA_MAPPING = {
-    'Entrada Principal': {'sensors': ['LORA-ENTRADA-01', 'LORA-SAIDA-01'], 'capacity': 100},
-    'Entrada Lateral Norte': {'sensors': ['ZIGB-LATERAL-01'], 'capacity': 50},
-    'Entrada Lateral Sul': {'sensors': ['ZIGB-LATERAL-02'], 'capacity': 50},
-    'Banheiros': {'sensors': ['SIGF-BANHEIRO-01'], 'capacity': 40},
-    'Portaria': {'sensors': ['RFID-PORTARIA-01'], 'capacity': 20}
-}
-
 
 # ========== ENDPOINT 1: Estatísticas Atuais ==========
 @bp.route('/current-stats', methods=['GET'])
+@cache.cached_response()
 def get_current_stats():
     """
     Retorna estatísticas atuais do CEU baseadas nos dados reais do banco
     
+    Lê os contadores do dia (OccupancyTracker), zerados à meia-noite
+    de Brasília, em vez de recontar as leituras a cada consulta.
+    
     Returns:
         JSON com:
         - current_people: Número atual de pessoas no CEU
@@ -51,32 +54,17 @@ def get_current_stats():
         - timestamp: Data/hora da consulta
     """
     try:
-        # Data de hoje (início do dia)
-        today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        # Contadores do dia (horário de Brasília), mantidos em memória
+        state = occupancy.snapshot()
         
-        # Buscar entradas (activity = 1) de hoje
-        entries_today = Reading.query.filter(
-            Reading.timestamp >= today_start,
-            Reading.activity == 1
-        ).count()
+        entries_today = state['entries']
+        exits_today = state['exits']
+        current_people = state['current']
         
-        # Buscar saídas (activity = 0) de hoje
-        exits_today = Reading.query.filter(
-            Reading.timestamp >= today_start,
-            Reading.activity == 0
-        ).count()
-        
-        # Calcular pessoas atuais (simplificado)
-        current_people = max(0, entries_today - exits_today)
-        
-        # Buscar última leitura registrada (independente do dia)
-        last_reading_obj = Reading.query.order_by(Reading.timestamp.desc()).first()
-        
-        # Converter para horário de Brasília se houver leitura
+        # Converter última leitura (UTC) para horário de Brasília
         last_reading = None
-        if last_reading_obj:
-            # Timestamp do banco é UTC, converter para Brasília
-            utc_time = last_reading_obj.timestamp.replace(tzinfo=pytz.UTC)
+        if state['last_reading']:
+            utc_time = state['last_reading'].replace(tzinfo=pytz.UTC)
             brasilia_time = utc_time.astimezone(BRASILIA_TZ)
             last_reading = brasilia_time.isoformat()
         
@@ -103,10 +91,18 @@ def get_current_stats():
 
 # ========== ENDPOINT 2: Fluxo de Pessoas (24h) ==========
 @bp.route('/people-flow', methods=['GET'])
+@cache.cached_response()
 def get_people_flow():
     """
     Retorna dados para gráfico de fluxo de pessoas nas últimas 24 horas
-    Dados agrupados em intervalos de 4 horas
+    Dados agrupados em intervalos de N horas no horário de Brasília
+    
+    Query params:
+    - bucket_hours: largura do intervalo em horas, divisor de 24
+      (default: PEOPLE_FLOW_BUCKET_HOURS)
+    
+    A contagem é feita no banco por hora UTC (uma linha por hora) e as
+    horas são convertidas para America/Sao_Paulo antes de agrupar.
     
     Returns:
         JSON com:
@@ -114,43 +110,38 @@ def get_people_flow():
         - data: Número de pessoas em cada período
     """
     try:
+        bucket_hours = request.args.get(
+            'bucket_hours',
+            default=current_app.config.get('PEOPLE_FLOW_BUCKET_HOURS', 4),
+            type=int
+        )
+        if not bucket_hours or 24 % bucket_hours != 0:
+            return jsonify({'error': 'bucket_hours deve ser divisor de 24'}), 400
+        
         # Última 24 horas
         yesterday = datetime.utcnow() - timedelta(days=1)
         
-        # Buscar readings das últimas 24h
-        readings = Reading.query.filter(
-            Reading.timestamp >= yesterday
-        ).all()
+        # Contagem por hora UTC (agregada no banco)
+        hourly_counts = StatisticsService.count_by_hour(yesterday)
         
-        # Agrupar por período de 4 horas
-        periods = {
-            '00:00': 0, '04:00': 0, '08:00': 0, 
-            '12:00': 0, '16:00': 0, '20:00': 0
-        }
+        # Agrupar por período no horário de Brasília
+        starts = range(0, 24, bucket_hours)
+        periods = {start: 0 for start in starts}
         
-        for reading in readings:
-            hour = reading.timestamp.hour
-            if hour < 4:
-                periods['00:00'] += 1
-            elif hour < 8:
-                periods['04:00'] += 1
-            elif hour < 12:
-                periods['08:00'] += 1
-            elif hour < 16:
-                periods['12:00'] += 1
-            elif hour < 20:
-                periods['16:00'] += 1
-            else:
-                periods['20:00'] += 1
+        for utc_hour, count in hourly_counts.items():
+            local_hour = pytz.UTC.localize(utc_hour).astimezone(BRASILIA_TZ).hour
+            periods[local_hour - local_hour % bucket_hours] += count
         
         # Converter contagem em média de pessoas
         data = [max(0, int(count / 2)) for count in periods.values()]
         
         return jsonify({
-            'labels': ['00:00', '04:00', '08:00', '12:00', '16:00', '20:00'],
+            'labels': [f'{start:02d}:00' for start in starts],
             'data': data,
             'period': '24h',
-            'total_readings': len(readings),
+            'bucket_hours': bucket_hours,
+            'timezone': str(BRASILIA_TZ),
+            'total_readings': sum(hourly_counts.values()),
             'timestamp': datetime.utcnow().isoformat()
         }), 200
         
@@ -163,6 +154,7 @@ def get_people_flow():
 
 # ========== ENDPOINT 3: Ocupação por Área ==========
 @bp.route('/areas-occupation', methods=['GET'])
+@cache.cached_response()
 def get_areas_occupation():
     """
     Retorna ocupação atual de cada área monitorada
@@ -176,22 +168,32 @@ def get_areas_occupation():
         - percentage: Percentual de ocupação
     """
     try:
-        areas = []
-        
         # Últimos 15 minutos (atividade recente)
         recent_time = datetime.utcnow() - timedelta(minutes=15)
         
-        for area_name, area_config in AREA_MAPPING.items():
-            # Buscar sensores da área
-            sensor_serials = area_config['sensors']
-            capacity = area_config['capacity']
-            
-            # Contar readings recentes dos sensores desta área
-            current_count = Reading.query.join(Sensor).filter(
-                Sensor.serial_number.in_(sensor_serials),
+        # Detecções recentes de todos os sensores das áreas (uma query)
+        sensor_areas = area_index.sensor_areas()
+        counts = dict(
+            db.session.query(Reading.sensor_id, func.count(Reading.id))
+            .filter(
+                Reading.sensor_id.in_(list(sensor_areas)),
                 Reading.timestamp >= recent_time,
                 Reading.activity == 1
-            ).count()
+            )
+            .group_by(Reading.sensor_id)
+            .all()
+        ) if sensor_areas else {}
+        
+        # Agrupar por área
+        area_counts = {}
+        for sensor_id, count in counts.items():
+            area = sensor_areas[sensor_id]
+            area_counts[area] = area_counts.get(area, 0) + count
+        
+        areas = []
+        for area_name in area_index.names():
+            capacity = area_index.capacity(area_name)
+            current_count = area_counts.get(area_name, 0)
             
             percentage = round((current_count / capacity) * 100, 1) if capacity > 0 else 0
             
@@ -227,6 +229,7 @@ def get_areas_occupation():
 
 # ========== ENDPOINT 4: Status da Piscina ==========
 @bp.route('/pool/current', methods=['GET'])
+@cache.cached_response()
 def get_pool_current():
     """
     Retorna status atual da piscina
@@ -249,19 +252,20 @@ def get_pool_current():
         
         print(f"[DEBUG] Buscando pool data para: {today}")
         
-        # Buscar última temperatura da água
-        water_temp = db.session.query(PoolReading).filter(
-            PoolReading.sensor_type == 'water_temp',
-            PoolReading.reading_date == today
-        ).order_by(PoolReading.reading_time.desc()).first()
+        # Últimas leituras por tipo (pool_latest), consideradas só se forem de hoje
+        latest = PoolService.get_latest_readings()
+        
+        # Última temperatura da água
+        water_temp = latest['water_temp']
+        if water_temp and water_temp.reading_date != today:
+            water_temp = None
         
         print(f"[DEBUG] water_temp encontrado: {water_temp}")
         
-        # Buscar última temperatura ambiente
-        ambient_temp = db.session.query(PoolReading).filter(
-            PoolReading.sensor_type == 'ambient_temp',
-            PoolReading.reading_date == today
-        ).order_by(PoolReading.reading_time.desc()).first()
+        # Última temperatura ambiente
+        ambient_temp = latest['ambient_temp']
+        if ambient_temp and ambient_temp.reading_date != today:
+            ambient_temp = None
         
         print(f"[DEBUG] ambient_temp encontrado: {ambient_temp}")
         
@@ -316,6 +320,7 @@ def get_pool_current():
 
 # ========== ENDPOINT 5: Qualidade da Água ==========
 @bp.route('/pool/quality', methods=['GET'])
+@cache.cached_response()
 def get_pool_quality():
     """
     Retorna dados de qualidade da água da piscina
@@ -367,6 +372,7 @@ def get_pool_quality():
 
 # ========== ENDPOINT 6: Alertas Ativos ==========
 @bp.route('/alerts/active', methods=['GET'])
+@cache.cached_response()
 def get_active_alerts():
     """
     Retorna alertas ativos (não resolvidos)
@@ -413,72 +419,49 @@ def get_active_alerts():
 
 # ========== ENDPOINT 7: Previsão de Horário de Pico ==========
 @bp.route('/peak-prediction', methods=['GET'])
+@cache.cached_response()
 def get_peak_prediction():
     """
-    Calcula o horário de pico baseado em dados históricos dos últimos 7 dias
+    Prevê o horário de pico a partir do histograma hora-da-semana
+    
+    O histograma (7×24 contadores por área, horário de Brasília) é
+    mantido pelo rollup: a consulta lê no máximo 168 linhas.
+    
+    Query params:
+    - area: Nome da área (default: total do CEU)
+    - weekday: Dia da semana, 0 = segunda (default: hoje)
     
     Returns:
         JSON com:
         - peak_hour: Horário do pico (formato HH:MM)
-        - peak_count: Número médio de pessoas no pico
+        - peak_count: Número esperado de entradas no pico
+        - interval: Intervalo de confiança do pico (lower, upper)
         - capacity_prediction: Previsão de percentual de capacidade
         - confidence: Nível de confiança da previsão (0-100)
+        - hours: Previsão para cada hora do dia
     """
     try:
-        # Últimos 7 dias
-        week_ago = datetime.utcnow() - timedelta(days=7)
+        area = request.args.get('area')
+        if area and area not in area_index.names() and area != PeakPredictionService.GLOBAL_AREA:
+            return jsonify({'error': f'Área desconhecida: {area}'}), 400
         
-        # Buscar readings da última semana
-        readings = Reading.query.filter(
-            Reading.timestamp >= week_ago,
-            Reading.activity == 1  # Apenas entradas
-        ).all()
+        weekday = request.args.get('weekday', type=int)
+        if weekday is not None and not 0 <= weekday <= 6:
+            return jsonify({'error': 'weekday deve estar entre 0 (segunda) e 6 (domingo)'}), 400
         
-        if not readings:
-            return jsonify({
-                'peak_hour': '16:00',
-                'peak_count': 0,
-                'capacity_prediction': 0,
-                'confidence': 0,
-                'message': 'Dados insuficientes'
-            }), 200
-        
-        # Agrupar por hora do dia
-        hourly_counts = {}
-        for reading in readings:
-            hour = reading.timestamp.hour
-            hourly_counts[hour] = hourly_counts.get(hour, 0) + 1
-        
-        # Encontrar hora com mais entradas
-        if hourly_counts:
-            peak_hour = max(hourly_counts, key=hourly_counts.get)
-            peak_count = hourly_counts[peak_hour]
-            
-            # Calcular média de pessoas no pico (estimativa)
-            avg_peak_people = int(peak_count / 7)  # Média dos 7 dias
-            
-            # Previsão de capacidade
-            capacity_prediction = round((avg_peak_people / MAX_CAPACITY) * 100, 1)
-            
-            # Confiança baseada na quantidade de dados
-            confidence = min(100, int((len(readings) / 100) * 100))
-            
-            return jsonify({
-                'peak_hour': f'{peak_hour:02d}:00',
-                'peak_count': avg_peak_people,
-                'capacity_prediction': capacity_prediction,
-                'confidence': confidence,
-                'total_readings': len(readings),
-                'timestamp': datetime.utcnow().isoformat()
-            }), 200
-        else:
-            return jsonify({
+        prediction = PeakPredictionService.predict(area, weekday)
+        
+        if not prediction['samples']:
+            prediction.update({
                 'peak_hour': '16:00',
                 'peak_count': 0,
                 'capacity_prediction': 0,
                 'confidence': 0,
                 'message': 'Dados insuficientes'
-            }), 200
+            })
+        
+        prediction['timestamp'] = datetime.utcnow().isoformat()
+        return jsonify(prediction), 200
         
     except Exception as e:
         return jsonify({
@@ -489,6 +472,7 @@ def get_peak_prediction():
 
 # ========== ENDPOINT 8: Estatísticas Avançadas ==========
 @bp.route('/advanced-stats', methods=['GET'])
+@cache.cached_response()
 def get_advanced_stats():
     """
     Retorna estatísticas avançadas com médias, tendências e previsões
@@ -559,6 +543,94 @@ def get_advanced_stats():
         }), 500
 
 
+# ========== ENDPOINT 9: Stream ao Vivo (SSE) ==========
+def _sse(event, data):
+    """Formata um evento Server-Sent Events"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def _view_json(view):
+    """Executa uma view do dashboard (com cache) e retorna o JSON"""
+    return make_response(view()).get_json()
+
+
+def _build_snapshot():
+    """
+    Estado completo do dashboard para clientes que acabaram de conectar
+    
+    O stream mantém o mesmo request context (e a mesma sessão) durante
+    toda a conexão: a sessão é encerrada após cada snapshot para que o
+    próximo não leia da mesma transação REPEATABLE READ (dados antigos,
+    que ainda iriam para o cache de respostas) e para devolver a conexão
+    ao pool enquanto o cliente espera eventos.
+    """
+    try:
+        return {
+            'current_stats': _view_json(get_current_stats),
+            'areas': _view_json(get_areas_occupation),
+            'pool': _view_json(get_pool_current),
+            'alerts': _view_json(get_active_alerts),
+            'timestamp': datetime.utcnow().isoformat()
+        }
+    finally:
+        db.session.remove()
+
+
+@bp.route('/stream', methods=['GET'])
+def stream():
+    """
+    Stream de eventos ao vivo (Server-Sent Events)
+    
+    Substitui o polling de 30s: envia um snapshot completo ao conectar
+    (e a cada DASHBOARD_STREAM_SNAPSHOT_SECONDS) e, entre snapshots,
+    deltas assim que novas leituras, alertas ou dados da piscina chegam.
+    
+    Eventos:
+        snapshot: current_stats, areas, pool e alerts (mesmo formato dos endpoints)
+        occupancy: totais do dia {'date', 'entries', 'exits', 'current', 'areas', 'last_reading'}
+        pool: nova leitura da piscina
+        alert: novo alerta
+    
+    Cada cliente ocupa uma thread/conexão enquanto estiver conectado:
+    executar com servidor threaded (ou gevent/eventlet).
+    """
+    app = current_app._get_current_object()
+    snapshot_interval = app.config.get('DASHBOARD_STREAM_SNAPSHOT_SECONDS', 60)
+    keepalive_interval = 15
+    
+    queue = live_feed.subscribe(app)
+    
+    def generate():
+        try:
+            yield 'retry: 5000\n\n'
+            yield _sse('snapshot', _build_snapshot())
+            next_snapshot = time.monotonic() + snapshot_interval
+            
+            while True:
+                timeout = min(keepalive_interval, max(0, next_snapshot - time.monotonic()))
+                try:
+                    event, data = queue.get(timeout=timeout)
+                    yield _sse(event, data)
+                except Empty:
+                    if time.monotonic() >= next_snapshot:
+                        yield _sse('snapshot', _build_snapshot())
+                        next_snapshot = time.monotonic() + snapshot_interval
+                    else:
+                        # Comentário SSE: mantém a conexão viva em proxies
+                        yield ': keep-alive\n\n'
+        finally:
+            live_feed.unsubscribe(queue)
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
+
 # ========== ENDPOINT DE HEALTH CHECK ==========
 @bp.route('/health', methods=['GET'])
 def health_check():
@@ -96,6 +96,8 @@ def get_readings():
         end_date: Data final YYYY-MM-DD (opcional)
         limit: Número máximo de resultados (padrão: 100)
         offset: Offset para paginação (padrão: 0)
+        cursor: next_cursor da página anterior (paginação por cursor)
+        include_total: true para incluir o total de registros (padrão: false)
     
     Returns:
         200: Lista de leituras
@@ -107,13 +109,21 @@ def get_readings():
         query_params = query_schema.load(request.args)
         
         # Buscar leituras
-        readings, total = PoolService.get_readings(
-            sensor_type=query_params.get('sensor_type'),
-            start_date=query_params.get('start_date'),
-            end_date=query_params.get('end_date'),
-            limit=query_params.get('limit', 100),
-            offset=query_params.get('offset', 0)
-        )
+        try:
+            readings, total, next_cursor = PoolService.get_readings(
+                sensor_type=query_params.get('sensor_type'),
+                start_date=query_params.get('start_date'),
+                end_date=query_params.get('end_date'),
+                limit=query_params.get('limit', 100),
+                offset=query_params.get('offset', 0),
+                cursor=query_params.get('cursor'),
+                include_total=query_params.get('include_total', False)
+            )
+        except ValueError as e:
+            return jsonify({
+                'error': 'Parâmetros inválidos',
+                'details': str(e)
+            }), 400
         
         # Retornar resposta
         return jsonify({
@@ -121,7 +131,9 @@ def get_readings():
             'pagination': {
                 'total': total,
                 'limit': query_params.get('limit', 100),
-                'offset': query_params.get('offset', 0)
+                'offset': query_params.get('offset', 0),
+                'next_cursor': next_cursor,
+                'has_more': next_cursor is not None
             }
         }), 200
         
@@ -211,6 +223,8 @@ def get_temperature_history():
         sensor_type: 'water_temp' ou 'ambient_temp' (obrigatório)
         days: Número de dias de histórico (padrão: 7)
         limit: Número máximo de pontos (padrão: 100)
+        downsample: 'lttb' (padrão) para `limit` pontos representativos do
+            período inteiro, ou 'none' para as `limit` leituras mais recentes
     
     Returns:
         200: Histórico de temperatura
@@ -232,17 +246,25 @@ def get_temperature_history():
         
         days = request.args.get('days', default=7, type=int)
         limit = request.args.get('limit', default=100, type=int)
+        downsample = request.args.get('downsample', default='lttb')
+        
+        if downsample not in PoolService.DOWNSAMPLE_MODES:
+            return jsonify({
+                'error': f"downsample deve ser um de: {', '.join(PoolService.DOWNSAMPLE_MODES)}"
+            }), 400
         
         readings = PoolService.get_temperature_history(
             sensor_type=sensor_type,
             days=days,
-            limit=limit
+            limit=limit,
+            downsample=downsample
         )
         
         return jsonify({
             'data': readings_response_schema.dump(readings),
             'sensor_type': sensor_type,
-            'period_days': days
+            'period_days': days,
+            'downsample': downsample
         }), 200
         
     except Exception as e:
@@ -263,6 +285,7 @@ def get_daily_temperature_average():
     Query Parameters:
         sensor_type: 'water_temp' ou 'ambient_temp' (obrigatório)
         days: Número de dias de histórico (padrão: 10)
+        granularity: 'day' (padrão) ou 'hour'
     
     Returns:
         200: Média diária de temperatura
@@ -289,15 +312,24 @@ def get_daily_temperature_average():
                 'error': 'Parâmetro days deve estar entre 1 e 365'
             }), 400
         
+        granularity = request.args.get('granularity', 'day')
+        
+        if granularity not in ['day', 'hour']:
+            return jsonify({
+                'error': 'Parâmetro granularity deve ser day ou hour'
+            }), 400
+        
         daily_averages = PoolService.get_daily_temperature_average(
             sensor_type=sensor_type,
-            days=days
+            days=days,
+            granularity=granularity
         )
         
         return jsonify({
             'data': daily_averages,
             'sensor_type': sensor_type,
-            'period_days': days
+            'period_days': days,
+            'granularity': granularity
         }), 200
         
     except Exception as e:
@@ -340,17 +372,19 @@ def health_check():
     """
     Health check do módulo de piscina.
     
+    Usa apenas consultas resolvidas por índice (sem agregados do período).
+    
     Returns:
         200: Status do módulo
     """
     try:
-        # Tentar buscar estatísticas básicas
-        stats = PoolService.get_statistics(days=1)
+        health = PoolService.health()
         
         return jsonify({
             'status': 'healthy',
             'module': 'pool_monitoring',
-            'total_readings_today': stats.get('total_readings', 0),
+            'total_readings_today': health['total_readings_today'],
+            'last_reading_at': health['last_reading_at'],
             'timestamp': datetime.utcnow().isoformat()
         }), 200
         
@@ -3,11 +3,14 @@ Readings Routes
 Endpoints para leituras dos sensores
 """
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required
 from app import db
 from app.models.reading import Reading
 from app.models.sensor import Sensor
+from app.services.ingestion_service import IngestionService
+from app.services.reading_service import ReadingService
+from app.services.sensor_stats import sensor_stats
 from datetime import datetime, timedelta
 
 bp = Blueprint('readings', __name__)
@@ -21,75 +24,59 @@ def list_readings():
     - sensor_id: filtrar por sensor
     - start_date: data inicial (ISO format)
     - end_date: data final (ISO format)
-    - limit: número máximo de resultados (default: 100)
+    - limit: número máximo de resultados (default: 100, máximo: 1000)
+    - cursor: next_cursor da página anterior
+    - include_total: true para incluir o total de leituras do filtro
+    
+    Paginação por cursor em (timestamp, id): qualquer página custa o
+    mesmo que a primeira. O total exige um COUNT e só é calculado se
+    solicitado.
     """
     sensor_id = request.args.get('sensor_id', type=int)
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
-    limit = request.args.get('limit', default=100, type=int)
-    
-    query = Reading.query
+    limit = min(max(request.args.get('limit', default=100, type=int), 1), 1000)
+    cursor = request.args.get('cursor')
+    include_total = request.args.get('include_total', 'false').lower() == 'true'
     
-    if sensor_id:
-        query = query.filter_by(sensor_id=sensor_id)
+    start = end = None
     
     if start_date:
         try:
             start = datetime.fromisoformat(start_date.replace('Z', '+00:00'))
-            query = query.filter(Reading.timestamp >= start)
         except ValueError:
             return jsonify({'error': 'Formato de start_date inválido. Use ISO format.'}), 400
     
     if end_date:
         try:
             end = datetime.fromisoformat(end_date.replace('Z', '+00:00'))
-            query = query.filter(Reading.timestamp <= end)
         except ValueError:
             return jsonify({'error': 'Formato de end_date inválido. Use ISO format.'}), 400
     
-    # Ordenar por timestamp decrescente (mais recentes primeiro)
-    readings = query.order_by(Reading.timestamp.desc()).limit(limit).all()
+    try:
+        page = ReadingService.list_readings_page(
+            sensor_id=sensor_id,
+            start_date=start,
+            end_date=end,
+            limit=limit,
+            cursor=cursor,
+            include_total=include_total
+        )
+    except ValueError:
+        return jsonify({'error': 'Cursor inválido'}), 400
     
-    return jsonify({
-        'count': len(readings),
-        'readings': [{
-            'id': reading.id,
-            'sensor_id': reading.sensor_id,
-            'sensor_serial': reading.sensor.serial_number if reading.sensor else None,
-            'activity': reading.activity,
-            'battery_level': reading.battery_level,
-            'signal_strength': reading.signal_strength,
-            'timestamp': reading.timestamp.isoformat(),
-            'metadata': reading.metadata
-        } for reading in readings]
-    }), 200
+    return jsonify(page), 200
 
 
 @bp.route('/<int:reading_id>', methods=['GET'])
 def get_reading(reading_id):
     """Obter detalhes de uma leitura específica"""
-    reading = Reading.query.get(reading_id)
+    reading = ReadingService.get_reading_detail(reading_id)
     
     if not reading:
         return jsonify({'error': 'Leitura não encontrada'}), 404
     
-    return jsonify({
-        'id': reading.id,
-        'sensor_id': reading.sensor_id,
-        'sensor': {
-            'id': reading.sensor.id,
-            'serial_number': reading.sensor.serial_number,
-            'protocol': reading.sensor.protocol,
-            'location': reading.sensor.location
-        } if reading.sensor else None,
-        'activity': reading.activity,
-        'battery_level': reading.battery_level,
-        'signal_strength': reading.signal_strength,
-        'temperature': reading.temperature,
-        'humidity': reading.humidity,
-        'timestamp': reading.timestamp.isoformat(),
-        'metadata': reading.metadata
-    }), 200
+    return jsonify(reading), 200
 
 
 @bp.route('', methods=['POST'])
@@ -144,17 +131,23 @@ def create_reading():
         )
         
         db.session.add(reading)
+        db.session.commit()
         
-        # Atualizar sensor
-        sensor.last_reading_at = datetime.utcnow()
-        sensor.total_readings += 1
-        
-        if 'battery_level' in data:
-            sensor.battery_level = data['battery_level']
-        if 'signal_strength' in data:
-            sensor.signal_strength = data['signal_strength']
+        # Atualizar sensor (gravação adiada, um UPDATE por intervalo)
+        sensor_stats.record(
+            sensor.id,
+            reading.timestamp,
+            battery_level=data.get('battery_level'),
+            signal_strength=data.get('signal_strength')
+        )
+        sensor_stats.maybe_flush()
         
-        db.session.commit()
+        IngestionService.notify_listeners([{
+            'sensor_id': reading.sensor_id,
+            'activity': reading.activity,
+            'timestamp': reading.timestamp,
+            'sensor_metadata': reading.sensor_metadata
+        }])
         
         return jsonify({
             'message': 'Leitura criada com sucesso',
@@ -176,6 +169,9 @@ def create_bulk_readings():
     """
     Criar múltiplas leituras de uma vez
     
+    Validação em uma passada, uma query para os sensores e um único
+    INSERT multi-linha. Erros são reportados pelo índice do item.
+    
     Payload:
     {
         "readings": [
@@ -190,59 +186,20 @@ def create_bulk_readings():
     """
     data = request.get_json()
     
-    if 'readings' not in data or not isinstance(data['readings'], list):
+    if not data or 'readings' not in data or not isinstance(data['readings'], list):
         return jsonify({'error': 'Campo readings deve ser uma lista'}), 400
     
-    readings_created = 0
-    errors = []
+    max_items = current_app.config.get('READINGS_BULK_MAX_ITEMS', 10000)
+    if len(data['readings']) > max_items:
+        return jsonify({'error': f'Máximo de {max_items} leituras por requisição'}), 400
     
     try:
-        for reading_data in data['readings']:
-            if 'sensor_id' not in reading_data:
-                errors.append({'error': 'sensor_id é obrigatório', 'data': reading_data})
-                continue
-            
-            sensor = Sensor.query.get(reading_data['sensor_id'])
-            if not sensor:
-                errors.append({'error': f'Sensor {reading_data["sensor_id"]} não encontrado'})
-                continue
-            
-            # Preparar metadados do sensor
-            sensor_metadata = {}
-            if 'battery_level' in reading_data:
-                sensor_metadata['battery_level'] = reading_data['battery_level']
-            if 'signal_strength' in reading_data:
-                sensor_metadata['signal_strength'] = reading_data['signal_strength']
-            if 'temperature' in reading_data:
-                sensor_metadata['temperature'] = reading_data['temperature']
-            if 'humidity' in reading_data:
-                sensor_metadata['humidity'] = reading_data['humidity']
-            
-            # Adicionar metadata customizado
-            if 'metadata' in reading_data:
-                sensor_metadata.update(reading_data['metadata'])
-            
-            reading = Reading(
-                sensor_id=reading_data['sensor_id'],
-                activity=reading_data.get('activity', 0),
-                timestamp=datetime.utcnow(),
-                sensor_metadata=sensor_metadata if sensor_metadata else None
-            )
-            
-            db.session.add(reading)
-            
-            # Atualizar sensor
-            sensor.last_reading_at = datetime.utcnow()
-            sensor.total_readings += 1
-            
-            readings_created += 1
-        
-        db.session.commit()
+        result = ReadingService.create_bulk_readings(data['readings'])
         
         return jsonify({
-            'message': f'{readings_created} leituras criadas com sucesso',
-            'created': readings_created,
-            'errors': errors
+            'message': f"{result['created']} leituras criadas com sucesso",
+            'created': result['created'],
+            'errors': result['errors']
         }), 201
         
     except Exception as e:
@@ -258,27 +215,19 @@ def get_latest_reading(sensor_id):
     if not sensor:
         return jsonify({'error': 'Sensor não encontrado'}), 404
     
-    reading = Reading.query.filter_by(sensor_id=sensor_id)\
-        .order_by(Reading.timestamp.desc()).first()
+    reading = ReadingService.get_latest_detail(sensor_id)
     
     if not reading:
         return jsonify({'error': 'Nenhuma leitura encontrada para este sensor'}), 404
     
-    return jsonify({
-        'id': reading.id,
-        'sensor_id': reading.sensor_id,
-        'activity': reading.activity,
-        'battery_level': reading.battery_level,
-        'signal_strength': reading.signal_strength,
-        'timestamp': reading.timestamp.isoformat()
-    }), 200
+    return jsonify(reading), 200
 
 
 @bp.route('/<int:reading_id>', methods=['DELETE'])
 @jwt_required()
 def delete_reading(reading_id):
     """Deletar leitura (apenas admin)"""
-    reading = Reading.query.get(reading_id)
+    reading = Reading.query.filter_by(id=reading_id).first()
     
     if not reading:
         return jsonify({'error': 'Leitura não encontrada'}), 404
@@ -7,6 +7,7 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt
 from app import db
 from app.models.sensor import Sensor
+from app.services.sensor_registry import sensor_registry
 from datetime import datetime
 
 bp = Blueprint('sensors', __name__)
@@ -115,6 +116,7 @@ def create_sensor():
         
         db.session.add(sensor)
         db.session.commit()
+        sensor_registry.invalidate()
         
         return jsonify({
             'message': 'Sensor criado com sucesso',
@@ -165,6 +167,7 @@ def update_sensor(sensor_id):
         
         sensor.updated_at = datetime.utcnow()
         db.session.commit()
+        sensor_registry.invalidate()
         
         return jsonify({
             'message': 'Sensor atualizado com sucesso',
@@ -197,6 +200,7 @@ def delete_sensor(sensor_id):
     try:
         db.session.delete(sensor)
         db.session.commit()
+        sensor_registry.invalidate()
         
         return jsonify({'message': 'Sensor deletado com sucesso'}), 200
         
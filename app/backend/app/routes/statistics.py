@@ -3,13 +3,15 @@ Statistics Routes
 Endpoints para estatísticas e relatórios
 """
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from flask_jwt_extended import jwt_required
 from app import db
 from app.models.reading import Reading
 from app.models.sensor import Sensor
 from app.models.statistics import Statistics
-from datetime import datetime, timedelta
+from app.services.statistics_service import StatisticsService
+from app.services.export_service import ExportService
+from datetime import datetime, timedelta, timezone
 from sqlalchemy import func
 
 bp = Blueprint('statistics', __name__)
@@ -72,52 +74,10 @@ def get_activity_stats():
     period = request.args.get('period', 'day')
     sensor_id = request.args.get('sensor_id', type=int)
     
-    # Definir período
-    if period == 'day':
-        start_date = datetime.utcnow() - timedelta(days=1)
-        interval = timedelta(hours=1)
-    elif period == 'week':
-        start_date = datetime.utcnow() - timedelta(weeks=1)
-        interval = timedelta(days=1)
-    elif period == 'month':
-        start_date = datetime.utcnow() - timedelta(days=30)
-        interval = timedelta(days=1)
-    else:
-        return jsonify({'error': 'Período inválido. Use: day, week, month'}), 400
-    
-    # Query base
-    query = Reading.query.filter(Reading.timestamp >= start_date)
-    
-    if sensor_id:
-        query = query.filter_by(sensor_id=sensor_id)
-    
-    # Contar atividades
-    total_detections = query.filter(Reading.activity == 1).count()
-    total_readings = query.count()
-    
-    # Atividade por hora/dia
-    readings = query.all()
-    
-    # Agrupar por intervalo
-    activity_timeline = {}
-    current = start_date
-    end = datetime.utcnow()
-    
-    while current <= end:
-        next_interval = current + interval
-        count = len([r for r in readings if current <= r.timestamp < next_interval and r.activity == 1])
-        activity_timeline[current.isoformat()] = count
-        current = next_interval
-    
-    return jsonify({
-        'period': period,
-        'start_date': start_date.isoformat(),
-        'end_date': datetime.utcnow().isoformat(),
-        'total_detections': total_detections,
-        'total_readings': total_readings,
-        'detection_rate': round((total_detections / total_readings * 100), 2) if total_readings > 0 else 0,
-        'timeline': activity_timeline
-    }), 200
+    try:
+        return jsonify(StatisticsService.get_activity_stats(period, sensor_id)), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
 
 @bp.route('/sensors', methods=['GET'])
@@ -126,109 +86,19 @@ def get_sensors_stats():
     Estatísticas por sensor
     Retorna estatísticas individuais de cada sensor
     """
-    sensors = Sensor.query.all()
-    
-    stats = []
-    for sensor in sensors:
-        # Leituras totais
-        total_readings = Reading.query.filter_by(sensor_id=sensor.id).count()
-        
-        # Detecções (activity = 1)
-        detections = Reading.query.filter_by(
-            sensor_id=sensor.id,
-            activity=1
-        ).count()
-        
-        # Última leitura
-        last_reading = Reading.query.filter_by(sensor_id=sensor.id)\
-            .order_by(Reading.timestamp.desc()).first()
-        
-        # Média de bateria
-        avg_battery = db.session.query(func.avg(Reading.battery_level))\
-            .filter(Reading.sensor_id == sensor.id)\
-            .scalar()
-        
-        stats.append({
-            'sensor_id': sensor.id,
-            'serial_number': sensor.serial_number,
-            'protocol': sensor.protocol,
-            'location': sensor.location,
-            'status': sensor.status,
-            'total_readings': total_readings,
-            'total_detections': detections,
-            'detection_rate': round((detections / total_readings * 100), 2) if total_readings > 0 else 0,
-            'last_reading': last_reading.timestamp.isoformat() if last_reading else None,
-            'avg_battery_level': round(avg_battery, 2) if avg_battery else None,
-            'current_battery_level': sensor.battery_level
-        })
-    
-    return jsonify({
-        'count': len(stats),
-        'sensors': stats
-    }), 200
+    return jsonify(StatisticsService.get_sensors_stats(include_battery=True)), 200
 
 
 @bp.route('/capacity', methods=['GET'])
 def get_capacity_stats():
     """
     Estatísticas de capacidade do parque
-    Calcula ocupação atual baseada nas detecções
+    Ocupação atual a partir dos contadores do dia (entradas - saídas)
     """
     # Capacidade máxima (exemplo - ajustar conforme necessário)
     max_capacity = 5000
     
-    # Calcular ocupação nas últimas 24h
-    yesterday = datetime.utcnow() - timedelta(days=1)
-    
-    # Entradas (detecções nos sensores de entrada)
-    entries_sensors = Sensor.query.filter(
-        Sensor.location.ilike('%entrada%')
-    ).all()
-    
-    total_entries = 0
-    for sensor in entries_sensors:
-        entries = Reading.query.filter(
-            Reading.sensor_id == sensor.id,
-            Reading.timestamp >= yesterday,
-            Reading.activity == 1
-        ).count()
-        total_entries += entries
-    
-    # Saídas (detecções nos sensores de saída)
-    exits_sensors = Sensor.query.filter(
-        Sensor.location.ilike('%saída%')
-    ).all()
-    
-    total_exits = 0
-    for sensor in exits_sensors:
-        exits = Reading.query.filter(
-            Reading.sensor_id == sensor.id,
-            Reading.timestamp >= yesterday,
-            Reading.activity == 1
-        ).count()
-        total_exits += exits
-    
-    # Ocupação atual estimada
-    current_occupation = max(0, total_entries - total_exits)
-    occupation_percentage = round((current_occupation / max_capacity * 100), 2)
-    
-    # Determinar status
-    if occupation_percentage < 70:
-        status = 'normal'
-    elif occupation_percentage < 90:
-        status = 'alert'
-    else:
-        status = 'critical'
-    
-    return jsonify({
-        'max_capacity': max_capacity,
-        'current_occupation': current_occupation,
-        'occupation_percentage': occupation_percentage,
-        'status': status,
-        'entries_24h': total_entries,
-        'exits_24h': total_exits,
-        'timestamp': datetime.utcnow().isoformat()
-    }), 200
+    return jsonify(StatisticsService.get_capacity_stats(max_capacity)), 200
 
 
 @bp.route('/history', methods=['GET'])
@@ -271,41 +141,83 @@ def get_historical_stats():
     }), 200
 
 
+def _parse_utc(value):
+    """Converte uma data ISO em UTC sem timezone (como readings.timestamp)"""
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
 @bp.route('/export', methods=['GET'])
 @jwt_required()
 def export_stats():
     """
-    Exportar estatísticas (CSV ou JSON)
+    Exportar leituras do período (streaming)
     Query params:
-    - format: csv ou json (default: json)
+    - format: json, ndjson ou csv (default: json)
     - period: day, week, month
+    - start_date, end_date: intervalo explícito (ISO format; substitui period)
+    - gzip: true para comprimir (também usado se o cliente aceitar gzip)
+    
+    As leituras são lidas em lotes com cursor do lado do servidor e
+    enviadas conforme são serializadas: a memória usada não depende do
+    tamanho do período. Períodos antigos são lidos do arquivo frio.
     """
     format_type = request.args.get('format', 'json')
     period = request.args.get('period', 'day')
     
+    if format_type not in ExportService.FORMATS:
+        return jsonify({'error': f'Formato inválido. Use: {", ".join(ExportService.FORMATS)}'}), 400
+    
     # Buscar dados conforme período
-    if period == 'day':
-        start_date = datetime.utcnow() - timedelta(days=1)
+    end_date = datetime.utcnow()
+    if request.args.get('start_date'):
+        try:
+            start_date = _parse_utc(request.args['start_date'])
+            if request.args.get('end_date'):
+                end_date = _parse_utc(request.args['end_date'])
+        except ValueError:
+            return jsonify({'error': 'Formato de data inválido. Use ISO format.'}), 400
+        period = 'custom'
+    elif period == 'day':
+        start_date = end_date - timedelta(days=1)
     elif period == 'week':
-        start_date = datetime.utcnow() - timedelta(weeks=1)
+        start_date = end_date - timedelta(weeks=1)
     elif period == 'month':
-        start_date = datetime.utcnow() - timedelta(days=30)
+        start_date = end_date - timedelta(days=30)
     else:
         return jsonify({'error': 'Período inválido'}), 400
     
-    readings = Reading.query.filter(Reading.timestamp >= start_date).all()
+    batches = ExportService.iter_readings(start_date, end_date)
     
-    if format_type == 'json':
-        return jsonify({
+    if format_type == 'csv':
+        chunks = ExportService.iter_csv(batches)
+    elif format_type == 'ndjson':
+        chunks = ExportService.iter_ndjson(batches)
+    else:
+        chunks = ExportService.iter_json(batches, {
             'period': period,
             'start_date': start_date.isoformat(),
-            'end_date': datetime.utcnow().isoformat(),
-            'readings': [{
-                'sensor_id': r.sensor_id,
-                'activity': r.activity,
-                'timestamp': r.timestamp.isoformat()
-            } for r in readings]
-        }), 200
+            'end_date': end_date.isoformat()
+        })
+    
+    compress = request.args.get('gzip', 'false').lower() == 'true' or \
+        'gzip' in request.accept_encodings
+    if compress:
+        chunks = ExportService.gzip_stream(chunks)
+    
+    response = Response(
+        stream_with_context(chunks),
+        mimetype=ExportService.MIMETYPES[format_type]
+    )
+    
+    if compress:
+        response.headers['Content-Encoding'] = 'gzip'
+        response.headers['Vary'] = 'Accept-Encoding'
+    
+    if format_type != 'json':
+        filename = f'readings_{period}_{start_date.strftime("%Y%m%d")}.{format_type}'
+        response.headers['Content-Disposition'] = f'attachment; filename={filename}'
     
-    # TODO: Implementar exportação CSV
-    return jsonify({'error': 'Formato CSV ainda não implementado'}), 501
+    return response
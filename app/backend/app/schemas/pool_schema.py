@@ -134,6 +134,15 @@ class PoolReadingListQuerySchema(Schema):
         load_default=0
     )
 
+    cursor = fields.Str(
+        required=False
+    )
+    
+    include_total = fields.Bool(
+        required=False,
+        load_default=False
+    )
+
 
 class PoolStatisticsSchema(Schema):
     """Schema para estatísticas da piscina."""
@@ -2,7 +2,7 @@
 Schema de validação para Reading
 """
 
-from marshmallow import Schema, fields, validate, validates_schema, ValidationError
+from marshmallow import EXCLUDE, Schema, fields, validate, validates_schema, ValidationError
 
 
 class ReadingSchema(Schema):
@@ -22,6 +22,11 @@ class ReadingSchema(Schema):
 
 class ReadingCreateSchema(Schema):
     """Schema para criação de leitura"""
+
+    class Meta:
+        # Campos extras de gateways (ex.: message_id) são ignorados
+        unknown = EXCLUDE
+
     sensor_id = fields.Int(required=True)
     activity = fields.Int(
         validate=validate.OneOf([0, 1]),
@@ -32,6 +37,8 @@ class ReadingCreateSchema(Schema):
     temperature = fields.Float(validate=validate.Range(min=-50, max=100))
     humidity = fields.Float(validate=validate.Range(min=0, max=100))
     metadata = fields.Dict()
+    # Horário da leitura (ex.: dados offline reenviados pelo gateway); padrão: agora
+    timestamp = fields.DateTime()
 
 
 class ReadingBulkCreateSchema(Schema):
@@ -39,7 +46,7 @@ class ReadingBulkCreateSchema(Schema):
     readings = fields.List(
         fields.Nested(ReadingCreateSchema),
         required=True,
-        validate=validate.Length(min=1, max=1000)
+        validate=validate.Length(min=1, max=10000)
     )
 
     @validates_schema
@@ -6,10 +6,24 @@ from .auth_service import AuthService
 from .sensor_service import SensorService
 from .reading_service import ReadingService
 from .statistics_service import StatisticsService
+from .ingestion_service import IngestionService
+from .rollup_service import RollupService
+from .peak_prediction_service import PeakPredictionService
+from .export_service import ExportService
+from .partition_service import PartitionService
+from .archive_service import ArchiveService
+from .report_sync_service import ReportSyncService
 
 __all__ = [
     'AuthService',
     'SensorService',
     'ReadingService',
     'StatisticsService',
+    'IngestionService',
+    'RollupService',
+    'PeakPredictionService',
+    'ExportService',
+    'PartitionService',
+    'ArchiveService',
+    'ReportSyncService',
 ]
@@ -0,0 +1,478 @@
+"""
+Service de Arquivo
+Arquivamento de leituras antigas em arquivos CSV comprimidos por dia
+"""
+
+import csv
+import gzip
+import heapq
+import json
+import logging
+import os
+from datetime import date, datetime, time, timedelta
+from itertools import chain
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from flask import current_app
+from sqlalchemy import select, func
+from app import db
+from app.models.reading import Reading
+from app.models.rollup_watermark import RollupWatermark
+
+
+logger = logging.getLogger(__name__)
+
+
+class ArchiveService:
+    """
+    Arquivo frio das leituras (readings) em disco local
+    
+    Os dias (UTC) mais antigos que READINGS_HOT_DAYS são gravados em
+    <READINGS_ARCHIVE_DIR>/readings/AAAA/MM/readings_AAAA-MM-DD.csv.gz,
+    em ordem de timestamp, e então removidos da tabela: com readings
+    particionada (PartitionService), por DROP PARTITION assim que o mês
+    inteiro está arquivado; sem partições, com DELETE em lotes. O
+    manifest.json guarda o horizonte (primeiro dia ainda no banco) e,
+    por dia, o número de linhas e o maior id arquivado.
+    
+    O horizonte avança assim que o arquivo do dia está completo, antes
+    de apagar as linhas: leituras anteriores ao horizonte são lidas só
+    do arquivo e as demais só do banco (ExportService.iter_readings),
+    sem duplicar nem perder linhas durante o job. Leituras que chegam
+    atrasadas com timestamp anterior ao horizonte são acrescentadas ao
+    arquivo do dia na execução seguinte.
+    
+    Só são arquivadas leituras já agregadas pelo rollup (id <= marca
+    d'água de statistics); os totais históricos continuam na tabela
+    statistics.
+    """
+    
+    COLUMNS = (
+        'id', 'sensor_id', 'activity', 'timestamp',
+        'sensor_metadata', 'message_id', 'gateway_id', 'created_at'
+    )
+    MANIFEST = 'manifest.json'
+    
+    @staticmethod
+    def root() -> str:
+        """Diretório do arquivo de leituras"""
+        return os.path.join(current_app.config.get('READINGS_ARCHIVE_DIR', 'archive'), 'readings')
+    
+    @staticmethod
+    def day_path(day: date) -> str:
+        """Caminho do arquivo de um dia"""
+        return os.path.join(
+            ArchiveService.root(),
+            f'{day.year:04d}',
+            f'{day.month:02d}',
+            f'readings_{day.isoformat()}.csv.gz'
+        )
+    
+    @staticmethod
+    def manifest() -> Dict[str, Any]:
+        """Lê o manifest (horizonte e dias arquivados)"""
+        path = os.path.join(ArchiveService.root(), ArchiveService.MANIFEST)
+        
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {'horizon': None, 'days': {}}
+    
+    @staticmethod
+    def _save_manifest(manifest: Dict[str, Any]) -> None:
+        """Grava o manifest de forma atômica"""
+        path = os.path.join(ArchiveService.root(), ArchiveService.MANIFEST)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + '.tmp', path)
+    
+    @staticmethod
+    def horizon() -> Optional[datetime]:
+        """
+        Início (UTC) das leituras mantidas no banco
+        
+        Returns:
+            datetime: Leituras anteriores estão no arquivo (None = nada arquivado)
+        """
+        horizon = ArchiveService.manifest().get('horizon')
+        return datetime.combine(date.fromisoformat(horizon), time()) if horizon else None
+    
+    @staticmethod
+    def _write(path: str, rows: Iterator[Tuple], append: bool = False) -> Tuple[int, int]:
+        """
+        Grava linhas de readings em um arquivo CSV gzip
+        
+        Um arquivo novo é escrito em .partial e renomeado no fim; no modo
+        append as linhas entram como um novo membro gzip.
+        
+        Returns:
+            Tuple: (linhas gravadas, maior id)
+        """
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        target = path if append else path + '.partial'
+        
+        count = 0
+        max_id = 0
+        with gzip.open(target, 'at' if append else 'wt', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            if not append:
+                writer.writerow(ArchiveService.COLUMNS)
+            
+            for row in rows:
+                reading_id, sensor_id, activity, timestamp, metadata, message_id, gateway_id, created_at = row
+                writer.writerow((
+                    reading_id,
+                    sensor_id,
+                    activity,
+                    timestamp.isoformat(),
+                    json.dumps(metadata) if metadata is not None else '',
+                    message_id or '',
+                    gateway_id or '',
+                    created_at.isoformat() if created_at else ''
+                ))
+                count += 1
+                max_id = max(max_id, reading_id)
+        
+        if not append:
+            os.replace(target, path)
+        
+        return count, max_id
+    
+    @staticmethod
+    def _select(*filters):
+        """SELECT das colunas arquivadas, em ordem de timestamp, via cursor do servidor"""
+        chunk_size = current_app.config.get('EXPORT_CHUNK_SIZE', 5000)
+        
+        stmt = select(
+            Reading.id,
+            Reading.sensor_id,
+            Reading.activity,
+            Reading.timestamp,
+            Reading.sensor_metadata,
+            Reading.message_id,
+            Reading.gateway_id,
+            Reading.created_at
+        ).where(*filters).order_by(Reading.timestamp, Reading.id).execution_options(
+            stream_results=True,
+            yield_per=chunk_size
+        )
+        
+        return db.session.execute(stmt)
+    
+    @staticmethod
+    def _archive_rows(path: str, *filters, append: bool = False) -> Tuple[int, int]:
+        """
+        Grava no arquivo as leituras selecionadas pelos filtros
+        
+        Sem leituras, nenhum arquivo é criado (nem membro gzip vazio).
+        
+        Returns:
+            Tuple: (linhas gravadas, maior id)
+        """
+        selected = ArchiveService._select(*filters)
+        try:
+            first = selected.fetchone()
+            if first is None:
+                return 0, 0
+            return ArchiveService._write(path, chain([first], selected), append=append)
+        finally:
+            selected.close()
+    
+    @staticmethod
+    def _delete(*filters) -> int:
+        """Remove leituras em lotes de READINGS_ARCHIVE_DELETE_BATCH (um commit por lote)"""
+        batch_size = current_app.config.get('READINGS_ARCHIVE_DELETE_BATCH', 5000)
+        deleted = 0
+        
+        while True:
+            ids = db.session.query(Reading.id).filter(*filters)\
+                .order_by(Reading.id).limit(batch_size).all()
+            if not ids:
+                break
+            
+            deleted += Reading.query.filter(Reading.id.in_([i for i, in ids]))\
+                .delete(synchronize_session=False)
+            db.session.commit()
+        
+        return deleted
+    
+    @staticmethod
+    def _recover(manifest: Dict[str, Any], watermark: int, delete: bool = True) -> int:
+        """
+        Trata leituras ainda no banco com timestamp anterior ao horizonte
+        
+        Linhas com id até o maior id arquivado do dia já estão no arquivo
+        (execução interrompida durante a remoção) e são apagadas; as
+        demais chegaram atrasadas e são acrescentadas ao arquivo do dia.
+        
+        Args:
+            manifest: Manifest carregado (atualizado no lugar)
+            watermark: Marca d'água do rollup
+            delete: Apagar as linhas já arquivadas
+        
+        Returns:
+            int: Leituras acrescentadas ao arquivo
+        """
+        horizon = ArchiveService.horizon()
+        appended = 0
+        
+        days = db.session.query(func.date(Reading.timestamp)).filter(
+            Reading.timestamp < horizon,
+            Reading.id <= watermark
+        ).distinct().all()
+        
+        for value, in days:
+            day = value if isinstance(value, date) else date.fromisoformat(str(value))
+            start = datetime.combine(day, time())
+            end = start + timedelta(days=1)
+            info = manifest['days'].setdefault(day.isoformat(), {'rows': 0, 'max_id': 0})
+            
+            count, max_id = ArchiveService._archive_rows(
+                ArchiveService.day_path(day),
+                Reading.timestamp >= start,
+                Reading.timestamp < end,
+                Reading.id > info['max_id'],
+                Reading.id <= watermark,
+                append=True
+            )
+            
+            if count:
+                info['rows'] += count
+                info['max_id'] = max(info['max_id'], max_id)
+                ArchiveService._save_manifest(manifest)
+                appended += count
+            
+            if delete:
+                ArchiveService._delete(
+                    Reading.timestamp >= start,
+                    Reading.timestamp < end,
+                    Reading.id <= info['max_id']
+                )
+        
+        if appended:
+            logger.info(f"Arquivo: {appended} leituras atrasadas acrescentadas")
+        
+        return appended
+    
+    @staticmethod
+    def run(hot_days: Optional[int] = None, dry_run: bool = False) -> Dict[str, Any]:
+        """
+        Arquiva os dias anteriores à janela quente e os remove do banco
+        
+        Com readings particionada, as linhas arquivadas ficam na tabela
+        até o mês inteiro passar do horizonte e saem com DROP PARTITION
+        (PartitionService.drop_archived), sem DELETE.
+        
+        Args:
+            hot_days: Dias mantidos no banco (padrão: READINGS_HOT_DAYS; 0 = desativado)
+            dry_run: Apenas listar os dias que seriam arquivados
+        
+        Returns:
+            Dict: days, rows_archived, rows_deleted, late_appended, horizon
+            e partitions_dropped
+        """
+        from app.services.partition_service import PartitionService
+        
+        if hot_days is None:
+            hot_days = current_app.config.get('READINGS_HOT_DAYS', 0)
+        
+        if hot_days <= 0:
+            return {
+                'days': [], 'rows_archived': 0, 'rows_deleted': 0, 'late_appended': 0,
+                'horizon': ArchiveService.manifest().get('horizon'), 'partitions_dropped': []
+            }
+        
+        cutoff = datetime.utcnow().date() - timedelta(days=hot_days)
+        partitioned = bool(PartitionService.partitions())
+        
+        result = ArchiveService.archive_until(cutoff, dry_run, delete=not partitioned)
+        result['partitions_dropped'] = []
+        
+        if partitioned and not dry_run:
+            result['partitions_dropped'] = PartitionService.drop_archived()
+        
+        return result
+    
+    @staticmethod
+    def archive_until(cutoff: date, dry_run: bool = False, delete: bool = True) -> Dict[str, Any]:
+        """
+        Arquiva os dias anteriores a `cutoff` e avança o horizonte
+        
+        Também usado por PartitionService antes de remover partições
+        expiradas: nesse caso as linhas ficam no banco (delete=False) e
+        saem com o DROP PARTITION.
+        
+        Args:
+            cutoff: Primeiro dia (UTC) mantido no banco
+            dry_run: Apenas listar os dias que seriam arquivados
+            delete: Apagar do banco as linhas arquivadas
+        
+        Returns:
+            Dict: days, rows_archived, rows_deleted, late_appended e horizon
+        """
+        from app.services.rollup_service import RollupService
+        
+        result = {'days': [], 'rows_archived': 0, 'rows_deleted': 0, 'late_appended': 0}
+        manifest = ArchiveService.manifest()
+        
+        watermark = db.session.query(RollupWatermark.last_reading_id)\
+            .filter_by(name=RollupService.WATERMARK).scalar() or 0
+        
+        if manifest.get('horizon') and not dry_run:
+            result['late_appended'] = ArchiveService._recover(manifest, watermark, delete)
+        
+        if manifest.get('horizon'):
+            day = date.fromisoformat(manifest['horizon'])
+        else:
+            oldest = db.session.query(func.min(Reading.timestamp)).scalar()
+            day = oldest.date() if oldest else cutoff
+        
+        while day < cutoff:
+            start = datetime.combine(day, time())
+            end = start + timedelta(days=1)
+            
+            # Só arquiva dias cujas leituras o rollup já agregou
+            pending = db.session.query(Reading.id).filter(
+                Reading.timestamp >= start,
+                Reading.timestamp < end,
+                Reading.id > watermark
+            ).first()
+            if pending:
+                logger.warning(f"Arquivo: leituras de {day} ainda não agregadas; parando")
+                break
+            
+            if dry_run:
+                result['days'].append(day.isoformat())
+                day += timedelta(days=1)
+                continue
+            
+            count, max_id = ArchiveService._archive_rows(
+                ArchiveService.day_path(day),
+                Reading.timestamp >= start,
+                Reading.timestamp < end
+            )
+            db.session.rollback()
+            
+            if count:
+                manifest['days'][day.isoformat()] = {'rows': count, 'max_id': max_id}
+            
+            # Avança o horizonte antes de remover: leituras do dia passam a vir do arquivo
+            manifest['horizon'] = (day + timedelta(days=1)).isoformat()
+            ArchiveService._save_manifest(manifest)
+            
+            if count and delete:
+                result['rows_deleted'] += ArchiveService._delete(
+                    Reading.timestamp >= start,
+                    Reading.timestamp < end,
+                    Reading.id <= max_id
+                )
+            
+            result['days'].append(day.isoformat())
+            result['rows_archived'] += count
+            day += timedelta(days=1)
+        
+        if result['rows_archived']:
+            logger.info(
+                f"Arquivo: {result['rows_archived']} leituras de {len(result['days'])} dias "
+                f"(horizonte {manifest['horizon']})"
+            )
+        
+        result['horizon'] = manifest.get('horizon')
+        return result
+    
+    @staticmethod
+    def _iter_file(path: str) -> Iterator[Tuple]:
+        """Lê (sensor_id, activity, timestamp) de um arquivo diário, na ordem gravada"""
+        with gzip.open(path, 'rt', encoding='utf-8', newline='') as f:
+            for record in csv.reader(f):
+                if record[0] == 'id':
+                    continue  # cabeçalho
+                yield int(record[1]), int(record[2]), datetime.fromisoformat(record[3])
+    
+    @staticmethod
+    def _iter_run(path: str, index: int) -> Iterator[Tuple]:
+        """Linhas da sequência ordenada `index` do arquivo (ver _read_day)"""
+        run = 0
+        previous = None
+        
+        for row in ArchiveService._iter_file(path):
+            if previous is not None and row[2] < previous:
+                run += 1
+                if run > index:
+                    return
+            previous = row[2]
+            
+            if run == index:
+                yield row
+    
+    @staticmethod
+    def _read_day(path: str, start: datetime, end: datetime) -> Iterator[Tuple]:
+        """
+        Lê (sensor_id, activity, timestamp) de um arquivo diário no intervalo
+        
+        Cada membro gzip está em ordem de timestamp, mas membros
+        acrescentados por leituras atrasadas podem voltar no tempo: o
+        arquivo é lido como sequências ordenadas intercaladas com
+        heapq.merge (uma leitura do arquivo por sequência, normalmente
+        uma só), sem carregar o dia em memória.
+        """
+        runs = 1
+        previous = None
+        for row in ArchiveService._iter_file(path):
+            if previous is not None and row[2] < previous:
+                runs += 1
+            previous = row[2]
+        
+        if runs == 1:
+            rows = ArchiveService._iter_file(path)
+        else:
+            rows = heapq.merge(
+                *(ArchiveService._iter_run(path, index) for index in range(runs)),
+                key=lambda row: row[2]
+            )
+        
+        for row in rows:
+            if row[2] >= end:
+                break
+            if row[2] >= start:
+                yield row
+    
+    @staticmethod
+    def iter_readings(start_date: datetime, end_date: datetime,
+                      chunk_size: Optional[int] = None) -> Iterator[List[Tuple]]:
+        """
+        Percorre as leituras arquivadas do período em lotes
+        
+        Mesmo formato de ExportService.iter_readings: a memória usada é
+        limitada a um lote.
+        
+        Args:
+            start_date: Início (UTC, inclusivo)
+            end_date: Fim (UTC, exclusivo)
+            chunk_size: Linhas por lote (padrão: EXPORT_CHUNK_SIZE)
+        
+        Yields:
+            List[Tuple]: Lote de (sensor_id, activity, timestamp)
+        """
+        if chunk_size is None:
+            chunk_size = current_app.config.get('EXPORT_CHUNK_SIZE', 5000)
+        
+        day = start_date.date()
+        while datetime.combine(day, time()) < end_date:
+            path = ArchiveService.day_path(day)
+            
+            if os.path.exists(path):
+                chunk = []
+                for row in ArchiveService._read_day(path, start_date, end_date):
+                    chunk.append(row)
+                    if len(chunk) >= chunk_size:
+                        yield chunk
+                        chunk = []
+                if chunk:
+                    yield chunk
+            
+            day += timedelta(days=1)
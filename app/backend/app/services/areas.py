@@ -0,0 +1,123 @@
+"""
+Áreas do CEU
+Definição das áreas monitoradas e dos sensores de cada uma
+"""
+
+from threading import Lock
+from typing import Dict, List, Optional
+from app.services.sensor_registry import sensor_registry
+from occupancy_counter import direction
+
+
+MAX_CAPACITY = 300  # Capacidade máxima do CEU
+
+# Mapeamento de sensores para áreas
+AREA_MAPPING = {
+    'Entrada Principal': {'sensors': ['LORA-ENTRADA-01', 'LORA-SAIDA-01'], 'capacity': 100},
+    'Entrada Lateral Norte': {'sensors': ['ZIGB-LATERAL-01'], 'capacity': 50},
+    'Entrada Lateral Sul': {'sensors': ['ZIGB-LATERAL-02'], 'capacity': 50},
+    'Banheiros': {'sensors': ['SIGF-BANHEIRO-01'], 'capacity': 40},
+    'Portaria': {'sensors': ['RFID-PORTARIA-01'], 'capacity': 20}
+}
+
+
+class AreaIndex:
+    """
+    Índice em memória área → sensor_ids (e sensor_id → área / sentido)
+    
+    Resolve os seriais de AREA_MAPPING uma única vez por carga do
+    registro de sensores: quando o registro recarrega a tabela sensors
+    (TTL ou `invalidate()` após criar, alterar ou remover sensores), o
+    índice é refeito na próxima consulta. Seriais ainda não cadastrados
+    são ignorados até aparecerem no registro.
+    """
+    
+    def __init__(self, mapping: Optional[Dict[str, dict]] = None):
+        """
+        Inicializa o índice (vazio até a primeira consulta)
+        
+        Args:
+            mapping: Definição das áreas (padrão: AREA_MAPPING)
+        """
+        self.mapping = mapping if mapping is not None else AREA_MAPPING
+        self._version: Optional[int] = None
+        self._by_area: Dict[str, List[int]] = {}
+        self._by_sensor: Dict[int, str] = {}
+        self._directions: Dict[int, str] = {}
+        self._lock = Lock()
+    
+    def _refresh(self) -> None:
+        """Refaz o índice se o registro de sensores foi recarregado"""
+        version, sensors = sensor_registry.snapshot()
+        
+        with self._lock:
+            if version == self._version:
+                return
+            
+            by_area: Dict[str, List[int]] = {}
+            by_sensor: Dict[int, str] = {}
+            
+            for area, config in self.mapping.items():
+                ids = [sensors[serial].id for serial in config['sensors'] if serial in sensors]
+                by_area[area] = ids
+                for sensor_id in ids:
+                    by_sensor[sensor_id] = area
+            
+            self._by_area = by_area
+            self._by_sensor = by_sensor
+            self._directions = {
+                info.id: direction(info.location)
+                for info in sensors.values()
+                if direction(info.location)
+            }
+            self._version = version
+    
+    def names(self) -> List[str]:
+        """Nomes das áreas, na ordem de definição"""
+        return list(self.mapping)
+    
+    def capacity(self, area: str) -> int:
+        """Capacidade máxima da área (0 se desconhecida)"""
+        return self.mapping.get(area, {}).get('capacity', 0)
+    
+    def sensor_ids(self, area: str) -> List[int]:
+        """
+        IDs dos sensores cadastrados da área
+        
+        Args:
+            area: Nome da área
+        
+        Returns:
+            List[int]: IDs (vazio se a área não existir)
+        """
+        self._refresh()
+        return list(self._by_area.get(area, []))
+    
+    def sensor_areas(self) -> Dict[int, str]:
+        """
+        Mapeia sensor_id → nome da área
+        
+        Returns:
+            Dict[int, str]: Área de cada sensor cadastrado presente no mapeamento
+        """
+        self._refresh()
+        return dict(self._by_sensor)
+    
+    def sensor_directions(self) -> Dict[int, str]:
+        """
+        Mapeia sensor_id → sentido (ENTRY/EXIT) dos sensores de entrada e saída
+        
+        Returns:
+            Dict[int, str]: Só os sensores cuja localização define um sentido
+        """
+        self._refresh()
+        return dict(self._directions)
+    
+    def area_of(self, sensor_id: int) -> Optional[str]:
+        """Área do sensor (None se não pertencer a nenhuma)"""
+        self._refresh()
+        return self._by_sensor.get(sensor_id)
+
+
+# Instância compartilhada pelo processo
+area_index = AreaIndex()
@@ -0,0 +1,157 @@
+"""
+Service de Exportação
+Exportação de leituras em streaming (CSV, NDJSON e JSON, opcionalmente gzip)
+"""
+
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import Iterable, Iterator, List, Optional, Tuple
+from flask import current_app
+from sqlalchemy import select
+from app import db
+from app.models.reading import Reading
+from app.services.archive_service import ArchiveService
+
+
+class ExportService:
+    """
+    Exportação de leituras sem materializar o período em memória
+    
+    As linhas são lidas com cursor do lado do servidor
+    (stream_results) em lotes de EXPORT_CHUNK_SIZE, apenas as colunas
+    exportadas, e cada lote é serializado e enviado antes do próximo ser
+    lido. O consumo de memória não depende do tamanho do período.
+    
+    Períodos anteriores ao horizonte do arquivo frio (ArchiveService)
+    são lidos dos arquivos diários, de forma transparente.
+    """
+    
+    FORMATS = ('json', 'ndjson', 'csv')
+    MIMETYPES = {
+        'json': 'application/json',
+        'ndjson': 'application/x-ndjson',
+        'csv': 'text/csv'
+    }
+    COLUMNS = ('sensor_id', 'activity', 'timestamp')
+    
+    @staticmethod
+    def iter_readings(start_date: datetime, end_date: Optional[datetime] = None,
+                      chunk_size: Optional[int] = None) -> Iterator[List[Tuple]]:
+        """
+        Percorre as leituras do período em lotes
+        
+        Args:
+            start_date: Início (UTC, inclusivo)
+            end_date: Fim (UTC, exclusivo; opcional)
+            chunk_size: Linhas por lote (padrão: EXPORT_CHUNK_SIZE)
+        
+        Yields:
+            List[Tuple]: Lote de (sensor_id, activity, timestamp)
+        """
+        if chunk_size is None:
+            chunk_size = current_app.config.get('EXPORT_CHUNK_SIZE', 5000)
+        
+        # Dias anteriores ao horizonte do arquivo são lidos dos arquivos diários
+        horizon = ArchiveService.horizon()
+        if horizon is not None and start_date < horizon:
+            archived_end = horizon if end_date is None else min(end_date, horizon)
+            yield from ArchiveService.iter_readings(start_date, archived_end, chunk_size)
+            
+            if end_date is not None and end_date <= horizon:
+                return
+            start_date = horizon
+        
+        stmt = select(
+            Reading.sensor_id,
+            Reading.activity,
+            Reading.timestamp
+        ).where(Reading.timestamp >= start_date)
+        
+        if end_date is not None:
+            stmt = stmt.where(Reading.timestamp < end_date)
+        
+        stmt = stmt.order_by(Reading.timestamp).execution_options(
+            stream_results=True,
+            yield_per=chunk_size
+        )
+        
+        result = db.session.execute(stmt)
+        try:
+            for partition in result.partitions():
+                yield partition
+        finally:
+            result.close()
+    
+    @staticmethod
+    def iter_csv(batches: Iterable[List[Tuple]]) -> Iterator[str]:
+        """Serializa os lotes como CSV (com cabeçalho)"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        
+        writer.writerow(ExportService.COLUMNS)
+        yield buffer.getvalue()
+        
+        for batch in batches:
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(
+                (sensor_id, activity, timestamp.isoformat())
+                for sensor_id, activity, timestamp in batch
+            )
+            yield buffer.getvalue()
+    
+    @staticmethod
+    def iter_ndjson(batches: Iterable[List[Tuple]]) -> Iterator[str]:
+        """Serializa os lotes como NDJSON (um objeto por linha)"""
+        for batch in batches:
+            yield ''.join(
+                json.dumps({
+                    'sensor_id': sensor_id,
+                    'activity': activity,
+                    'timestamp': timestamp.isoformat()
+                }) + '\n'
+                for sensor_id, activity, timestamp in batch
+            )
+    
+    @staticmethod
+    def iter_json(batches: Iterable[List[Tuple]], header: dict) -> Iterator[str]:
+        """
+        Serializa os lotes como um documento JSON
+        
+        Args:
+            batches: Lotes de leituras
+            header: Campos do documento além de 'readings'
+        """
+        yield json.dumps(header)[:-1] + (', ' if header else '') + '"readings": ['
+        
+        first = True
+        for batch in batches:
+            if not batch:
+                continue
+            chunk = ', '.join(
+                json.dumps({
+                    'sensor_id': sensor_id,
+                    'activity': activity,
+                    'timestamp': timestamp.isoformat()
+                })
+                for sensor_id, activity, timestamp in batch
+            )
+            yield chunk if first else ', ' + chunk
+            first = False
+        
+        yield ']}'
+    
+    @staticmethod
+    def gzip_stream(chunks: Iterable[str]) -> Iterator[bytes]:
+        """Comprime um stream de texto em gzip, bloco a bloco"""
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        
+        for chunk in chunks:
+            data = compressor.compress(chunk.encode('utf-8'))
+            if data:
+                yield data
+        
+        yield compressor.flush()
@@ -0,0 +1,320 @@
+"""
+Service de Ingestão
+Grava leituras recebidas via MQTT em lote (INSERT multi-linha)
+"""
+
+import logging
+import time
+from threading import Lock
+from typing import Callable, List, Optional
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models.reading import Reading
+from app.services.sensor_registry import sensor_registry
+from app.services.sensor_stats import sensor_stats
+
+
+logger = logging.getLogger(__name__)
+
+
+class IngestionService:
+    """
+    Buffer de ingestão de leituras
+    
+    As mensagens MQTT são acumuladas em memória e gravadas com um único
+    INSERT multi-linha (executemany) a cada `batch_size` mensagens ou
+    `flush_interval_ms` milissegundos, o que ocorrer primeiro. Um commit
+    por lote substitui o commit por leitura do endpoint REST.
+    
+    Se a gravação falhar (banco indisponível, deadlock), o lote volta
+    para a fila e é regravado com espera exponencial, limitada a
+    MAX_RETRY_DELAY segundos; acima de `max_pending` leituras aguardando,
+    as mais antigas são descartadas. Uma violação de integridade (ex.:
+    sensor removido ainda no cache do registro) faz o lote ser gravado
+    linha a linha, descartando apenas as linhas rejeitadas.
+    """
+    
+    MAX_RETRY_DELAY = 30.0
+    
+    # Callbacks notificados após cada gravação em lote: callback(rows)
+    _listeners: List[Callable[[List[dict]], None]] = []
+    
+    def __init__(self, batch_size: int = 500, flush_interval_ms: int = 1000,
+                 max_pending: Optional[int] = None):
+        """
+        Inicializa o buffer de ingestão
+        
+        Args:
+            batch_size: Número de mensagens que dispara um flush
+            flush_interval_ms: Tempo máximo (ms) que uma mensagem aguarda no buffer
+            max_pending: Máximo de leituras aguardando nova tentativa
+                (padrão: 20 lotes)
+        """
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.max_pending = max_pending or batch_size * 20
+        
+        self._buffer: List[dict] = []
+        self._retry_rows: List[dict] = []
+        self._failures = 0
+        self._retry_at = 0.0
+        self._lock = Lock()
+        self._last_flush = time.monotonic()
+        
+        # Estatísticas
+        self.stats = {
+            'messages_buffered': 0,
+            'readings_inserted': 0,
+            'messages_rejected': 0,
+            'flushes': 0,
+            'flush_errors': 0,
+            'readings_dropped': 0
+        }
+    
+    @classmethod
+    def register_listener(cls, callback: Callable[[List[dict]], None]) -> None:
+        """
+        Registra callback chamado após cada lote gravado
+        
+        Args:
+            callback: Função callback(rows) que recebe os valores inseridos
+        """
+        if callback not in cls._listeners:
+            cls._listeners.append(callback)
+    
+    @classmethod
+    def notify_listeners(cls, rows: List[dict]) -> None:
+        """
+        Notifica os callbacks registrados sobre novas leituras
+        
+        Erros em um callback não interrompem a ingestão.
+        
+        Args:
+            rows: Valores das leituras gravadas
+        """
+        for callback in cls._listeners:
+            try:
+                callback(rows)
+            except Exception as e:
+                logger.error(f"Erro em listener de ingestão: {e}", exc_info=True)
+    
+    def add(self, mqtt_data: dict) -> bool:
+        """
+        Adiciona uma mensagem MQTT de sensor ao buffer
+        
+        Não acessa o banco: pode ser chamado da thread de rede do MQTT.
+        
+        Args:
+            mqtt_data: Mensagem MQTT já decodificada
+        
+        Returns:
+            bool: True se o buffer atingiu batch_size e deve ser gravado
+        """
+        with self._lock:
+            self._buffer.append(mqtt_data)
+            self.stats['messages_buffered'] += 1
+            return len(self._buffer) >= self.batch_size
+    
+    def pending(self) -> int:
+        """Retorna o número de mensagens aguardando gravação"""
+        with self._lock:
+            return len(self._buffer) + len(self._retry_rows)
+    
+    def should_flush(self) -> bool:
+        """Indica se o buffer atingiu o tamanho ou o tempo limite"""
+        with self._lock:
+            if self._retry_rows:
+                return time.monotonic() >= self._retry_at
+            if not self._buffer:
+                return False
+            if len(self._buffer) >= self.batch_size:
+                return True
+            return time.monotonic() - self._last_flush >= self.flush_interval
+    
+    def flush(self) -> int:
+        """
+        Grava as mensagens pendentes no banco
+        
+        Deve ser chamado dentro de um app context. Mensagens com sensor
+        desconhecido ou payload inválido são descartadas e contabilizadas.
+        Em caso de erro na gravação o lote volta para a fila (ver
+        _requeue); erros após o commit não reenfileiram (ver _after_write).
+        
+        Returns:
+            int: Número de leituras inseridas
+        """
+        with self._lock:
+            messages = self._buffer
+            retry_rows = self._retry_rows
+            self._buffer = []
+            self._retry_rows = []
+            self._last_flush = time.monotonic()
+        
+        if not messages and not retry_rows:
+            return 0
+        
+        rows = retry_rows + self._build_rows(messages)
+        
+        try:
+            inserted = self.write_rows(rows)
+        except Exception as e:
+            db.session.rollback()
+            self.stats['flush_errors'] += 1
+            logger.error(f"Erro ao gravar lote de {len(rows)} leituras: {e}", exc_info=True)
+            self._requeue(rows)
+            return 0
+        
+        self._failures = 0
+        self.stats['flushes'] += 1
+        self.stats['readings_inserted'] += inserted
+        self.stats['messages_rejected'] += len(rows) - inserted
+        
+        return inserted
+    
+    def _requeue(self, rows: List[dict]) -> None:
+        """
+        Devolve um lote que falhou para a fila de novas tentativas
+        
+        A próxima tentativa espera flush_interval * 2^falhas (até
+        MAX_RETRY_DELAY). Acima de max_pending, as leituras mais antigas
+        são descartadas.
+        
+        Args:
+            rows: Valores das leituras não gravadas
+        """
+        self._failures += 1
+        delay = min(self.flush_interval * 2 ** self._failures, self.MAX_RETRY_DELAY)
+        
+        with self._lock:
+            rows = rows + self._retry_rows
+            dropped = len(rows) - self.max_pending
+            if dropped > 0:
+                rows = rows[dropped:]
+                self.stats['readings_dropped'] += dropped
+                logger.error(f"Fila de ingestão cheia: {dropped} leituras descartadas")
+            
+            self._retry_rows = rows
+            self._retry_at = time.monotonic() + delay
+        
+        logger.warning(f"{len(rows)} leituras aguardando nova tentativa em {delay:.1f}s")
+    
+    def _build_rows(self, messages: List[dict]) -> List[dict]:
+        """
+        Converte mensagens MQTT em valores de coluna
+        
+        Os serial numbers são resolvidos pelo registro de sensores em
+        memória, sem query por mensagem.
+        
+        Args:
+            messages: Mensagens MQTT decodificadas
+        
+        Returns:
+            List[dict]: Valores prontos para o INSERT
+        """
+        serials = {
+            msg.get('sensor', {}).get('serial_number')
+            for msg in messages
+        }
+        sensors = sensor_registry.resolve(serials)
+        
+        rows = []
+        for msg in messages:
+            serial = msg.get('sensor', {}).get('serial_number')
+            sensor = sensors.get(serial)
+            
+            if sensor is None:
+                self.stats['messages_rejected'] += 1
+                logger.warning(f"Sensor não encontrado: {serial}")
+                continue
+            
+            try:
+                rows.append(Reading.row_from_mqtt(msg, sensor.id))
+            except (KeyError, TypeError, ValueError) as e:
+                self.stats['messages_rejected'] += 1
+                logger.warning(f"Mensagem inválida do sensor {serial}: {e}")
+        
+        return rows
+    
+    @classmethod
+    def write_rows(cls, rows: List[dict]) -> int:
+        """
+        Insere leituras em lote e atualiza os contadores dos sensores
+        
+        O INSERT usa executemany, que o PyMySQL reescreve como um único
+        INSERT ... VALUES (...), (...) multi-linha. Os contadores dos
+        sensores são acumulados em sensor_stats e gravados com um UPDATE
+        por sensor a cada intervalo, não por leitura.
+        
+        Se o lote violar uma restrição (ex.: sensor removido), as linhas
+        são regravadas uma a uma e apenas as rejeitadas são descartadas.
+        
+        Args:
+            rows: Valores das leituras (ver Reading.row_from_mqtt)
+        
+        Returns:
+            int: Número de leituras inseridas
+        """
+        if not rows:
+            return 0
+        
+        try:
+            db.session.execute(Reading.__table__.insert(), rows)
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            rows = cls._write_rows_individually(rows)
+            if not rows:
+                return 0
+        
+        cls._after_write(rows)
+        
+        return len(rows)
+    
+    @classmethod
+    def _after_write(cls, rows: List[dict]) -> None:
+        """
+        Atualiza os contadores dos sensores e notifica os listeners
+        
+        As leituras já foram confirmadas: um erro aqui só é registrado,
+        sem devolver o lote para a fila (o que gravaria as linhas de novo).
+        
+        Args:
+            rows: Valores das leituras gravadas
+        """
+        try:
+            sensor_stats.record_rows(rows)
+            sensor_stats.maybe_flush()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Erro ao atualizar contadores dos sensores: {e}", exc_info=True)
+        
+        cls.notify_listeners(rows)
+    
+    @staticmethod
+    def _write_rows_individually(rows: List[dict]) -> List[dict]:
+        """
+        Grava as leituras uma a uma (savepoint por linha)
+        
+        Args:
+            rows: Valores das leituras
+        
+        Returns:
+            List[dict]: Leituras gravadas (as rejeitadas ficam de fora)
+        """
+        written = []
+        
+        for row in rows:
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(Reading.__table__.insert(), [row])
+                written.append(row)
+            except IntegrityError as e:
+                logger.warning(f"Leitura rejeitada (sensor {row.get('sensor_id')}): {e.orig}")
+        
+        db.session.commit()
+        
+        if len(written) < len(rows):
+            # Provável sensor removido ainda no cache: recarregar o registro
+            sensor_registry.invalidate()
+        
+        return written
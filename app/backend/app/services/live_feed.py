@@ -0,0 +1,210 @@
+"""
+Live Feed do Dashboard
+Publica deltas de ocupação, piscina e alertas para clientes SSE
+"""
+
+import logging
+import time
+from queue import Queue, Full
+from threading import Lock, Thread
+from typing import List, Optional
+from sqlalchemy import func
+from app import db
+from app.models.alert import Alert
+from app.models.pool_reading import PoolReading
+from app.services.occupancy_service import occupancy
+
+
+logger = logging.getLogger(__name__)
+
+
+class LiveFeed:
+    """
+    Distribuidor de eventos para o stream SSE do dashboard
+    
+    Uma única thread por processo acompanha a cauda das tabelas alerts e
+    pool_readings (id > último id visto) e os contadores de ocupação do
+    dia, e repassa as mudanças a todos os clientes conectados. O custo no
+    banco é uma rodada de queries por intervalo, independente do número de
+    telas abertas, e cobre leituras gravadas por qualquer processo (worker
+    de ingestão, API REST). A thread só roda enquanto houver assinantes.
+    
+    Eventos publicados:
+        occupancy: {'date', 'entries', 'exits', 'current', 'areas', 'last_reading'}
+            (totais do dia do OccupancyTracker; last_reading em UTC)
+        pool: {'sensor_type', 'temperature', 'water_quality', 'reading_date', 'reading_time'}
+        alert: {'id', 'type', 'severity', 'message', 'timestamp', 'sensor_id', 'area'}
+    """
+    
+    def __init__(self, poll_interval: float = 1.0, queue_size: int = 100):
+        """
+        Inicializa o distribuidor
+        
+        Args:
+            poll_interval: Intervalo entre consultas (segundos)
+            queue_size: Eventos pendentes por cliente antes de descartar
+        """
+        self.poll_interval = poll_interval
+        self.queue_size = queue_size
+        
+        self._subscribers: List[Queue] = []
+        self._lock = Lock()
+        self._thread: Optional[Thread] = None
+        
+        self._last_occupancy = None
+        self._last_alert_id = 0
+        self._last_pool_id = 0
+    
+    def subscribe(self, app) -> Queue:
+        """
+        Registra um cliente e inicia a thread de consulta se necessário
+        
+        Args:
+            app: Aplicação Flask (app context da thread)
+        
+        Returns:
+            Queue: Fila de eventos (evento, dados) do cliente
+        """
+        queue = Queue(maxsize=self.queue_size)
+        
+        with self._lock:
+            self._subscribers.append(queue)
+            
+            if self._thread is None:
+                self.poll_interval = app.config.get('DASHBOARD_STREAM_POLL_MS', 1000) / 1000.0
+                self._thread = Thread(target=self._run, args=(app,), daemon=True)
+                self._thread.start()
+        
+        return queue
+    
+    def unsubscribe(self, queue: Queue) -> None:
+        """Remove um cliente (a thread para quando não restar nenhum)"""
+        with self._lock:
+            if queue in self._subscribers:
+                self._subscribers.remove(queue)
+    
+    def subscriber_count(self) -> int:
+        """Retorna o número de clientes conectados"""
+        with self._lock:
+            return len(self._subscribers)
+    
+    def publish(self, event: str, data: dict) -> None:
+        """
+        Envia um evento a todos os clientes
+        
+        Clientes lentos com a fila cheia perdem o evento e se
+        ressincronizam no próximo snapshot.
+        
+        Args:
+            event: Nome do evento SSE
+            data: Dados (serializáveis em JSON)
+        """
+        with self._lock:
+            subscribers = list(self._subscribers)
+        
+        for queue in subscribers:
+            try:
+                queue.put_nowait((event, data))
+            except Full:
+                pass
+    
+    def _run(self, app) -> None:
+        """Loop de consulta (thread própria, dentro do app context)"""
+        with app.app_context():
+            try:
+                self._init_watermarks()
+            except Exception as e:
+                logger.error(f"Erro ao iniciar live feed: {e}", exc_info=True)
+            finally:
+                db.session.remove()
+            
+            while True:
+                time.sleep(self.poll_interval)
+                
+                with self._lock:
+                    if not self._subscribers:
+                        self._thread = None
+                        return
+                
+                try:
+                    self._poll()
+                except Exception as e:
+                    logger.error(f"Erro no live feed: {e}", exc_info=True)
+                finally:
+                    # Encerrar a transação: no REPEATABLE READ do InnoDB uma
+                    # transação longa não enxergaria as novas linhas
+                    db.session.remove()
+    
+    def _init_watermarks(self) -> None:
+        """Começa a partir das linhas mais recentes (o snapshot cobre o passado)"""
+        self._last_occupancy = None
+        self._last_alert_id = db.session.query(func.max(Alert.id)).scalar() or 0
+        self._last_pool_id = db.session.query(func.max(PoolReading.id)).scalar() or 0
+    
+    def _poll(self) -> None:
+        """Uma rodada de consultas: leituras, alertas e piscina"""
+        self._poll_occupancy()
+        self._poll_alerts()
+        self._poll_pool()
+    
+    def _poll_occupancy(self) -> None:
+        """
+        Publica a ocupação do dia quando os contadores mudam
+        
+        Os valores vêm do OccupancyTracker (mesma regra de entrada/saída e
+        mesma janela de espera do servidor), e não de uma nova contagem
+        das leituras: o cliente substitui os totais em vez de somar deltas.
+        """
+        state = occupancy.snapshot()
+        key = (state['date'], state['entries'], state['exits'], state['last_reading'])
+        
+        if key == self._last_occupancy:
+            return
+        
+        self._last_occupancy = key
+        last_reading = state['last_reading']
+        
+        self.publish('occupancy', {
+            'date': state['date'],
+            'entries': state['entries'],
+            'exits': state['exits'],
+            'current': state['current'],
+            'areas': state['areas'],
+            'last_reading': last_reading.isoformat() if last_reading else None
+        })
+    
+    def _poll_alerts(self) -> None:
+        alerts = Alert.query.filter(
+            Alert.id > self._last_alert_id
+        ).order_by(Alert.id).limit(100).all()
+        
+        for alert in alerts:
+            self._last_alert_id = alert.id
+            self.publish('alert', {
+                'id': alert.id,
+                'type': alert.alert_type,
+                'severity': alert.severity,
+                'message': alert.message,
+                'timestamp': alert.timestamp.isoformat(),
+                'sensor_id': alert.sensor_id,
+                'area': 'Sistema'
+            })
+    
+    def _poll_pool(self) -> None:
+        readings = PoolReading.query.filter(
+            PoolReading.id > self._last_pool_id
+        ).order_by(PoolReading.id).limit(100).all()
+        
+        for reading in readings:
+            self._last_pool_id = reading.id
+            self.publish('pool', {
+                'sensor_type': reading.sensor_type,
+                'temperature': float(reading.temperature) if reading.temperature is not None else None,
+                'water_quality': reading.water_quality,
+                'reading_date': reading.reading_date.isoformat(),
+                'reading_time': reading.reading_time.strftime('%H:%M:%S')
+            })
+
+
+# Instância compartilhada pelo processo
+live_feed = LiveFeed()
@@ -0,0 +1,233 @@
+"""
+Service de Ocupação
+Contadores de entradas/saídas do dia mantidos em memória a partir da tabela readings
+"""
+
+import logging
+import time
+from datetime import datetime
+from threading import Lock
+from typing import Any, Dict, Optional
+from flask import current_app
+from sqlalchemy import func, case
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from app import db
+from app.models.reading import Reading
+from app.models.occupancy_checkpoint import OccupancyCheckpoint
+from app.services.areas import area_index
+from occupancy_counter import OccupancyCounter, ENTRY
+
+
+logger = logging.getLogger(__name__)
+
+
+class OccupancyTracker:
+    """
+    Ocupação do dia (total e por área) em O(1)
+    
+    Consome a cauda da tabela readings (id > último id processado) com
+    uma query agregada por sensor, no máximo uma vez a cada
+    OCCUPANCY_SYNC_INTERVAL_MS, e soma os deltas em um OccupancyCounter,
+    que zera à meia-noite de Brasília. Funciona em qualquer processo
+    (API, worker de ingestão), independente de quem gravou as leituras.
+    
+    Só detecções (activity 1) dos sensores de entrada e de saída contam
+    (sentido pela localização, ver occupancy_counter.direction);
+    activity 0 significa "nada detectado". A cauda para antes das
+    leituras criadas há menos de OCCUPANCY_GRACE_SECONDS, para não pular
+    ids menores confirmados depois de ids maiores (ver
+    Reading.settled_max_id).
+    
+    Os contadores são salvos em occupancy_checkpoints a cada
+    OCCUPANCY_CHECKPOINT_SECONDS. Na primeira consulta do processo, o
+    estado parte do checkpoint do dia (somando só as leituras
+    posteriores) ou, sem checkpoint, é recontado a partir das leituras
+    do dia.
+    """
+    
+    GLOBAL_SCOPE = 'Total'
+    
+    def __init__(self):
+        self.counter = OccupancyCounter()
+        self._last_reading_id: Optional[int] = None
+        self._last_sync = 0.0
+        self._last_checkpoint = 0.0
+        self._lock = Lock()
+    
+    def _load(self) -> None:
+        """Inicializa a partir do checkpoint do dia ou recontando as leituras"""
+        today = self.counter.local_date()
+        checkpoints = OccupancyCheckpoint.query.filter_by(day=today).all()
+        total = next((c for c in checkpoints if c.scope == self.GLOBAL_SCOPE), None)
+        
+        if total is None:
+            self.rebuild()
+            return
+        
+        self.counter.restore(
+            today,
+            total.entries,
+            total.exits,
+            areas={
+                checkpoint.scope: {'entries': checkpoint.entries, 'exits': checkpoint.exits}
+                for checkpoint in checkpoints
+                if checkpoint.scope != self.GLOBAL_SCOPE
+            },
+            last_reading=total.last_reading_at
+        )
+        
+        self._last_reading_id = total.last_reading_id
+        self._last_checkpoint = time.monotonic()
+    
+    @staticmethod
+    def _settled_max_id(lower: int) -> int:
+        """Maior id já assentado (ver Reading.settled_max_id)"""
+        return Reading.settled_max_id(lower, current_app.config.get('OCCUPANCY_GRACE_SECONDS', 5))
+    
+    @staticmethod
+    def _count(counter: OccupancyCounter, lower: int, upper: int) -> None:
+        """
+        Soma ao contador as leituras de hoje com id em (lower, upper]
+        
+        Uma linha por sensor: detecções e timestamp mais recente. O filtro
+        em timestamp também limita a busca à partição do mês atual.
+        """
+        results = db.session.query(
+            Reading.sensor_id,
+            func.sum(case((Reading.activity == 1, 1), else_=0)),
+            func.max(Reading.timestamp)
+        ).filter(
+            Reading.id > lower,
+            Reading.id <= upper,
+            Reading.timestamp >= counter.local_midnight_utc(counter.day)
+        ).group_by(Reading.sensor_id).all()
+        
+        sensor_areas = area_index.sensor_areas()
+        directions = area_index.sensor_directions()
+        
+        for sensor_id, detections, last_reading in results:
+            detections = int(detections or 0)
+            sense = directions.get(sensor_id)
+            
+            if sense is None or not detections:
+                counter.add(last_reading=last_reading)
+            elif sense == ENTRY:
+                counter.add(entries=detections, area=sensor_areas.get(sensor_id), last_reading=last_reading)
+            else:
+                counter.add(exits=detections, area=sensor_areas.get(sensor_id), last_reading=last_reading)
+    
+    def rebuild(self) -> None:
+        """Reconta as entradas/saídas do dia a partir da tabela readings"""
+        counter = OccupancyCounter()
+        counter.roll(counter.local_date())
+        
+        # Janela de espera só sobre as leituras de hoje (índice em timestamp)
+        first_today = db.session.query(func.min(Reading.id)).filter(
+            Reading.timestamp >= counter.local_midnight_utc(counter.day)
+        ).scalar()
+        if first_today:
+            lower = first_today - 1
+        else:
+            lower = db.session.query(func.max(Reading.id)).scalar() or 0
+        
+        max_id = self._settled_max_id(lower)
+        self._count(counter, lower, max_id)
+        
+        self.counter = counter
+        self._last_reading_id = max_id
+        logger.info(f"Ocupação recontada: {counter.entries} entradas, {counter.exits} saídas")
+    
+    def _tail(self) -> None:
+        """Soma as leituras gravadas (e assentadas) desde a última sincronização"""
+        max_id = self._settled_max_id(self._last_reading_id)
+        if max_id <= self._last_reading_id:
+            return
+        
+        self._count(self.counter, self._last_reading_id, max_id)
+        self._last_reading_id = max_id
+    
+    def checkpoint(self) -> None:
+        """Grava os contadores atuais em occupancy_checkpoints"""
+        state = self.counter.snapshot()
+        if state['date'] is None or self._last_reading_id is None:
+            return
+        
+        now = datetime.utcnow()
+        day = self.counter.day
+        rows = [{
+            'scope': self.GLOBAL_SCOPE,
+            'day': day,
+            'entries': state['entries'],
+            'exits': state['exits'],
+            'last_reading_id': self._last_reading_id,
+            'last_reading_at': state['last_reading'],
+            'updated_at': now
+        }]
+        rows.extend({
+            'scope': area,
+            'day': day,
+            'entries': counters['entries'],
+            'exits': counters['exits'],
+            'last_reading_id': self._last_reading_id,
+            'last_reading_at': None,
+            'updated_at': now
+        } for area, counters in state['areas'].items())
+        
+        stmt = mysql_insert(OccupancyCheckpoint.__table__)
+        stmt = stmt.on_duplicate_key_update([
+            (column, stmt.inserted[column])
+            for column in ('day', 'entries', 'exits', 'last_reading_id', 'last_reading_at', 'updated_at')
+        ])
+        
+        try:
+            db.session.execute(stmt, rows)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.warning(f"Erro ao gravar checkpoint de ocupação: {e}")
+        
+        self._last_checkpoint = time.monotonic()
+    
+    def sync(self, force: bool = False) -> None:
+        """
+        Atualiza os contadores com as leituras novas
+        
+        Args:
+            force: Ignorar o intervalo mínimo entre sincronizações
+        """
+        interval = current_app.config.get('OCCUPANCY_SYNC_INTERVAL_MS', 1000) / 1000.0
+        checkpoint_interval = current_app.config.get('OCCUPANCY_CHECKPOINT_SECONDS', 60)
+        
+        with self._lock:
+            if self._last_reading_id is None:
+                self._load()
+            elif not force and time.monotonic() - self._last_sync < interval:
+                return
+            
+            if self.counter.roll():
+                logger.info(f"Ocupação zerada para o dia {self.counter.day}")
+            
+            self._tail()
+            self._last_sync = time.monotonic()
+            
+            if checkpoint_interval and time.monotonic() - self._last_checkpoint >= checkpoint_interval:
+                self.checkpoint()
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Retorna a ocupação atual do dia
+        
+        Returns:
+            Dict: date, entries, exits, current, areas e last_reading (UTC)
+        """
+        self.sync()
+        return self.counter.snapshot()
+    
+    def invalidate(self) -> None:
+        """Descarta o estado; a próxima consulta recarrega do banco"""
+        with self._lock:
+            self._last_reading_id = None
+
+
+# Instância compartilhada pelo processo
+occupancy = OccupancyTracker()
@@ -0,0 +1,347 @@
+"""
+Service de Partições
+Particionamento mensal da tabela readings (RANGE COLUMNS em timestamp)
+"""
+
+import logging
+import re
+from datetime import date, datetime, time
+from typing import Any, Dict, List, Optional
+from flask import current_app
+from app import db
+from app.models.rollup_watermark import RollupWatermark
+
+
+logger = logging.getLogger(__name__)
+
+
+class PartitionService:
+    """
+    Ciclo de vida das partições mensais de readings
+    
+    A tabela é particionada por RANGE COLUMNS(timestamp), uma partição
+    por mês (pYYYYMM, leituras com timestamp < primeiro dia do mês
+    seguinte) mais a partição pmax (MAXVALUE). `maintain()` cria as
+    partições dos próximos READINGS_PARTITIONS_AHEAD meses dividindo a
+    pmax (vazia, portanto instantâneo) e remove as partições além de
+    READINGS_RETENTION_MONTHS com DROP PARTITION, sem DELETE em massa.
+    Com READINGS_ARCHIVE_EXPIRED, os dias da partição são antes gravados
+    no arquivo CSV diário do ArchiveService (o mesmo lido pela exportação
+    e pelas estatísticas), e a partição só é removida depois que o
+    horizonte do arquivo passa do fim do mês.
+    
+    Uma partição só expira se todas as suas leituras já foram agregadas
+    pelo rollup (id <= marca d'água de statistics).
+    
+    Feito para rodar diariamente via cron (flask readings-partitions).
+    """
+    
+    TABLE = 'readings'
+    MAXVALUE_PARTITION = 'pmax'
+    NAME_PATTERN = re.compile(r'^p(\d{4})(\d{2})$')
+    
+    @staticmethod
+    def month_start(day: date) -> date:
+        """Primeiro dia do mês de `day`"""
+        return date(day.year, day.month, 1)
+    
+    @staticmethod
+    def add_months(month: date, months: int) -> date:
+        """Primeiro dia do mês `months` meses após `month`"""
+        index = month.year * 12 + month.month - 1 + months
+        return date(index // 12, index % 12 + 1, 1)
+    
+    @staticmethod
+    def partition_name(month: date) -> str:
+        """Nome da partição de um mês (pYYYYMM)"""
+        return f'p{month.year:04d}{month.month:02d}'
+    
+    @staticmethod
+    def partition_month(name: str) -> Optional[date]:
+        """Mês de uma partição pYYYYMM (None para pmax e outras)"""
+        match = PartitionService.NAME_PATTERN.match(name or '')
+        if not match:
+            return None
+        return date(int(match.group(1)), int(match.group(2)), 1)
+    
+    @staticmethod
+    def _definition(month: date) -> str:
+        upper = PartitionService.add_months(month, 1)
+        return (
+            f"PARTITION {PartitionService.partition_name(month)} "
+            f"VALUES LESS THAN ('{upper.isoformat()}')"
+        )
+    
+    @staticmethod
+    def partitions() -> List[Dict[str, Any]]:
+        """
+        Lista as partições de readings
+        
+        Returns:
+            List[Dict]: name, month (None para pmax) e rows (estimativa), em ordem
+        """
+        results = db.session.execute(db.text(
+            "SELECT partition_name, table_rows FROM information_schema.partitions "
+            "WHERE table_schema = DATABASE() AND table_name = :table "
+            "AND partition_name IS NOT NULL ORDER BY partition_ordinal_position"
+        ), {'table': PartitionService.TABLE}).all()
+        
+        return [
+            {
+                'name': name,
+                'month': PartitionService.partition_month(name),
+                'rows': int(rows or 0)
+            }
+            for name, rows in results
+        ]
+    
+    @staticmethod
+    def initialize(ahead: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Converte readings em tabela particionada (uma única vez)
+        
+        O MySQL exige que toda chave única contenha a coluna de
+        particionamento e não aceita chaves estrangeiras em tabelas
+        particionadas: a chave primária passa a ser (id, timestamp) e a
+        FK para sensors é removida (a exclusão em cascata continua no
+        ORM, ver Sensor.readings). Reescreve a tabela inteira; rodar em
+        janela de manutenção, com a ingestão parada.
+        
+        Args:
+            ahead: Meses futuros a pré-criar (padrão: READINGS_PARTITIONS_AHEAD)
+        
+        Returns:
+            Dict: Partições criadas
+        """
+        if PartitionService.partitions():
+            raise ValueError('A tabela readings já está particionada')
+        
+        if ahead is None:
+            ahead = current_app.config.get('READINGS_PARTITIONS_AHEAD', 3)
+        
+        oldest = db.session.execute(db.text(
+            f"SELECT MIN(timestamp) FROM {PartitionService.TABLE}"
+        )).scalar()
+        
+        current = PartitionService.month_start(datetime.utcnow().date())
+        month = PartitionService.month_start(oldest.date()) if oldest else current
+        last = PartitionService.add_months(current, ahead)
+        
+        definitions = []
+        while month <= last:
+            definitions.append(PartitionService._definition(month))
+            month = PartitionService.add_months(month, 1)
+        definitions.append(
+            f"PARTITION {PartitionService.MAXVALUE_PARTITION} VALUES LESS THAN (MAXVALUE)"
+        )
+        
+        foreign_keys = db.session.execute(db.text(
+            "SELECT constraint_name FROM information_schema.referential_constraints "
+            "WHERE constraint_schema = DATABASE() AND table_name = :table"
+        ), {'table': PartitionService.TABLE}).scalars().all()
+        
+        for name in foreign_keys:
+            db.session.execute(db.text(
+                f"ALTER TABLE {PartitionService.TABLE} DROP FOREIGN KEY {name}"
+            ))
+        
+        db.session.execute(db.text(
+            f"ALTER TABLE {PartitionService.TABLE} "
+            f"DROP PRIMARY KEY, ADD PRIMARY KEY (id, timestamp)"
+        ))
+        db.session.execute(db.text(
+            f"ALTER TABLE {PartitionService.TABLE} PARTITION BY RANGE COLUMNS(timestamp) "
+            f"({', '.join(definitions)})"
+        ))
+        
+        logger.info(f"Tabela readings particionada em {len(definitions)} partições")
+        
+        return {'created': len(definitions), 'foreign_keys_dropped': list(foreign_keys)}
+    
+    @staticmethod
+    def ensure_future(ahead: int, dry_run: bool = False) -> List[str]:
+        """
+        Cria as partições mensais até `ahead` meses à frente
+        
+        Divide a pmax, que normalmente está vazia (REORGANIZE sem cópia
+        de linhas).
+        
+        Args:
+            ahead: Meses futuros a manter criados
+            dry_run: Apenas listar o que seria criado
+        
+        Returns:
+            List[str]: Partições criadas
+        """
+        months = [p['month'] for p in PartitionService.partitions() if p['month']]
+        if not months:
+            raise ValueError('A tabela readings não está particionada (use --init)')
+        
+        current = PartitionService.month_start(datetime.utcnow().date())
+        last = PartitionService.add_months(current, ahead)
+        month = PartitionService.add_months(max(months), 1)
+        
+        missing = []
+        while month <= last:
+            missing.append(month)
+            month = PartitionService.add_months(month, 1)
+        
+        if missing and not dry_run:
+            definitions = [PartitionService._definition(m) for m in missing]
+            definitions.append(
+                f"PARTITION {PartitionService.MAXVALUE_PARTITION} VALUES LESS THAN (MAXVALUE)"
+            )
+            db.session.execute(db.text(
+                f"ALTER TABLE {PartitionService.TABLE} REORGANIZE PARTITION "
+                f"{PartitionService.MAXVALUE_PARTITION} INTO ({', '.join(definitions)})"
+            ))
+            logger.info(f"Partições criadas: {len(missing)} meses até {last:%Y-%m}")
+        
+        return [PartitionService.partition_name(m) for m in missing]
+    
+    @staticmethod
+    def expire(retention_months: int, archive: bool = True,
+               dry_run: bool = False) -> Dict[str, List[str]]:
+        """
+        Remove as partições mais antigas que a retenção
+        
+        Args:
+            retention_months: Meses completos mantidos além do mês atual
+            archive: Gravar os dias da partição no arquivo CSV antes do DROP
+            dry_run: Apenas listar o que seria removido
+        
+        Returns:
+            Dict: dropped, archived e skipped (leituras ainda não agregadas
+            ou não arquivadas)
+        """
+        from app.services.archive_service import ArchiveService
+        
+        current = PartitionService.month_start(datetime.utcnow().date())
+        cutoff = PartitionService.add_months(current, -retention_months)
+        
+        expired = [
+            p for p in PartitionService.partitions()
+            if p['month'] is not None and p['month'] < cutoff
+        ]
+        
+        horizon = None
+        if archive and expired and not dry_run:
+            # Arquivo até o fim do mês mais recente a expirar; as linhas
+            # ficam no banco e saem com o DROP PARTITION abaixo
+            last = PartitionService.add_months(expired[-1]['month'], 1)
+            ArchiveService.archive_until(last, delete=False)
+            horizon = ArchiveService.horizon()
+        
+        return PartitionService._drop(expired, archive, horizon, dry_run)
+    
+    @staticmethod
+    def drop_archived() -> List[str]:
+        """
+        Remove as partições cujo mês inteiro já está no arquivo CSV
+        
+        Chamado pelo ArchiveService depois de arquivar os dias: as linhas
+        arquivadas saem com DROP PARTITION, em vez de DELETE em lotes.
+        
+        Returns:
+            List[str]: Partições removidas
+        """
+        from app.services.archive_service import ArchiveService
+        
+        horizon = ArchiveService.horizon()
+        if horizon is None:
+            return []
+        
+        archived = [
+            p for p in PartitionService.partitions()
+            if p['month'] is not None
+            and PartitionService.add_months(p['month'], 1) <= horizon.date()
+        ]
+        
+        return PartitionService._drop(archived, True, horizon)['dropped']
+    
+    @staticmethod
+    def _drop(partitions: List[Dict[str, Any]], archive: bool,
+              horizon: Optional[datetime], dry_run: bool = False) -> Dict[str, List[str]]:
+        """
+        Remove partições cujas leituras já foram agregadas (e arquivadas)
+        
+        Args:
+            partitions: Partições candidatas (ver partitions())
+            archive: Exigir que o mês esteja antes do horizonte do arquivo
+            horizon: Horizonte do ArchiveService
+            dry_run: Apenas listar o que seria removido
+        
+        Returns:
+            Dict: dropped, archived e skipped
+        """
+        from app.services.rollup_service import RollupService
+        
+        watermark = db.session.query(RollupWatermark.last_reading_id)\
+            .filter_by(name=RollupService.WATERMARK).scalar() or 0
+        db.session.rollback()
+        
+        result = {'dropped': [], 'archived': [], 'skipped': []}
+        
+        for partition in partitions:
+            month = partition['month']
+            name = partition['name']
+            max_id = db.session.execute(db.text(
+                f"SELECT MAX(id) FROM {PartitionService.TABLE} PARTITION ({name})"
+            )).scalar()
+            
+            if max_id is not None and max_id > watermark:
+                logger.warning(f"Partição {name} tem leituras não agregadas; mantida")
+                result['skipped'].append(name)
+                continue
+            
+            if dry_run:
+                result['dropped'].append(name)
+                continue
+            
+            if archive and max_id is not None:
+                end = datetime.combine(PartitionService.add_months(month, 1), time())
+                if horizon is None or horizon < end:
+                    logger.warning(f"Partição {name} ainda não arquivada; mantida")
+                    result['skipped'].append(name)
+                    continue
+                result['archived'].append(name)
+            
+            db.session.execute(db.text(
+                f"ALTER TABLE {PartitionService.TABLE} DROP PARTITION {name}"
+            ))
+            result['dropped'].append(name)
+            logger.info(f"Partição {name} removida")
+        
+        return result
+    
+    @staticmethod
+    def maintain(ahead: Optional[int] = None, retention_months: Optional[int] = None,
+                 archive: Optional[bool] = None, dry_run: bool = False) -> Dict[str, Any]:
+        """
+        Executa a manutenção das partições (criação e expiração)
+        
+        Args:
+            ahead: Meses futuros (padrão: READINGS_PARTITIONS_AHEAD)
+            retention_months: Retenção (padrão: READINGS_RETENTION_MONTHS; 0 = manter tudo)
+            archive: Arquivar antes de remover (padrão: READINGS_ARCHIVE_EXPIRED)
+            dry_run: Apenas listar as alterações
+        
+        Returns:
+            Dict: created, dropped, archived e skipped
+        """
+        config = current_app.config
+        if ahead is None:
+            ahead = config.get('READINGS_PARTITIONS_AHEAD', 3)
+        if retention_months is None:
+            retention_months = config.get('READINGS_RETENTION_MONTHS', 0)
+        if archive is None:
+            archive = config.get('READINGS_ARCHIVE_EXPIRED', True)
+        
+        result = {'created': PartitionService.ensure_future(ahead, dry_run)}
+        
+        if retention_months > 0:
+            result.update(PartitionService.expire(retention_months, archive, dry_run))
+        else:
+            result.update({'dropped': [], 'archived': [], 'skipped': []})
+        
+        return result
@@ -0,0 +1,314 @@
+"""
+Service de Previsão de Pico
+Histograma hora-da-semana por área, mantido incrementalmente pelo rollup
+"""
+
+import logging
+import math
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+import pytz
+from flask import current_app
+from app import db
+from app.models.statistics import Statistics
+from app.models.hour_of_week_stat import HourOfWeekStat
+from app.services.areas import MAX_CAPACITY, area_index
+
+
+logger = logging.getLogger(__name__)
+
+# Timezone de Brasília
+BRASILIA_TZ = pytz.timezone('America/Sao_Paulo')
+
+
+class PeakPredictionService:
+    """
+    Previsão de pico a partir de um histograma hora-da-semana
+    
+    Cada área (e o total do CEU, GLOBAL_AREA) tem 7×24 contadores de
+    entradas no horário de Brasília. `apply()` recebe os deltas por
+    sensor/hora do RollupService.catch_up, na mesma transação da marca
+    d'água, então cada leitura entra uma única vez. Quando uma nova
+    ocorrência do horário começa (ex.: a segunda-feira seguinte), a
+    anterior é incorporada à média e à variância móveis exponenciais
+    (PEAK_EWMA_ALPHA); semanas sem leituras contam como zero.
+    
+    `predict()` lê no máximo 168 linhas, independente do período de
+    histórico, e devolve o valor esperado com intervalo de confiança
+    (média ± PEAK_CONFIDENCE_Z desvios) para cada hora do dia.
+    """
+    
+    GLOBAL_AREA = 'Total'
+    MIN_SAMPLES = 4  # Semanas para confiança plena
+    MAX_GAP_WEEKS = 104  # Depois disso o peso das semanas anteriores é desprezível
+    
+    @staticmethod
+    def _state(slot: HourOfWeekStat) -> Dict[str, Any]:
+        return {
+            'mean': slot.mean or 0.0,
+            'variance': slot.variance or 0.0,
+            'samples': slot.samples or 0,
+            'open_date': slot.open_date,
+            'open_count': slot.open_count or 0
+        }
+    
+    @staticmethod
+    def _observe(state: Dict[str, Any], value: float, alpha: float) -> None:
+        """Incorpora uma ocorrência encerrada à média/variância exponenciais"""
+        if state['samples'] == 0:
+            state['mean'] = float(value)
+            state['variance'] = 0.0
+        else:
+            diff = value - state['mean']
+            increment = alpha * diff
+            state['mean'] += increment
+            state['variance'] = (1 - alpha) * (state['variance'] + diff * increment)
+        state['samples'] += 1
+    
+    @staticmethod
+    def _advance(state: Dict[str, Any], occurrence: date, alpha: float) -> None:
+        """
+        Abre a ocorrência `occurrence`, encerrando a anterior
+        
+        A ocorrência aberta entra na média com sua contagem e as
+        ocorrências intermediárias (semanas sem leituras) entram com zero.
+        """
+        open_date = state['open_date']
+        
+        if open_date is not None and open_date < occurrence:
+            PeakPredictionService._observe(state, state['open_count'], alpha)
+            
+            empty_weeks = (occurrence - open_date).days // 7 - 1
+            for _ in range(min(empty_weeks, PeakPredictionService.MAX_GAP_WEEKS)):
+                PeakPredictionService._observe(state, 0, alpha)
+        
+        if open_date is None or open_date < occurrence:
+            state['open_date'] = occurrence
+            state['open_count'] = 0
+    
+    @staticmethod
+    def _to_local(day: date, hour: int) -> datetime:
+        """Converte data/hora UTC (linhas de statistics) para Brasília"""
+        return pytz.UTC.localize(datetime.combine(day, time(hour))).astimezone(BRASILIA_TZ)
+    
+    @staticmethod
+    def _last_closed(weekday: int, hour: int, now_local: datetime) -> date:
+        """Data da última ocorrência encerrada do horário (weekday, hour)"""
+        today = now_local.date()
+        day = today - timedelta(days=(today.weekday() - weekday) % 7)
+        
+        if day == today and hour >= now_local.hour:
+            day -= timedelta(weeks=1)
+        
+        return day
+    
+    @staticmethod
+    def apply(rows: List[dict]) -> int:
+        """
+        Soma deltas de entradas por sensor/hora ao histograma
+        
+        Não faz commit: é chamado dentro da transação do rollup.
+        
+        Args:
+            rows: Linhas do rollup ('date' e 'hour' em UTC, 'sensor_id', 'entries')
+        
+        Returns:
+            int: Número de (área, data, hora) atualizados
+        """
+        areas = area_index.sensor_areas()
+        deltas: Dict[Tuple[str, date, int], int] = {}
+        
+        for row in rows:
+            if not row['entries']:
+                continue
+            
+            local = PeakPredictionService._to_local(row['date'], row['hour'])
+            
+            for area in (PeakPredictionService.GLOBAL_AREA, areas.get(row['sensor_id'])):
+                if area:
+                    key = (area, local.date(), local.hour)
+                    deltas[key] = deltas.get(key, 0) + row['entries']
+        
+        if not deltas:
+            return 0
+        
+        touched = {area for area, _, _ in deltas}
+        slots = {
+            (slot.area, slot.weekday, slot.hour): slot
+            for slot in HourOfWeekStat.query.filter(HourOfWeekStat.area.in_(touched)).all()
+        }
+        
+        alpha = current_app.config.get('PEAK_EWMA_ALPHA', 0.3)
+        late = 0
+        
+        # Em ordem cronológica: uma ocorrência só é encerrada pela seguinte
+        for (area, day, hour), count in sorted(deltas.items(), key=lambda item: item[0][1]):
+            key = (area, day.weekday(), hour)
+            slot = slots.get(key)
+            
+            if slot is None:
+                slot = HourOfWeekStat(
+                    area=area,
+                    weekday=day.weekday(),
+                    hour=hour,
+                    mean=0.0,
+                    variance=0.0,
+                    samples=0,
+                    open_count=0,
+                    total_entries=0
+                )
+                db.session.add(slot)
+                slots[key] = slot
+            
+            slot.total_entries += count
+            
+            if slot.open_date is not None and day < slot.open_date:
+                # Ocorrência já encerrada: só entra na média via rebuild()
+                late += count
+                continue
+            
+            state = PeakPredictionService._state(slot)
+            PeakPredictionService._advance(state, day, alpha)
+            state['open_count'] += count
+            
+            slot.mean = state['mean']
+            slot.variance = state['variance']
+            slot.samples = state['samples']
+            slot.open_date = state['open_date']
+            slot.open_count = state['open_count']
+        
+        if late:
+            logger.debug(f"Histograma de pico: {late} entradas atrasadas fora da média")
+        
+        return len(deltas)
+    
+    @staticmethod
+    def rebuild(weeks: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Recria o histograma a partir da tabela statistics
+        
+        Args:
+            weeks: Semanas de histórico (padrão: PEAK_HISTORY_WEEKS)
+        
+        Returns:
+            Dict: Linhas de statistics lidas e contadores atualizados
+        """
+        from app.services.rollup_service import RollupService
+        from app.models.rollup_watermark import RollupWatermark
+        
+        if weeks is None:
+            weeks = current_app.config.get('PEAK_HISTORY_WEEKS', 12)
+        
+        start_date = (datetime.utcnow() - timedelta(weeks=weeks)).date()
+        
+        try:
+            # Trava a marca d'água: nenhum catch_up soma deltas durante a recarga
+            RollupWatermark.acquire(RollupService.WATERMARK)
+            
+            HourOfWeekStat.query.delete(synchronize_session=False)
+            
+            results = db.session.query(
+                Statistics.date,
+                Statistics.hour,
+                Statistics.sensor_id,
+                Statistics.entries
+            ).filter(
+                Statistics.date >= start_date,
+                Statistics.sensor_id.isnot(None)
+            ).all()
+            
+            rows = [
+                {'date': day, 'hour': hour, 'sensor_id': sensor_id, 'entries': entries or 0}
+                for day, hour, sensor_id, entries in results
+            ]
+            updated = PeakPredictionService.apply(rows)
+            
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        
+        logger.info(f"Histograma de pico recriado desde {start_date}: {len(rows)} linhas")
+        
+        return {
+            'start_date': start_date.isoformat(),
+            'rows_read': len(rows),
+            'slots_updated': updated
+        }
+    
+    @staticmethod
+    def predict(area: Optional[str] = None, weekday: Optional[int] = None,
+                now: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Prevê o pico de entradas de um dia da semana
+        
+        Args:
+            area: Nome da área (padrão: total do CEU)
+            weekday: Dia da semana, 0 = segunda (padrão: hoje)
+            now: Momento de referência (padrão: agora)
+        
+        Returns:
+            Dict: Pico previsto, intervalo de confiança e previsão por hora
+        """
+        area = area or PeakPredictionService.GLOBAL_AREA
+        now_local = datetime.now(BRASILIA_TZ) if now is None else now.astimezone(BRASILIA_TZ)
+        if weekday is None:
+            weekday = now_local.weekday()
+        
+        alpha = current_app.config.get('PEAK_EWMA_ALPHA', 0.3)
+        z = current_app.config.get('PEAK_CONFIDENCE_Z', 1.96)
+        
+        grid: Dict[Tuple[int, int], Dict[str, Any]] = {}
+        total_entries = 0
+        
+        # No máximo 7×24 linhas por área
+        for slot in HourOfWeekStat.query.filter_by(area=area).all():
+            state = PeakPredictionService._state(slot)
+            last_closed = PeakPredictionService._last_closed(slot.weekday, slot.hour, now_local)
+            
+            # Encerrar (sem gravar) ocorrências que já terminaram
+            if state['open_date'] is not None and state['open_date'] <= last_closed:
+                PeakPredictionService._advance(state, last_closed + timedelta(weeks=1), alpha)
+            
+            grid[(slot.weekday, slot.hour)] = state
+            total_entries += slot.total_entries or 0
+        
+        hours = []
+        for hour in range(24):
+            state = grid.get((weekday, hour))
+            samples = state['samples'] if state else 0
+            mean = state['mean'] if samples else 0.0
+            margin = z * math.sqrt(max(state['variance'], 0.0)) if samples else 0.0
+            
+            hours.append({
+                'hour': f'{hour:02d}:00',
+                'expected': round(mean, 1),
+                'lower': round(max(0.0, mean - margin), 1),
+                'upper': round(mean + margin, 1),
+                'samples': samples
+            })
+        
+        peak = max(hours, key=lambda item: item['expected'])
+        
+        if area == PeakPredictionService.GLOBAL_AREA:
+            capacity = MAX_CAPACITY
+        else:
+            capacity = area_index.capacity(area) or MAX_CAPACITY
+        
+        # Confiança: semanas observadas × largura relativa do intervalo
+        coverage = min(1.0, peak['samples'] / PeakPredictionService.MIN_SAMPLES)
+        spread = (peak['upper'] - peak['expected']) / max(peak['expected'], 1.0)
+        confidence = int(round(100 * coverage / (1 + spread)))
+        
+        return {
+            'area': area,
+            'weekday': weekday,
+            'peak_hour': peak['hour'],
+            'peak_count': int(round(peak['expected'])),
+            'interval': {'lower': peak['lower'], 'upper': peak['upper']},
+            'capacity_prediction': round((peak['expected'] / capacity) * 100, 1),
+            'confidence': confidence,
+            'samples': peak['samples'],
+            'hours': hours,
+            'total_readings': total_entries
+        }
@@ -4,14 +4,36 @@ Contém toda a lógica de negócio relacionada ao monitoramento da piscina.
 """
 from datetime import datetime, date, time, timedelta
 from typing import Dict, List, Optional, Tuple
-from sqlalchemy import func, and_, or_, desc
+import numpy as np
+from flask import current_app
+from sqlalchemy import func, and_, or_, desc, extract, case, select
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.exc import IntegrityError
 from app import db
-from app.models.pool_reading import PoolReading
+from app.models.pool_reading import PoolReading, WaterQuality
+from app.models.pool_daily_temperature import PoolDailyTemperature
+from app.models.pool_latest import PoolLatest
+from app.utils.cache import cache
+from app.utils.downsampling import lttb
+from app.utils.pagination import encode_cursor, decode_cursor, keyset_before
 
 
 class PoolService:
     """Serviço para gerenciar leituras dos sensores da piscina."""
     
+    SENSOR_TYPES = ('water_temp', 'ambient_temp', 'water_quality')
+    TEMPERATURE_SENSORS = ('water_temp', 'ambient_temp')
+    ALERT_QUALITIES = ('Regular', 'Imprópria')
+    DOWNSAMPLE_MODES = ('lttb', 'none')
+    
+    # pool_latest vazia já foi recalculada neste processo
+    _latest_rebuilt = False
+    
+    @staticmethod
+    def _day_start(day: date) -> datetime:
+        """Início do dia, para filtros em reading_at."""
+        return datetime.combine(day, time.min)
+    
     @staticmethod
     def create_reading(data: Dict) -> PoolReading:
         """
@@ -48,6 +70,17 @@ class PoolService:
                 reading.water_quality = data.get('water_quality')
             
             db.session.add(reading)
+            db.session.flush()
+            
+            PoolService._update_latest(reading)
+            
+            # Leitura de dia encerrado: descartar o agregado diário (recalculado sob demanda)
+            if sensor_type in PoolService.TEMPERATURE_SENSORS and reading_date < date.today():
+                PoolDailyTemperature.query.filter_by(
+                    sensor_type=sensor_type,
+                    reading_date=reading_date
+                ).delete(synchronize_session=False)
+            
             db.session.commit()
             
             return reading
@@ -62,20 +95,32 @@ class PoolService:
         start_date: Optional[date] = None,
         end_date: Optional[date] = None,
         limit: int = 100,
-        offset: int = 0
-    ) -> Tuple[List[PoolReading], int]:
+        offset: int = 0,
+        cursor: Optional[str] = None,
+        include_total: bool = False
+    ) -> Tuple[List[PoolReading], Optional[int], Optional[str]]:
         """
         Busca leituras com filtros opcionais.
         
+        Filtros e ordenação usam reading_at (idx_sensor_reading_at ou
+        idx_reading_at, com o id da chave primária no fim do índice). A
+        paginação por cursor usa (reading_at, id): páginas profundas custam
+        o mesmo que a primeira. O offset continua aceito sem cursor.
+        
         Args:
             sensor_type: Tipo de sensor para filtrar
             start_date: Data inicial
             end_date: Data final
             limit: Número máximo de resultados
-            offset: Offset para paginação
+            offset: Offset para paginação (ignorado com cursor)
+            cursor: next_cursor da página anterior
+            include_total: Calcular o total de registros (COUNT)
             
         Returns:
-            Tuple[List[PoolReading], int]: Lista de leituras e total de registros
+            Tuple: Lista de leituras, total (ou None) e cursor da próxima página (ou None)
+        
+        Raises:
+            ValueError: Se o cursor for inválido
         """
         query = PoolReading.query
         
@@ -84,262 +129,560 @@ class PoolService:
             query = query.filter(PoolReading.sensor_type == sensor_type)
         
         if start_date:
-            query = query.filter(PoolReading.reading_date >= start_date)
+            query = query.filter(PoolReading.reading_at >= PoolService._day_start(start_date))
         
         if end_date:
-            query = query.filter(PoolReading.reading_date <= end_date)
+            query = query.filter(
+                PoolReading.reading_at < PoolService._day_start(end_date + timedelta(days=1))
+            )
+        
+        # Contar total (opcional)
+        total = query.count() if include_total else None
+        
+        order_columns = (PoolReading.reading_at, PoolReading.id)
         
-        # Contar total
-        total = query.count()
+        if cursor:
+            query = query.filter(keyset_before(order_columns, decode_cursor(cursor, (datetime, int))))
+            offset = 0
         
-        # Ordenar por data/hora decrescente
-        query = query.order_by(
-            desc(PoolReading.reading_date),
-            desc(PoolReading.reading_time)
-        )
+        # Ordenar por data/hora decrescente (uma linha extra indica próxima página)
+        readings = query.order_by(*[desc(column) for column in order_columns])\
+            .limit(limit + 1)\
+            .offset(offset)\
+            .all()
         
-        # Aplicar paginação
-        readings = query.limit(limit).offset(offset).all()
+        next_cursor = None
+        if len(readings) > limit:
+            readings = readings[:limit]
+            last = readings[-1]
+            next_cursor = encode_cursor([last.reading_at, last.id])
         
-        return readings, total
+        return readings, total, next_cursor
+    
+    @staticmethod
+    def _latest_values(reading: PoolReading) -> Dict:
+        """Colunas de pool_latest para uma leitura."""
+        return {
+            'sensor_type': reading.sensor_type,
+            'reading_id': reading.id,
+            'reading_date': reading.reading_date,
+            'reading_time': reading.reading_time,
+            'reading_at': datetime.combine(reading.reading_date, reading.reading_time),
+            'temperature': reading.temperature,
+            'water_quality': reading.water_quality,
+            'created_at': reading.created_at,
+            'updated_at': reading.updated_at
+        }
     
     @staticmethod
-    def get_latest_readings() -> Dict[str, Optional[PoolReading]]:
+    def _update_latest(reading: PoolReading) -> None:
         """
-        Busca a última leitura de cada tipo de sensor.
+        Grava a leitura em pool_latest se for a mais recente do seu tipo.
         
-        Returns:
-            Dict[str, Optional[PoolReading]]: Dicionário com as últimas leituras
+        Um único INSERT ... ON DUPLICATE KEY UPDATE; cada coluna só é
+        substituída se a nova leitura não for mais antiga que a gravada
+        (leituras retroativas não sobrescrevem a última). reading_at é
+        atribuída por último porque o MySQL aplica as atribuições em
+        ordem e a condição depende do valor anterior.
+        
+        Args:
+            reading: Leitura já com id (após flush)
         """
-        result = {
-            'water_temp': None,
-            'ambient_temp': None,
-            'water_quality': None
-        }
+        table = PoolLatest.__table__
+        stmt = mysql_insert(table).values(**PoolService._latest_values(reading))
+        newer = table.c.reading_at <= stmt.inserted.reading_at
+        
+        columns = [
+            column.name for column in table.columns
+            if column.name not in ('sensor_type', 'reading_at')
+        ] + ['reading_at']
+        
+        db.session.execute(stmt.on_duplicate_key_update([
+            (column, case((newer, stmt.inserted[column]), else_=table.c[column]))
+            for column in columns
+        ]))
+    
+    @staticmethod
+    def rebuild_latest(sensor_types: Optional[Tuple[str, ...]] = None) -> int:
+        """
+        Recalcula pool_latest a partir de pool_readings.
         
-        # Lista de tipos de sensores
-        sensor_types = ['water_temp', 'ambient_temp', 'water_quality']
+        Necessário após cargas ou exclusões diretas em pool_readings, que
+        não passam por create_reading.
+        
+        Args:
+            sensor_types: Tipos a recalcular (padrão: todos)
+        
+        Returns:
+            int: Tipos de sensor com leitura
+        """
+        found = 0
         
-        for sensor_type in sensor_types:
+        for sensor_type in sensor_types or PoolService.SENSOR_TYPES:
             reading = PoolReading.query.filter(
                 PoolReading.sensor_type == sensor_type
             ).order_by(
-                desc(PoolReading.reading_date),
-                desc(PoolReading.reading_time)
+                desc(PoolReading.reading_at),
+                desc(PoolReading.id)
             ).first()
             
-            result[sensor_type] = reading
+            if reading is None:
+                PoolLatest.query.filter_by(sensor_type=sensor_type).delete(synchronize_session=False)
+                continue
+            
+            db.session.merge(PoolLatest(**PoolService._latest_values(reading)))
+            found += 1
         
-        return result
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Outra requisição gravou os mesmos tipos
+            db.session.rollback()
+        
+        return found
     
     @staticmethod
-    def get_statistics(days: int = 7) -> Dict:
+    def get_latest_readings() -> Dict[str, Optional[PoolLatest]]:
         """
-        Calcula estatísticas das leituras da piscina.
+        Busca a última leitura de cada tipo de sensor.
+        
+        Lê pool_latest (uma linha por tipo). Se a tabela estiver vazia,
+        como logo após a criação, ela é recalculada de pool_readings uma
+        única vez por processo; depois disso create_reading a mantém, e
+        tipos sem leitura ficam como None (sem novo recálculo a cada
+        chamada). Cargas diretas em pool_readings: `flask pool-latest-rebuild`.
         
-        Args:
-            days: Número de dias para incluir nas estatísticas
-            
         Returns:
-            Dict: Estatísticas agregadas
+            Dict[str, Optional[PoolLatest]]: Dicionário com as últimas leituras
+            (mesmos atributos de PoolReading)
         """
-        start_date = date.today() - timedelta(days=days)
-        
-        # Total de leituras
-        total_readings = PoolReading.query.filter(
-            PoolReading.reading_date >= start_date
-        ).count()
-        
-        # Estatísticas de temperatura da água
-        water_temp_stats = db.session.query(
-            func.avg(PoolReading.temperature).label('avg'),
-            func.min(PoolReading.temperature).label('min'),
-            func.max(PoolReading.temperature).label('max'),
-            func.count(PoolReading.id).label('count')
-        ).filter(
-            and_(
-                PoolReading.sensor_type == 'water_temp',
-                PoolReading.reading_date >= start_date
-            )
-        ).first()
-        
-        # Estatísticas de temperatura ambiente
-        ambient_temp_stats = db.session.query(
-            func.avg(PoolReading.temperature).label('avg'),
-            func.min(PoolReading.temperature).label('min'),
-            func.max(PoolReading.temperature).label('max'),
-            func.count(PoolReading.id).label('count')
-        ).filter(
-            and_(
-                PoolReading.sensor_type == 'ambient_temp',
-                PoolReading.reading_date >= start_date
-            )
-        ).first()
+        result = {sensor_type: None for sensor_type in PoolService.SENSOR_TYPES}
         
-        # Distribuição da qualidade da água
-        quality_distribution = db.session.query(
-            PoolReading.water_quality,
-            func.count(PoolReading.id).label('count')
-        ).filter(
-            and_(
-                PoolReading.sensor_type == 'water_quality',
-                PoolReading.reading_date >= start_date
-            )
-        ).group_by(PoolReading.water_quality).all()
+        rows = PoolLatest.query.all()
         
-        quality_dist_dict = {}
-        for quality, count in quality_distribution:
-            if quality:
-                quality_dist_dict[quality] = count
+        if not rows and not PoolService._latest_rebuilt:
+            PoolService._latest_rebuilt = True
+            if PoolService.rebuild_latest():
+                rows = PoolLatest.query.all()
         
-        # Última atualização
-        last_reading = PoolReading.query.order_by(
-            desc(PoolReading.created_at)
-        ).first()
+        for latest in rows:
+            if latest.sensor_type in result:
+                result[latest.sensor_type] = latest
         
-        # Alertas ativos (qualidade Regular ou Imprópria)
+        return result
+    
+    @staticmethod
+    def _recent_alerts(start_date: date) -> List[Dict]:
+        """Últimas 10 leituras de qualidade Regular/Imprópria desde start_date."""
         active_alerts = PoolReading.query.filter(
             and_(
                 PoolReading.sensor_type == 'water_quality',
-                or_(
-                    PoolReading.water_quality == 'Regular',
-                    PoolReading.water_quality == 'Imprópria'
-                ),
-                PoolReading.reading_date >= start_date
+                PoolReading.water_quality.in_(PoolService.ALERT_QUALITIES),
+                PoolReading.reading_at >= PoolService._day_start(start_date)
             )
         ).order_by(
-            desc(PoolReading.reading_date),
-            desc(PoolReading.reading_time)
+            desc(PoolReading.reading_at)
         ).limit(10).all()
         
-        alerts_list = []
-        for alert in active_alerts:
-            alerts_list.append({
+        return [
+            {
                 'id': alert.id,
                 'water_quality': alert.water_quality,
                 'alert_level': 'warning' if alert.water_quality == 'Regular' else 'danger',
                 'reading_date': alert.reading_date.isoformat(),
                 'reading_time': alert.reading_time.strftime('%H:%M:%S'),
                 'created_at': alert.created_at.isoformat()
-            })
+            }
+            for alert in active_alerts
+        ]
+    
+    @staticmethod
+    def get_statistics(days: int = 7) -> Dict:
+        """
+        Calcula estatísticas das leituras da piscina.
+        
+        Contagens, temperaturas e distribuição de qualidade vêm de uma
+        única query com agregação condicional, que também devolve o maior
+        id de leitura de alerta do período. A lista de alertas fica em
+        cache com esse id na chave: só é consultada de novo quando surge
+        uma nova leitura de alerta (ou o período muda).
+        
+        Args:
+            days: Número de dias para incluir nas estatísticas
+        
+        Returns:
+            Dict: Estatísticas agregadas
+        """
+        start_date = date.today() - timedelta(days=days)
+        
+        temperature = PoolReading.temperature
+        is_water = PoolReading.sensor_type == 'water_temp'
+        is_ambient = PoolReading.sensor_type == 'ambient_temp'
+        is_quality = PoolReading.sensor_type == 'water_quality'
+        is_alert = and_(is_quality, PoolReading.water_quality.in_(PoolService.ALERT_QUALITIES))
+        qualities = [quality.value for quality in WaterQuality]
+        
+        row = db.session.query(
+            func.count(PoolReading.id),
+            func.avg(case((is_water, temperature))),
+            func.min(case((is_water, temperature))),
+            func.max(case((is_water, temperature))),
+            func.count(case((is_water, PoolReading.id))),
+            func.avg(case((is_ambient, temperature))),
+            func.min(case((is_ambient, temperature))),
+            func.max(case((is_ambient, temperature))),
+            func.count(case((is_ambient, PoolReading.id))),
+            *[
+                func.count(case((and_(is_quality, PoolReading.water_quality == quality), PoolReading.id)))
+                for quality in qualities
+            ],
+            func.max(case((is_alert, PoolReading.id))),
+            # Última atualização em toda a tabela (resolvida pelo índice de created_at)
+            select(func.max(PoolReading.created_at)).scalar_subquery()
+        ).filter(
+            PoolReading.reading_at >= PoolService._day_start(start_date)
+        ).one()
+        
+        (total_readings,
+         water_avg, water_min, water_max, water_count,
+         ambient_avg, ambient_min, ambient_max, ambient_count) = row[:9]
+        quality_dist_dict = {
+            quality: count
+            for quality, count in zip(qualities, row[9:9 + len(qualities)])
+            if count
+        }
+        last_alert_id, last_update = row[-2], row[-1]
+        
+        if last_alert_id is None:
+            alerts_list = []
+        else:
+            ttl = current_app.config.get('POOL_ALERTS_CACHE_TTL', 300)
+            alerts_list, _ = cache.get_or_compute(
+                f'pool_alerts:{start_date.isoformat()}:{last_alert_id}',
+                ttl,
+                lambda: (PoolService._recent_alerts(start_date), ttl > 0)
+            )
         
         return {
             'total_readings': total_readings,
             'period_days': days,
             'water_temp': {
-                'avg': float(water_temp_stats.avg) if water_temp_stats.avg else None,
-                'min': float(water_temp_stats.min) if water_temp_stats.min else None,
-                'max': float(water_temp_stats.max) if water_temp_stats.max else None,
-                'count': water_temp_stats.count
+                'avg': float(water_avg) if water_avg else None,
+                'min': float(water_min) if water_min else None,
+                'max': float(water_max) if water_max else None,
+                'count': water_count
             },
             'ambient_temp': {
-                'avg': float(ambient_temp_stats.avg) if ambient_temp_stats.avg else None,
-                'min': float(ambient_temp_stats.min) if ambient_temp_stats.min else None,
-                'max': float(ambient_temp_stats.max) if ambient_temp_stats.max else None,
-                'count': ambient_temp_stats.count
+                'avg': float(ambient_avg) if ambient_avg else None,
+                'min': float(ambient_min) if ambient_min else None,
+                'max': float(ambient_max) if ambient_max else None,
+                'count': ambient_count
             },
             'water_quality': {
                 'distribution': quality_dist_dict,
                 'total_readings': sum(quality_dist_dict.values())
             },
-            'last_update': last_reading.created_at if last_reading else None,
+            'last_update': last_update,
             'active_alerts': alerts_list
         }
     
+    @staticmethod
+    def health() -> Dict:
+        """
+        Verificação leve do módulo (consultas resolvidas só por índices).
+        
+        Returns:
+            Dict: Leituras de hoje e horário da última leitura gravada
+        """
+        total_today, last_reading = db.session.query(
+            select(func.count(PoolReading.id))
+            .where(PoolReading.reading_at >= PoolService._day_start(date.today()))
+            .scalar_subquery(),
+            select(func.max(PoolReading.created_at)).scalar_subquery()
+        ).one()
+        
+        return {
+            'total_readings_today': total_today,
+            'last_reading_at': last_reading.isoformat() if last_reading else None
+        }
+    
     @staticmethod
     def get_temperature_history(
         sensor_type: str,
         days: int = 7,
-        limit: int = 100
+        limit: int = 100,
+        downsample: str = 'lttb'
     ) -> List[PoolReading]:
         """
         Busca histórico de temperatura para gráficos.
         
+        Com downsample='lttb' (padrão), devolve `limit` pontos
+        representativos do período inteiro (ver _downsampled_history);
+        períodos com até `limit` leituras vêm completos. Com 'none',
+        devolve as `limit` leituras mais recentes do período.
+        
         Args:
             sensor_type: 'water_temp' ou 'ambient_temp'
             days: Número de dias de histórico
             limit: Número máximo de pontos
+            downsample: 'lttb' ou 'none'
             
         Returns:
             List[PoolReading]: Lista de leituras ordenadas por data/hora
+        
+        Raises:
+            ValueError: Se o modo de downsample for desconhecido
         """
+        if downsample not in PoolService.DOWNSAMPLE_MODES:
+            raise ValueError(f"downsample deve ser um de: {', '.join(PoolService.DOWNSAMPLE_MODES)}")
+        
         if sensor_type not in ['water_temp', 'ambient_temp']:
             return []
         
         start_date = date.today() - timedelta(days=days)
         
+        if downsample == 'lttb':
+            return PoolService._downsampled_history(sensor_type, start_date, limit)
+        
         readings = PoolReading.query.filter(
             and_(
                 PoolReading.sensor_type == sensor_type,
-                PoolReading.reading_date >= start_date
+                PoolReading.reading_at >= PoolService._day_start(start_date)
             )
         ).order_by(
-            PoolReading.reading_date.asc(),
-            PoolReading.reading_time.asc()
+            PoolReading.reading_at.desc(), PoolReading.id.desc()
         ).limit(limit).all()
         
-        return readings
+        return readings[::-1]
+    
+    @staticmethod
+    def _downsampled_history(sensor_type: str, start_date: date, points: int) -> List[PoolReading]:
+        """
+        Histórico reduzido a `points` leituras com LTTB.
+        
+        Lê só (id, reading_at, temperature) do período em streaming, em
+        lotes de EXPORT_CHUNK_SIZE convertidos para arrays NumPy, escolhe
+        os pontos com lttb() e carrega apenas essas leituras pelo id. O
+        tamanho da resposta não depende do tamanho do período.
+        
+        Returns:
+            List[PoolReading]: Leituras escolhidas, ordenadas por data/hora
+        """
+        chunk_size = current_app.config.get('EXPORT_CHUNK_SIZE', 5000)
+        epoch = datetime(1970, 1, 1)
+        
+        stmt = select(
+            PoolReading.id,
+            PoolReading.reading_at,
+            PoolReading.temperature
+        ).where(
+            PoolReading.sensor_type == sensor_type,
+            PoolReading.reading_at >= PoolService._day_start(start_date),
+            PoolReading.temperature.isnot(None)
+        ).order_by(
+            PoolReading.reading_at, PoolReading.id
+        ).execution_options(stream_results=True, yield_per=chunk_size)
+        
+        ids, xs, ys = [], [], []
+        result = db.session.execute(stmt)
+        try:
+            for batch in result.partitions():
+                count = len(batch)
+                ids.append(np.fromiter((row[0] for row in batch), np.int64, count))
+                xs.append(np.fromiter(((row[1] - epoch).total_seconds() for row in batch), np.float64, count))
+                ys.append(np.fromiter((row[2] for row in batch), np.float64, count))
+        finally:
+            result.close()
+        
+        if not ids:
+            return []
+        
+        ids = np.concatenate(ids)
+        selected = ids[lttb(np.concatenate(xs), np.concatenate(ys), points)]
+        
+        return PoolReading.query.filter(
+            PoolReading.id.in_(selected.tolist())
+        ).order_by(
+            PoolReading.reading_at.asc(), PoolReading.id.asc()
+        ).all()
+    
+    @staticmethod
+    def _daily_temperature_query(sensor_type: str, start_date: date, end_date: date):
+        """Soma, contagem, mínimo e máximo de temperatura por dia (uma query)."""
+        return db.session.query(
+            PoolReading.reading_date,
+            func.sum(PoolReading.temperature),
+            func.count(PoolReading.temperature),
+            func.min(PoolReading.temperature),
+            func.max(PoolReading.temperature)
+        ).filter(
+            PoolReading.sensor_type == sensor_type,
+            PoolReading.reading_at >= PoolService._day_start(start_date),
+            PoolReading.reading_at < PoolService._day_start(end_date + timedelta(days=1))
+        ).group_by(PoolReading.reading_date).all()
+    
+    @staticmethod
+    def _closed_daily_temperatures(
+        sensor_type: str,
+        start_date: date,
+        end_date: date
+    ) -> Dict[date, Tuple]:
+        """
+        Agregados dos dias encerrados, gravando em pool_daily_temperatures
+        os dias que ainda não estão lá.
+        
+        Returns:
+            Dict[date, Tuple]: Dia -> (soma, contagem)
+        """
+        days = {
+            row.reading_date: (row.temperature_sum, row.reading_count)
+            for row in PoolDailyTemperature.query.filter(
+                PoolDailyTemperature.sensor_type == sensor_type,
+                PoolDailyTemperature.reading_date >= start_date,
+                PoolDailyTemperature.reading_date <= end_date
+            ).all()
+        }
+        
+        missing = [
+            start_date + timedelta(days=i)
+            for i in range((end_date - start_date).days + 1)
+            if start_date + timedelta(days=i) not in days
+        ]
+        if not missing:
+            return days
+        
+        computed = {
+            row[0]: row
+            for row in PoolService._daily_temperature_query(sensor_type, missing[0], missing[-1])
+        }
+        
+        for day in missing:
+            _, total, count, minimum, maximum = computed.get(day, (day, 0, 0, None, None))
+            days[day] = (total or 0, count)
+            db.session.add(PoolDailyTemperature(
+                sensor_type=sensor_type,
+                reading_date=day,
+                temperature_sum=total or 0,
+                reading_count=count,
+                temperature_min=minimum,
+                temperature_max=maximum
+            ))
+        
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Outra requisição gravou os mesmos dias
+            db.session.rollback()
+        
+        return days
     
     @staticmethod
     def get_daily_temperature_average(
         sensor_type: str,
-        days: int = 10
+        days: int = 10,
+        granularity: str = 'day'
     ) -> List[Dict]:
         """
-        Calcula a média diária de temperatura dos últimos N dias.
+        Calcula a média diária (ou horária) de temperatura dos últimos N dias.
+        
+        Os dias encerrados vêm de pool_daily_temperatures (calculados com
+        GROUP BY na primeira consulta); só o dia atual é agregado a partir
+        de pool_readings.
         
         Args:
             sensor_type: 'water_temp' ou 'ambient_temp'
             days: Número de dias de histórico (padrão: 10)
+            granularity: 'day' ou 'hour' (média por dia e hora, sempre em SQL)
             
         Returns:
             List[Dict]: Lista com a média de cada dia no formato:
-                        [{'date': 'YYYY-MM-DD', 'avg_temperature': float}, ...]
+                        [{'date': 'YYYY-MM-DD', 'avg_temperature': float,
+                          'reading_count': int}, ...]
+                        (com 'hour' no modo horário)
         """
-        if sensor_type not in ['water_temp', 'ambient_temp']:
+        if sensor_type not in PoolService.TEMPERATURE_SENSORS:
             return []
         
-        start_date = date.today() - timedelta(days=days - 1)
+        today = date.today()
+        start_date = today - timedelta(days=days - 1)
         
-        # Buscar todas as leituras do período
-        readings = PoolReading.query.filter(
-            and_(
-                PoolReading.sensor_type == sensor_type,
-                PoolReading.reading_date >= start_date
-            )
-        ).order_by(
-            PoolReading.reading_date.asc()
-        ).all()
+        if granularity == 'hour':
+            return PoolService._hourly_temperature_average(sensor_type, start_date)
         
-        # Agrupar por data e calcular média
-        daily_averages = {}
-        for reading in readings:
-            reading_date_str = reading.reading_date.isoformat()
+        daily = {}
+        if start_date < today:
+            daily.update(PoolService._closed_daily_temperatures(
+                sensor_type, start_date, today - timedelta(days=1)
+            ))
             
-            if reading_date_str not in daily_averages:
-                daily_averages[reading_date_str] = {
-                    'sum': 0,
-                    'count': 0
-                }
-            
-            if reading.temperature is not None:
-                daily_averages[reading_date_str]['sum'] += float(reading.temperature)
-                daily_averages[reading_date_str]['count'] += 1
+        for day, total, count, _, _ in PoolService._daily_temperature_query(sensor_type, today, today):
+            daily[day] = (total, count)
         
-        # Calcular médias e formatar resultado
         result = []
-        for day_date in sorted(daily_averages.keys()):
-            data = daily_averages[day_date]
-            if data['count'] > 0:
-                avg_temp = round(data['sum'] / data['count'], 2)
+        for day in sorted(daily):
+            total, count = daily[day]
+            if count:
                 result.append({
-                    'date': day_date,
-                    'avg_temperature': avg_temp,
-                    'reading_count': data['count']
+                    'date': day.isoformat(),
+                    'avg_temperature': round(float(total) / count, 2),
+                    'reading_count': count
                 })
         
         return result
     
+    @staticmethod
+    def _hourly_temperature_average(sensor_type: str, start_date: date) -> List[Dict]:
+        """Média de temperatura por dia e hora desde start_date (uma query)."""
+        hour = extract('hour', PoolReading.reading_time)
+        
+        rows = db.session.query(
+            PoolReading.reading_date,
+            hour,
+            func.avg(PoolReading.temperature),
+            func.count(PoolReading.temperature)
+        ).filter(
+            PoolReading.sensor_type == sensor_type,
+            PoolReading.reading_at >= PoolService._day_start(start_date)
+        ).group_by(
+            PoolReading.reading_date, hour
+        ).order_by(
+            PoolReading.reading_date, hour
+        ).all()
+        
+        return [
+            {
+                'date': day.isoformat(),
+                'hour': int(hour_value),
+                'avg_temperature': round(float(average), 2),
+                'reading_count': count
+            }
+            for day, hour_value, average, count in rows
+            if count
+        ]
+    
+    @staticmethod
+    def rebuild_daily_temperatures(days: int) -> int:
+        """
+        Descarta os agregados diários dos últimos N dias.
+        
+        Os dias são recalculados na próxima consulta. Necessário após
+        inserções diretas em pool_readings (fora de create_reading).
+        
+        Args:
+            days: Número de dias a descartar
+        
+        Returns:
+            int: Linhas removidas
+        """
+        start_date = date.today() - timedelta(days=days)
+        
+        deleted = PoolDailyTemperature.query.filter(
+            PoolDailyTemperature.reading_date >= start_date
+        ).delete(synchronize_session=False)
+        db.session.commit()
+        
+        return deleted
+    
     @staticmethod
     def check_water_quality_alerts() -> List[Dict]:
         """
@@ -357,11 +700,10 @@ class PoolService:
                     PoolReading.water_quality == 'Regular',
                     PoolReading.water_quality == 'Imprópria'
                 ),
-                PoolReading.reading_date >= yesterday
+                PoolReading.reading_at >= PoolService._day_start(yesterday)
             )
         ).order_by(
-            desc(PoolReading.reading_date),
-            desc(PoolReading.reading_time)
+            desc(PoolReading.reading_at)
         ).all()
         
         result = []
@@ -3,17 +3,26 @@ Service de Leituras
 Lógica de negócio relacionada a leituras de sensores
 """
 
-from typing import Optional, List
-from datetime import datetime
+from typing import Any, Dict, Optional, List
+from datetime import datetime, timedelta, timezone
+from marshmallow import ValidationError
+from sqlalchemy import func
 from app import db
 from app.models.reading import Reading
 from app.models.sensor import Sensor
+from app.schemas.reading_schema import ReadingCreateSchema
+from app.services.ingestion_service import IngestionService
 from app.services.sensor_service import SensorService
+from app.services.sensor_stats import sensor_stats
+from app.utils.pagination import encode_cursor, decode_cursor, keyset_before
 
 
 class ReadingService:
     """Serviço de gerenciamento de leituras"""
     
+    # Tolerância para relógios adiantados em timestamps enviados pelo cliente
+    MAX_CLOCK_SKEW = timedelta(minutes=5)
+    
     @staticmethod
     def list_readings(
         sensor_id: Optional[int] = None,
@@ -46,6 +55,172 @@ class ReadingService:
         
         return query.order_by(Reading.timestamp.desc()).limit(limit).all()
     
+    # Colunas das listagens: leitura + serial do sensor (um único JOIN)
+    LIST_COLUMNS = (
+        Reading.id,
+        Reading.sensor_id,
+        Sensor.serial_number,
+        Reading.activity,
+        Reading.timestamp,
+        Reading.sensor_metadata
+    )
+    
+    @staticmethod
+    def serialize_row(row) -> dict:
+        """
+        Serializar uma linha de LIST_COLUMNS (tupla, sem objeto ORM)
+        
+        battery_level e signal_strength vêm de sensor_metadata (o MQTT
+        grava o sinal como rssi_dbm).
+        
+        Args:
+            row: (id, sensor_id, serial_number, activity, timestamp, sensor_metadata)
+        
+        Returns:
+            dict: Leitura serializada
+        """
+        reading_id, sensor_id, serial_number, activity, timestamp, metadata = row
+        metadata = metadata or {}
+        
+        return {
+            'id': reading_id,
+            'sensor_id': sensor_id,
+            'sensor_serial': serial_number,
+            'activity': activity,
+            'battery_level': metadata.get('battery_level'),
+            'signal_strength': metadata.get('signal_strength', metadata.get('rssi_dbm')),
+            'timestamp': timestamp.isoformat(),
+            'metadata': metadata or None
+        }
+    
+    @staticmethod
+    def list_readings_page(
+        sensor_id: Optional[int] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        include_total: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Listar leituras com paginação por cursor em (timestamp, id)
+        
+        Uma única query seleciona só as colunas serializadas, com o serial
+        do sensor via JOIN, e as linhas são serializadas como tuplas.
+        
+        Args:
+            sensor_id: Filtrar por sensor
+            start_date: Data inicial
+            end_date: Data final
+            limit: Limite de resultados
+            cursor: next_cursor da página anterior
+            include_total: Calcular o total do filtro (COUNT)
+        
+        Returns:
+            Dict: count, next_cursor, has_more, readings (e total, se pedido)
+        
+        Raises:
+            ValueError: Se o cursor for inválido
+        """
+        filters = []
+        
+        if sensor_id:
+            filters.append(Reading.sensor_id == sensor_id)
+        
+        if start_date:
+            filters.append(Reading.timestamp >= start_date)
+        
+        if end_date:
+            filters.append(Reading.timestamp <= end_date)
+        
+        total = db.session.query(func.count(Reading.id)).filter(*filters).scalar() \
+            if include_total else None
+        
+        if cursor:
+            filters.append(keyset_before((Reading.timestamp, Reading.id), decode_cursor(cursor, (datetime, int))))
+        
+        # Ordenar por timestamp decrescente; uma linha extra indica próxima página
+        rows = db.session.query(*ReadingService.LIST_COLUMNS)\
+            .outerjoin(Sensor, Sensor.id == Reading.sensor_id)\
+            .filter(*filters)\
+            .order_by(Reading.timestamp.desc(), Reading.id.desc())\
+            .limit(limit + 1)\
+            .all()
+        
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        
+        page = {
+            'count': len(rows),
+            'next_cursor': encode_cursor([rows[-1].timestamp, rows[-1].id]) if has_more else None,
+            'has_more': has_more,
+            'readings': [ReadingService.serialize_row(row) for row in rows]
+        }
+        
+        if include_total:
+            page['total'] = total
+        
+        return page
+    
+    @staticmethod
+    def get_reading_detail(reading_id: int) -> Optional[dict]:
+        """
+        Buscar leitura serializada com os dados do sensor (uma query)
+        
+        Args:
+            reading_id: ID da leitura
+        
+        Returns:
+            dict: Leitura serializada ou None se não encontrada
+        """
+        row = db.session.query(
+            *ReadingService.LIST_COLUMNS,
+            Sensor.protocol,
+            Sensor.location
+        ).outerjoin(
+            Sensor, Sensor.id == Reading.sensor_id
+        ).filter(Reading.id == reading_id).first()
+        
+        if row is None:
+            return None
+        
+        data = ReadingService.serialize_row(row[:6])
+        metadata = data['metadata'] or {}
+        serial_number, protocol, location = row[2], row[6], row[7]
+        
+        data.pop('sensor_serial')
+        data.update({
+            'sensor': {
+                'id': data['sensor_id'],
+                'serial_number': serial_number,
+                'protocol': protocol,
+                'location': location
+            } if serial_number is not None else None,
+            'temperature': metadata.get('temperature'),
+            'humidity': metadata.get('humidity')
+        })
+        
+        return data
+    
+    @staticmethod
+    def get_latest_detail(sensor_id: int) -> Optional[dict]:
+        """
+        Buscar a última leitura serializada de um sensor (uma query)
+        
+        Args:
+            sensor_id: ID do sensor
+        
+        Returns:
+            dict: Leitura serializada ou None se o sensor não tiver leituras
+        """
+        row = db.session.query(*ReadingService.LIST_COLUMNS)\
+            .outerjoin(Sensor, Sensor.id == Reading.sensor_id)\
+            .filter(Reading.sensor_id == sensor_id)\
+            .order_by(Reading.timestamp.desc(), Reading.id.desc())\
+            .first()
+        
+        return ReadingService.serialize_row(row) if row else None
+    
     @staticmethod
     def get_reading_by_id(reading_id: int) -> Reading:
         """
@@ -60,7 +235,7 @@ class ReadingService:
         Raises:
             ValueError: Se leitura não encontrada
         """
-        reading = Reading.query.get(reading_id)
+        reading = Reading.query.filter_by(id=reading_id).first()
         if not reading:
             raise ValueError('Leitura não encontrada')
         return reading
@@ -82,63 +257,139 @@ class ReadingService:
         # Verificar se sensor existe
         sensor = SensorService.get_sensor_by_id(data['sensor_id'])
         
-        # Preparar metadados do sensor
-        sensor_metadata = {}
-        metadata_fields = ['battery_level', 'signal_strength', 'temperature', 'humidity']
-        
-        for field in metadata_fields:
-            if field in data:
-                sensor_metadata[field] = data[field]
-        
-        # Adicionar metadata customizado
-        if 'metadata' in data:
-            sensor_metadata.update(data['metadata'])
-        
         # Criar leitura
         reading = Reading(
             sensor_id=data['sensor_id'],
             activity=data.get('activity', 0),
             timestamp=datetime.utcnow(),
-            sensor_metadata=sensor_metadata if sensor_metadata else None
+            sensor_metadata=ReadingService._build_sensor_metadata(data)
         )
         
         db.session.add(reading)
         
+        db.session.commit()
+        
         # Atualizar sensor
         ReadingService._update_sensor_stats(sensor, data)
+        sensor_stats.maybe_flush()
         
-        db.session.commit()
+        IngestionService.notify_listeners([{
+            'sensor_id': reading.sensor_id,
+            'activity': reading.activity,
+            'timestamp': reading.timestamp,
+            'sensor_metadata': reading.sensor_metadata
+        }])
         
         return reading
     
+    @staticmethod
+    def _build_sensor_metadata(data: dict) -> Optional[dict]:
+        """
+        Montar metadados do sensor a partir do payload da leitura
+        
+        Args:
+            data: Dados da leitura
+        
+        Returns:
+            dict: Metadados ou None se vazio
+        """
+        sensor_metadata = {}
+        metadata_fields = ['battery_level', 'signal_strength', 'temperature', 'humidity']
+        
+        for field in metadata_fields:
+            if field in data:
+                sensor_metadata[field] = data[field]
+        
+        # Adicionar metadata customizado
+        if 'metadata' in data:
+            sensor_metadata.update(data['metadata'])
+        
+        return sensor_metadata if sensor_metadata else None
+    
     @staticmethod
     def create_bulk_readings(readings_data: List[dict]) -> dict:
         """
-        Criar múltiplas leituras
+        Criar múltiplas leituras com operações em conjunto
+        
+        Todo o payload é validado em uma passada, os sensor_ids são
+        resolvidos com uma única query IN e as leituras válidas são
+        gravadas com um único INSERT multi-linha. Itens inválidos não
+        impedem a gravação dos demais e são reportados pelo índice.
+        
+        Cada item pode trazer seu `timestamp` (ISO; sem timezone = UTC),
+        como nos dados offline reenviados por gateways; sem ele, a leitura
+        recebe o horário atual. Campos desconhecidos são ignorados.
         
         Args:
             readings_data: Lista de dados de leituras
             
         Returns:
-            dict: Resultado com contadores
+            dict: Resultado com contadores e erros por índice
         """
-        created = 0
         errors = []
         
-        for data in readings_data:
-            try:
-                ReadingService.create_reading(data)
-                created += 1
-            except ValueError as e:
+        # Validar o payload inteiro de uma vez
+        try:
+            loaded = ReadingCreateSchema(many=True).load(readings_data)
+            invalid = {}
+        except ValidationError as e:
+            loaded = e.valid_data or []
+            invalid = e.messages if isinstance(e.messages, dict) else {}
+        
+        for index, messages in sorted(invalid.items()):
+            errors.append({
+                'index': index,
+                'error': 'Dados inválidos',
+                'details': messages
+            })
+        
+        candidates = [
+            (index, data)
+            for index, data in enumerate(loaded)
+            if index not in invalid
+        ]
+        
+        # Resolver todos os sensores com uma única query
+        sensor_ids = {data['sensor_id'] for _, data in candidates}
+        existing = {
+            sensor_id for (sensor_id,) in db.session.query(Sensor.id)
+            .filter(Sensor.id.in_(sensor_ids)).all()
+        } if sensor_ids else set()
+        
+        now = datetime.utcnow()
+        rows = []
+        
+        for index, data in candidates:
+            if data['sensor_id'] not in existing:
                 errors.append({
-                    'data': data,
-                    'error': str(e)
+                    'index': index,
+                    'error': f"Sensor {data['sensor_id']} não encontrado"
                 })
-            except Exception as e:
+                continue
+            
+            timestamp = data.get('timestamp')
+            if timestamp is None:
+                timestamp = now
+            elif timestamp.tzinfo is not None:
+                timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+            
+            if timestamp > now + ReadingService.MAX_CLOCK_SKEW:
                 errors.append({
-                    'data': data,
-                    'error': f'Erro inesperado: {str(e)}'
+                    'index': index,
+                    'error': 'timestamp no futuro'
                 })
+                continue
+            
+            rows.append({
+                'sensor_id': data['sensor_id'],
+                'activity': data.get('activity', 0),
+                'timestamp': timestamp,
+                'sensor_metadata': ReadingService._build_sensor_metadata(data)
+            })
+        
+        created = IngestionService.write_rows(rows)
+        
+        errors.sort(key=lambda error: error['index'])
         
         return {
             'created': created,
@@ -164,15 +415,16 @@ class ReadingService:
         """
         Atualizar estatísticas do sensor
         
+        Os deltas são acumulados em memória e gravados por sensor_stats
+        com um UPDATE por sensor a cada intervalo.
+        
         Args:
             sensor: Sensor a ser atualizado
             reading_data: Dados da leitura
         """
-        sensor.last_reading_at = datetime.utcnow()
-        sensor.total_readings += 1
-        
-        if 'battery_level' in reading_data:
-            sensor.battery_level = reading_data['battery_level']
-        
-        if 'signal_strength' in reading_data:
-            sensor.signal_strength = reading_data['signal_strength']
+        sensor_stats.record(
+            sensor.id,
+            datetime.utcnow(),
+            battery_level=reading_data.get('battery_level'),
+            signal_strength=reading_data.get('signal_strength')
+        )
@@ -0,0 +1,298 @@
+"""
+Service de Sincronização do Banco de Relatórios
+Cópia incremental das tabelas do banco principal para o banco de relatórios
+"""
+
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from flask import current_app
+from sqlalchemy import (
+    BigInteger, Column, DateTime, MetaData, String, Table,
+    and_, create_engine, inspect, or_, select
+)
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.schema import CreateTable
+from app import db
+from app.models import User, Sensor, Reading, PoolReading, Alert, Statistics
+
+
+logger = logging.getLogger(__name__)
+
+# Marcas d'água por tabela, gravadas no próprio banco de relatórios
+sync_state = Table(
+    'report_sync_state',
+    MetaData(),
+    Column('table_name', String(64), primary_key=True),
+    Column('last_id', BigInteger, nullable=False, default=0),
+    Column('last_updated_at', DateTime),
+    Column('rows_copied', BigInteger, nullable=False, default=0),
+    Column('synced_at', DateTime, nullable=False)
+)
+
+_engines: Dict[str, Any] = {}
+
+
+class ReportSyncService:
+    """
+    Sincronização incremental com o banco de relatórios (Grafana)
+    
+    Cada tabela é copiada conforme seu padrão de escrita:
+    - 'id': só recebe inserções (readings, pool_readings); copia id > marca,
+      parando antes da primeira linha criada nos últimos
+      REPORT_SYNC_OVERLAP_SECONDS (ids menores ainda não confirmados por
+      escritores concorrentes entram na próxima execução)
+    - 'updated': linhas alteradas (alerts, statistics); copia por
+      (updated_at, id) a partir da marca, com REPORT_SYNC_OVERLAP_SECONDS
+      de sobreposição para transações que confirmaram fora de ordem
+    - 'full': tabelas pequenas (users, sensors); copia tudo e remove as
+      linhas que não existem mais na origem
+    
+    As linhas vão em lotes de REPORT_SYNC_BATCH_SIZE com INSERT ... ON
+    DUPLICATE KEY UPDATE, e a marca d'água de cada lote é gravada na
+    mesma transação (report_sync_state), então uma execução interrompida
+    continua de onde parou. Leituras removidas do banco principal pelo
+    arquivamento ou pelas partições continuam no banco de relatórios.
+    
+    As tabelas ausentes no destino são criadas (com os índices, sem
+    chaves estrangeiras).
+    Execuções concorrentes são evitadas com GET_LOCK.
+    """
+    
+    LOCK_NAME = 'report_sync'
+    
+    # Ordem de cópia: tabelas referenciadas primeiro
+    TABLES = (
+        (User.__table__, 'full'),
+        (Sensor.__table__, 'full'),
+        (Reading.__table__, 'id'),
+        (PoolReading.__table__, 'id'),
+        (Alert.__table__, 'updated'),
+        (Statistics.__table__, 'updated'),
+    )
+    
+    @staticmethod
+    def engine():
+        """Engine do banco de relatórios (uma por URI, compartilhada pelo processo)"""
+        uri = current_app.config['REPORT_DATABASE_URI']
+        
+        if uri not in _engines:
+            _engines[uri] = create_engine(uri, pool_pre_ping=True, pool_recycle=3600)
+        
+        return _engines[uri]
+    
+    @staticmethod
+    def _prepare(connection, table: Table) -> List[str]:
+        """
+        Cria a tabela no destino se necessário
+        
+        Returns:
+            List[str]: Colunas presentes nos dois bancos
+        """
+        inspector = inspect(connection)
+        # Colunas geradas (ex.: pool_readings.reading_at) são calculadas no destino
+        copied = [column.name for column in table.columns if column.computed is None]
+        
+        if not inspector.has_table(table.name):
+            connection.execute(CreateTable(table, include_foreign_key_constraints=[]))
+            for index in table.indexes:
+                index.create(connection)
+            return copied
+        
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        missing = [name for name in copied if name not in existing]
+        if missing:
+            logger.warning(f"Relatórios: {table.name} sem as colunas {missing}; ignoradas")
+        
+        return [name for name in copied if name in existing]
+    
+    @staticmethod
+    def _upsert(connection, table: Table, columns: List[str], rows: List[Any]) -> None:
+        """Grava as linhas no destino (insere ou atualiza pela chave)"""
+        primary_key = {column.name for column in table.primary_key.columns}
+        stmt = mysql_insert(table)
+        stmt = stmt.on_duplicate_key_update([
+            (column, stmt.inserted[column])
+            for column in columns
+            if column not in primary_key
+        ])
+        
+        connection.execute(stmt, [{column: row[column] for column in columns} for row in rows])
+    
+    @staticmethod
+    def _save_state(connection, table: Table, state: Dict[str, Any]) -> None:
+        stmt = mysql_insert(sync_state).values(
+            table_name=table.name,
+            last_id=state['last_id'],
+            last_updated_at=state['last_updated_at'],
+            rows_copied=state['rows_copied'],
+            synced_at=datetime.utcnow()
+        )
+        connection.execute(stmt.on_duplicate_key_update([
+            (column, stmt.inserted[column])
+            for column in ('last_id', 'last_updated_at', 'rows_copied', 'synced_at')
+        ]))
+    
+    @staticmethod
+    def _copy_by_id(connection, table: Table, columns: List[str],
+                    state: Dict[str, Any], batch_size: int) -> int:
+        """Copia as linhas com id acima da marca d'água"""
+        overlap = current_app.config.get('REPORT_SYNC_OVERLAP_SECONDS', 5)
+        copied = 0
+        
+        # Ids não chegam em ordem de commit: linhas recentes esperam a próxima execução
+        settled = []
+        if overlap:
+            first_recent = db.session.execute(
+                select(db.func.min(table.c.id)).where(
+                    table.c.id > state['last_id'],
+                    table.c.created_at >= datetime.utcnow() - timedelta(seconds=overlap)
+                )
+            ).scalar()
+            if first_recent is not None:
+                settled.append(table.c.id < first_recent)
+        
+        while True:
+            rows = db.session.execute(
+                select(table).where(table.c.id > state['last_id'], *settled)
+                .order_by(table.c.id).limit(batch_size)
+            ).mappings().all()
+            db.session.rollback()
+            
+            if not rows:
+                return copied
+            
+            with connection.begin():
+                ReportSyncService._upsert(connection, table, columns, rows)
+                state['last_id'] = rows[-1]['id']
+                state['rows_copied'] += len(rows)
+                ReportSyncService._save_state(connection, table, state)
+            
+            copied += len(rows)
+    
+    @staticmethod
+    def _copy_by_updated(connection, table: Table, columns: List[str],
+                         state: Dict[str, Any], batch_size: int) -> int:
+        """Copia as linhas alteradas desde a marca d'água (updated_at, id)"""
+        overlap = current_app.config.get('REPORT_SYNC_OVERLAP_SECONDS', 5)
+        copied = 0
+        
+        if state['last_updated_at'] is None:
+            cursor = (datetime.min, 0)
+        else:
+            cursor = (state['last_updated_at'] - timedelta(seconds=overlap), 0)
+        
+        while True:
+            rows = db.session.execute(
+                select(table).where(or_(
+                    table.c.updated_at > cursor[0],
+                    and_(table.c.updated_at == cursor[0], table.c.id > cursor[1])
+                )).order_by(table.c.updated_at, table.c.id).limit(batch_size)
+            ).mappings().all()
+            db.session.rollback()
+            
+            if not rows:
+                return copied
+            
+            cursor = (rows[-1]['updated_at'], rows[-1]['id'])
+            
+            with connection.begin():
+                ReportSyncService._upsert(connection, table, columns, rows)
+                state['last_updated_at'] = max(state['last_updated_at'] or cursor[0], cursor[0])
+                state['rows_copied'] += len(rows)
+                ReportSyncService._save_state(connection, table, state)
+            
+            copied += len(rows)
+    
+    @staticmethod
+    def _copy_full(connection, table: Table, columns: List[str],
+                   state: Dict[str, Any], batch_size: int) -> int:
+        """Copia a tabela inteira e remove do destino as linhas apagadas na origem"""
+        rows = db.session.execute(select(table)).mappings().all()
+        db.session.rollback()
+        
+        with connection.begin():
+            for i in range(0, len(rows), batch_size):
+                ReportSyncService._upsert(connection, table, columns, rows[i:i + batch_size])
+            
+            ids = [row['id'] for row in rows]
+            delete = table.delete()
+            if ids:
+                delete = delete.where(table.c.id.notin_(ids))
+            connection.execute(delete)
+            
+            state['rows_copied'] += len(rows)
+            ReportSyncService._save_state(connection, table, state)
+        
+        return len(rows)
+    
+    @staticmethod
+    def sync(tables: Optional[List[str]] = None, reset: bool = False) -> Dict[str, Any]:
+        """
+        Sincroniza as tabelas com o banco de relatórios
+        
+        Args:
+            tables: Nomes das tabelas (padrão: todas de TABLES)
+            reset: Descartar as marcas d'água e recopiar tudo (idempotente)
+        
+        Returns:
+            Dict: Linhas copiadas por tabela (ou skipped se outra execução está ativa)
+        """
+        batch_size = current_app.config.get('REPORT_SYNC_BATCH_SIZE', 5000)
+        copy = {
+            'id': ReportSyncService._copy_by_id,
+            'updated': ReportSyncService._copy_by_updated,
+            'full': ReportSyncService._copy_full
+        }
+        
+        selected = [
+            (table, mode) for table, mode in ReportSyncService.TABLES
+            if not tables or table.name in tables
+        ]
+        unknown = set(tables or []) - {table.name for table, _ in selected}
+        if unknown:
+            raise ValueError(f"Tabelas desconhecidas: {', '.join(sorted(unknown))}")
+        
+        result: Dict[str, Any] = {}
+        
+        with ReportSyncService.engine().connect() as connection:
+            locked = connection.execute(
+                select(db.func.get_lock(ReportSyncService.LOCK_NAME, 0))
+            ).scalar()
+            connection.commit()
+            
+            if not locked:
+                logger.warning("Relatórios: sincronização já em andamento; ignorada")
+                return {'skipped': True}
+            
+            try:
+                with connection.begin():
+                    sync_state.create(connection, checkfirst=True)
+                    if reset:
+                        connection.execute(sync_state.delete().where(
+                            sync_state.c.table_name.in_([table.name for table, _ in selected])
+                        ))
+                
+                for table, mode in selected:
+                    with connection.begin():
+                        columns = ReportSyncService._prepare(connection, table)
+                        saved = connection.execute(
+                            select(sync_state).where(sync_state.c.table_name == table.name)
+                        ).mappings().first()
+                    
+                    state = {
+                        'last_id': saved['last_id'] if saved else 0,
+                        'last_updated_at': saved['last_updated_at'] if saved else None,
+                        'rows_copied': saved['rows_copied'] if saved else 0
+                    }
+                    
+                    result[table.name] = copy[mode](connection, table, columns, state, batch_size)
+            finally:
+                connection.execute(select(db.func.release_lock(ReportSyncService.LOCK_NAME)))
+                connection.commit()
+        
+        copied = sum(result.values())
+        if copied:
+            logger.info(f"Relatórios: {copied} linhas sincronizadas")
+        
+        return result
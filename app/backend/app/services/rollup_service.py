@@ -0,0 +1,272 @@
+"""
+Service de Rollup
+Agrega a tabela readings em linhas por sensor/hora na tabela statistics
+"""
+
+import logging
+from datetime import date, datetime, timedelta
+from typing import Dict, Any, List, Optional
+from flask import current_app
+from sqlalchemy import func, case
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from app import db
+from app.models.reading import Reading
+from app.models.statistics import Statistics
+from app.models.rollup_watermark import RollupWatermark
+from app.services.archive_service import ArchiveService
+from app.services.areas import area_index
+from app.services.peak_prediction_service import PeakPredictionService
+from occupancy_counter import EXIT
+
+
+logger = logging.getLogger(__name__)
+
+
+class RollupService:
+    """
+    Rollup horário readings → statistics
+    
+    `catch_up()` agrega apenas as leituras com id acima da marca d'água
+    e soma os deltas nas linhas (date, hour, sensor_id) via
+    INSERT ... ON DUPLICATE KEY UPDATE na chave uix_date_hour_sensor.
+    Marca d'água e deltas são gravados na mesma transação, então cada
+    leitura é contada uma única vez mesmo se o job for interrompido.
+    
+    Ids de auto-incremento não chegam em ordem de commit quando há
+    escritores concorrentes (worker de ingestão e inserções em lote da
+    API): a marca d'água só avança até antes da primeira leitura com
+    created_at dentro de ROLLUP_GRACE_SECONDS, para que um id menor ainda
+    não confirmado não fique para trás.
+    
+    `rebuild()` recalcula um intervalo de datas do zero (backfill ou
+    correção após exclusão de leituras) e pode ser repetido sem efeito
+    colateral.
+    
+    Os mesmos deltas alimentam o histograma hora-da-semana da previsão de
+    pico (PeakPredictionService); após um `rebuild()`, recriar o
+    histograma com `PeakPredictionService.rebuild()`.
+    
+    Só detecções (activity 1) são contadas: as de sensores de saída vão
+    para exits e as demais para entries (detecções do sensor, como em
+    Statistics.update_from_readings). Ocupação não existe por sensor:
+    current_people fica em 0 e avg/max/min_people em NULL nessas linhas
+    (a ocupação do dia vem do OccupancyTracker).
+    
+    Datas e horas das linhas são em UTC, como readings.timestamp.
+    """
+    
+    WATERMARK = 'statistics_hourly'
+    
+    @staticmethod
+    def _hourly_query(*filters):
+        """Query agregada por sensor/data/hora (UTC)"""
+        return db.session.query(
+            Reading.sensor_id,
+            func.date(Reading.timestamp).label('date'),
+            func.hour(Reading.timestamp).label('hour'),
+            func.sum(case((Reading.activity == 1, 1), else_=0)).label('detections'),
+            func.count(Reading.id).label('total_readings')
+        ).filter(*filters).group_by(
+            Reading.sensor_id,
+            func.date(Reading.timestamp),
+            func.hour(Reading.timestamp)
+        )
+    
+    @staticmethod
+    def _to_rows(results) -> List[dict]:
+        """Converte o resultado agregado em valores para a tabela statistics"""
+        now = datetime.utcnow()
+        directions = area_index.sensor_directions()
+        rows = []
+        
+        for sensor_id, day, hour, detections, total in results:
+            detections = int(detections or 0)
+            exit_sensor = directions.get(sensor_id) == EXIT
+            rows.append({
+                'date': day if isinstance(day, date) else date.fromisoformat(str(day)),
+                'hour': int(hour),
+                'sensor_id': sensor_id,
+                'entries': 0 if exit_sensor else detections,
+                'exits': detections if exit_sensor else 0,
+                'current_people': 0,
+                'avg_people': None,
+                'max_people': None,
+                'min_people': None,
+                'total_readings': int(total or 0),
+                'created_at': now,
+                'updated_at': now
+            })
+        
+        return rows
+    
+    @staticmethod
+    def _upsert(rows: List[dict], increment: bool) -> None:
+        """
+        Grava as linhas em statistics pela chave uix_date_hour_sensor
+        
+        Args:
+            rows: Valores agregados
+            increment: Somar aos valores existentes (True) ou substituí-los
+        """
+        if not rows:
+            return
+        
+        stmt = mysql_insert(Statistics.__table__)
+        table = Statistics.__table__.c
+        
+        if increment:
+            updates = [
+                ('entries', table.entries + stmt.inserted.entries),
+                ('exits', table.exits + stmt.inserted.exits),
+                ('total_readings', func.coalesce(table.total_readings, 0) + stmt.inserted.total_readings),
+                ('updated_at', stmt.inserted.updated_at)
+            ]
+        else:
+            updates = [
+                ('entries', stmt.inserted.entries),
+                ('exits', stmt.inserted.exits),
+                ('total_readings', stmt.inserted.total_readings),
+                ('current_people', stmt.inserted.current_people),
+                ('avg_people', stmt.inserted.avg_people),
+                ('max_people', stmt.inserted.max_people),
+                ('min_people', stmt.inserted.min_people),
+                ('updated_at', stmt.inserted.updated_at)
+            ]
+        
+        db.session.execute(stmt.on_duplicate_key_update(updates), rows)
+    
+    @staticmethod
+    def _settled_max_id(lower: int) -> int:
+        """
+        Maior id que a marca d'água pode alcançar com segurança
+        
+        Todas as leituras até o id retornado foram criadas há mais de
+        ROLLUP_GRACE_SECONDS (ver Reading.settled_max_id).
+        
+        Args:
+            lower: Marca d'água atual
+        
+        Returns:
+            int: Limite superior de ids para o rollup
+        """
+        return Reading.settled_max_id(lower, current_app.config.get('ROLLUP_GRACE_SECONDS', 30))
+    
+    @staticmethod
+    def catch_up(batch_size: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Agrega as leituras novas desde a última execução
+        
+        Processa em fatias de `batch_size` ids (padrão: ROLLUP_BATCH_SIZE),
+        com um commit por fatia, até o maior id já assentado (ver
+        _settled_max_id).
+        
+        Args:
+            batch_size: Número máximo de ids por fatia
+        
+        Returns:
+            Dict: Leituras processadas, linhas gravadas e marca d'água final
+        """
+        if batch_size is None:
+            batch_size = current_app.config.get('ROLLUP_BATCH_SIZE', 50000)
+        
+        lower = db.session.query(RollupWatermark.last_reading_id)\
+            .filter_by(name=RollupService.WATERMARK).scalar() or 0
+        max_id = RollupService._settled_max_id(lower)
+        processed = 0
+        upserted = 0
+        
+        while True:
+            watermark = RollupWatermark.acquire(RollupService.WATERMARK)
+            lower = watermark.last_reading_id
+            
+            if lower >= max_id:
+                db.session.commit()
+                break
+            
+            upper = min(max_id, lower + batch_size)
+            
+            try:
+                rows = RollupService._to_rows(
+                    RollupService._hourly_query(
+                        Reading.id > lower,
+                        Reading.id <= upper
+                    ).all()
+                )
+                RollupService._upsert(rows, increment=True)
+                PeakPredictionService.apply(rows)
+                
+                watermark.last_reading_id = upper
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            
+            processed += sum(row['total_readings'] for row in rows)
+            upserted += len(rows)
+        
+        return {
+            'readings_processed': processed,
+            'rows_upserted': upserted,
+            'watermark': lower
+        }
+    
+    @staticmethod
+    def rebuild(start_date: date, end_date: date) -> Dict[str, Any]:
+        """
+        Recalcula as linhas por sensor/hora de um intervalo de datas
+        
+        Apaga as linhas por sensor do intervalo e as recria a partir das
+        leituras já cobertas pela marca d'água (as demais serão somadas
+        pelo próximo catch_up). Idempotente.
+        
+        Args:
+            start_date: Data inicial (UTC, inclusiva)
+            end_date: Data final (UTC, inclusiva)
+        
+        Returns:
+            Dict: Linhas removidas e recriadas
+        """
+        if end_date < start_date:
+            raise ValueError('Data final anterior à data inicial')
+        
+        start = datetime.combine(start_date, datetime.min.time())
+        
+        # Leituras arquivadas não estão mais no banco: recalcular apagaria os totais
+        horizon = ArchiveService.horizon()
+        if horizon is not None and start < horizon:
+            raise ValueError(f'Leituras anteriores a {horizon.date()} estão arquivadas')
+        
+        end = datetime.combine(end_date + timedelta(days=1), datetime.min.time())
+        
+        try:
+            # Trava a marca d'água: catch_up concorrente espera o rebuild
+            watermark = RollupWatermark.acquire(RollupService.WATERMARK)
+            
+            deleted = Statistics.query.filter(
+                Statistics.date >= start_date,
+                Statistics.date <= end_date,
+                Statistics.sensor_id.isnot(None)
+            ).delete(synchronize_session=False)
+            
+            rows = RollupService._to_rows(
+                RollupService._hourly_query(
+                    Reading.timestamp >= start,
+                    Reading.timestamp < end,
+                    Reading.id <= watermark.last_reading_id
+                ).all()
+            )
+            RollupService._upsert(rows, increment=False)
+            
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        
+        logger.info(f"Rollup recalculado de {start_date} a {end_date}: {len(rows)} linhas")
+        
+        return {
+            'start_date': start_date.isoformat(),
+            'end_date': end_date.isoformat(),
+            'rows_deleted': deleted,
+            'rows_upserted': len(rows)
+        }
@@ -0,0 +1,156 @@
+"""
+Registro de Sensores em memória
+Cache serial_number → (id, protocolo, localização) para o caminho de ingestão
+"""
+
+import time
+from collections import namedtuple
+from threading import Lock
+from typing import Dict, Iterable, Optional, Tuple
+from flask import current_app
+from app import db
+from app.models.sensor import Sensor
+
+
+SensorInfo = namedtuple('SensorInfo', ['id', 'protocol', 'location'])
+
+
+class SensorRegistry:
+    """
+    Cache local ao processo dos sensores cadastrados
+    
+    A tabela sensors é carregada inteira de uma vez e mantida em memória
+    até expirar o TTL (SENSOR_REGISTRY_TTL) ou até `invalidate()` ser
+    chamado pelas rotas que criam, alteram ou removem sensores. Um serial
+    desconhecido força um recarregamento, limitado a um a cada
+    `miss_reload_interval` segundos para não transformar mensagens de
+    sensores não cadastrados em uma query por mensagem.
+    """
+    
+    def __init__(self, ttl: Optional[int] = None, miss_reload_interval: float = 10.0):
+        """
+        Inicializa o registro (vazio até a primeira consulta)
+        
+        Args:
+            ttl: Tempo de vida do cache em segundos (padrão: SENSOR_REGISTRY_TTL)
+            miss_reload_interval: Intervalo mínimo entre recargas por serial desconhecido
+        """
+        self._ttl = ttl
+        self.miss_reload_interval = miss_reload_interval
+        
+        self._by_serial: Dict[str, SensorInfo] = {}
+        self._loaded_at: Optional[float] = None
+        self._version = 0
+        self._lock = Lock()
+    
+    @property
+    def ttl(self) -> int:
+        """TTL efetivo em segundos"""
+        if self._ttl is not None:
+            return self._ttl
+        return current_app.config.get('SENSOR_REGISTRY_TTL', 300)
+    
+    def _is_expired(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at >= self.ttl
+    
+    def _load(self) -> None:
+        """Carrega todos os sensores com uma única query"""
+        results = db.session.query(
+            Sensor.serial_number,
+            Sensor.id,
+            Sensor.protocol,
+            Sensor.location
+        ).all()
+        
+        self._by_serial = {
+            serial: SensorInfo(sensor_id, protocol, location)
+            for serial, sensor_id, protocol, location in results
+        }
+        self._loaded_at = time.monotonic()
+        self._version += 1
+    
+    def _ensure_loaded(self) -> None:
+        with self._lock:
+            if self._is_expired():
+                self._load()
+    
+    def _reload_on_miss(self) -> bool:
+        """Recarrega após serial desconhecido, respeitando o intervalo mínimo"""
+        with self._lock:
+            if self._loaded_at is not None and \
+                    time.monotonic() - self._loaded_at < self.miss_reload_interval:
+                return False
+            self._load()
+            return True
+    
+    def get(self, serial_number: str) -> Optional[SensorInfo]:
+        """
+        Busca um sensor pelo serial number
+        
+        Args:
+            serial_number: Número de série do sensor
+        
+        Returns:
+            SensorInfo: (id, protocol, location) ou None se não cadastrado
+        """
+        self._ensure_loaded()
+        
+        info = self._by_serial.get(serial_number)
+        if info is None and self._reload_on_miss():
+            info = self._by_serial.get(serial_number)
+        
+        return info
+    
+    def get_id(self, serial_number: str) -> Optional[int]:
+        """
+        Busca apenas o ID do sensor
+        
+        Args:
+            serial_number: Número de série do sensor
+        
+        Returns:
+            int: ID do sensor ou None
+        """
+        info = self.get(serial_number)
+        return info.id if info else None
+    
+    def resolve(self, serial_numbers: Iterable[str]) -> Dict[str, SensorInfo]:
+        """
+        Resolve vários serial numbers de uma vez (no máximo uma recarga)
+        
+        Args:
+            serial_numbers: Números de série
+        
+        Returns:
+            Dict[str, SensorInfo]: Apenas os seriais encontrados
+        """
+        self._ensure_loaded()
+        
+        serials = {s for s in serial_numbers if s}
+        if not serials.issubset(self._by_serial):
+            self._reload_on_miss()
+        
+        return {s: self._by_serial[s] for s in serials if s in self._by_serial}
+    
+    def snapshot(self) -> Tuple[int, Dict[str, SensorInfo]]:
+        """
+        Retorna todos os sensores cadastrados e a versão da carga
+        
+        A versão muda a cada recarga da tabela sensors; caches derivados
+        (ex.: índice de áreas) a usam para saber quando se atualizar.
+        
+        Returns:
+            Tuple: (versão, serial_number → SensorInfo)
+        """
+        self._ensure_loaded()
+        with self._lock:
+            return self._version, dict(self._by_serial)
+    
+    def invalidate(self) -> None:
+        """Descarta o cache; a próxima consulta recarrega a tabela sensors"""
+        with self._lock:
+            self._loaded_at = None
+
+
+# Instância compartilhada pelo processo
+sensor_registry = SensorRegistry()
@@ -7,6 +7,7 @@ from typing import Optional, List
 from app import db
 from app.models.sensor import Sensor
 from app.schemas.sensor_schema import SensorSchema
+from app.services.sensor_registry import sensor_registry
 
 
 class SensorService:
@@ -95,6 +96,7 @@ class SensorService:
         sensor = Sensor(**data)
         db.session.add(sensor)
         db.session.commit()
+        sensor_registry.invalidate()
         
         return sensor
     
@@ -121,6 +123,7 @@ class SensorService:
                 setattr(sensor, key, value)
         
         db.session.commit()
+        sensor_registry.invalidate()
         return sensor
     
     @staticmethod
@@ -137,6 +140,7 @@ class SensorService:
         sensor = SensorService.get_sensor_by_id(sensor_id)
         db.session.delete(sensor)
         db.session.commit()
+        sensor_registry.invalidate()
     
     @staticmethod
     def get_protocols() -> List[str]:
@@ -0,0 +1,233 @@
+"""
+Contadores de Sensores com gravação adiada (write-behind)
+Agrega total_readings, last_reading_at, battery_level e signal_strength
+em memória e grava um UPDATE por sensor a cada intervalo
+"""
+
+import atexit
+import logging
+import time
+from datetime import datetime
+from threading import Lock, Thread
+from typing import Dict, Optional
+from flask import current_app, has_app_context
+from app import db
+from app.models.sensor import Sensor
+
+
+logger = logging.getLogger(__name__)
+
+
+class SensorStatsAggregator:
+    """
+    Acumulador de deltas por sensor
+    
+    Cada leitura apenas atualiza um dicionário em memória. `maybe_flush()`
+    grava os deltas acumulados quando o intervalo
+    (SENSOR_STATS_FLUSH_INTERVAL_MS) expira, com um único UPDATE por
+    sensor, evitando o lock da linha do sensor a cada leitura.
+    
+    Enquanto houver deltas pendentes, uma thread própria chama
+    `maybe_flush()` a cada intervalo, então sensores que param de enviar
+    leituras também são gravados; ao encerrar o processo, os deltas
+    restantes são gravados por um handler atexit. Deltas ainda não
+    gravados só se perdem se o processo for morto; os contadores são
+    informativos e podem ser recalculados a partir da tabela readings.
+    """
+    
+    def __init__(self, flush_interval_ms: Optional[int] = None):
+        """
+        Inicializa o acumulador
+        
+        Args:
+            flush_interval_ms: Intervalo entre gravações (padrão: SENSOR_STATS_FLUSH_INTERVAL_MS)
+        """
+        self._flush_interval_ms = flush_interval_ms
+        
+        self._deltas: Dict[int, dict] = {}
+        self._lock = Lock()
+        self._last_flush = time.monotonic()
+        
+        self._thread: Optional[Thread] = None
+        self._app = None
+    
+    @property
+    def flush_interval(self) -> float:
+        """Intervalo efetivo em segundos"""
+        if self._flush_interval_ms is not None:
+            return self._flush_interval_ms / 1000.0
+        return current_app.config.get('SENSOR_STATS_FLUSH_INTERVAL_MS', 5000) / 1000.0
+    
+    def record(
+        self,
+        sensor_id: int,
+        timestamp: datetime,
+        count: int = 1,
+        battery_level: Optional[float] = None,
+        signal_strength: Optional[float] = None
+    ) -> None:
+        """
+        Registra leitura(s) de um sensor
+        
+        Args:
+            sensor_id: ID do sensor
+            timestamp: Timestamp da leitura mais recente
+            count: Número de leituras
+            battery_level: Último nível de bateria (opcional)
+            signal_strength: Último sinal (opcional)
+        """
+        with self._lock:
+            delta = self._deltas.get(sensor_id)
+            if delta is None:
+                delta = self._deltas[sensor_id] = {
+                    'count': 0,
+                    'last_reading_at': timestamp
+                }
+            
+            delta['count'] += count
+            if timestamp > delta['last_reading_at']:
+                delta['last_reading_at'] = timestamp
+            if battery_level is not None:
+                delta['battery_level'] = battery_level
+            if signal_strength is not None:
+                delta['signal_strength'] = signal_strength
+            
+            self._schedule()
+    
+    def _schedule(self) -> None:
+        """Inicia a thread de gravação periódica (chamado com o lock)"""
+        if self._thread is not None or not has_app_context():
+            return
+        
+        if self._app is None:
+            atexit.register(self._flush_at_exit)
+        self._app = current_app._get_current_object()
+        
+        self._thread = Thread(target=self._run, args=(self._app,), daemon=True)
+        self._thread.start()
+    
+    def _run(self, app) -> None:
+        """Grava os deltas a cada intervalo enquanto houver pendências"""
+        with app.app_context():
+            while True:
+                time.sleep(self.flush_interval)
+                
+                try:
+                    self.maybe_flush()
+                except Exception as e:
+                    logger.error(f"Erro na gravação periódica de contadores: {e}", exc_info=True)
+                finally:
+                    db.session.remove()
+                
+                with self._lock:
+                    if not self._deltas:
+                        self._thread = None
+                        return
+    
+    def _flush_at_exit(self) -> None:
+        """Grava os deltas restantes no encerramento do processo"""
+        if self._app is None or not self.pending():
+            return
+        
+        with self._app.app_context():
+            self.flush()
+    
+    def record_rows(self, rows) -> None:
+        """
+        Registra leituras a partir dos valores de coluna do INSERT
+        
+        Args:
+            rows: Valores das leituras (ver Reading.row_from_mqtt)
+        """
+        for row in rows:
+            metadata = row.get('sensor_metadata') or {}
+            self.record(
+                row['sensor_id'],
+                row['timestamp'],
+                battery_level=metadata.get('battery_level'),
+                signal_strength=metadata.get('rssi_dbm', metadata.get('signal_strength'))
+            )
+    
+    def pending(self) -> int:
+        """Retorna o número de sensores com deltas não gravados"""
+        with self._lock:
+            return len(self._deltas)
+    
+    def maybe_flush(self) -> int:
+        """
+        Grava os deltas se o intervalo expirou
+        
+        Returns:
+            int: Número de sensores atualizados
+        """
+        with self._lock:
+            if not self._deltas or time.monotonic() - self._last_flush < self.flush_interval:
+                return 0
+        
+        return self.flush()
+    
+    def flush(self) -> int:
+        """
+        Grava todos os deltas pendentes (um UPDATE por sensor) e faz commit
+        
+        Deve ser chamado dentro de um app context. Em caso de erro os
+        deltas voltam para o acumulador.
+        
+        Returns:
+            int: Número de sensores atualizados
+        """
+        with self._lock:
+            deltas = self._deltas
+            self._deltas = {}
+            self._last_flush = time.monotonic()
+        
+        if not deltas:
+            return 0
+        
+        try:
+            now = datetime.utcnow()
+            for sensor_id, delta in deltas.items():
+                values = {
+                    'total_readings': db.func.coalesce(Sensor.total_readings, 0) + delta['count'],
+                    'last_reading_at': delta['last_reading_at'],
+                    'updated_at': now
+                }
+                if 'battery_level' in delta:
+                    values['battery_level'] = delta['battery_level']
+                if 'signal_strength' in delta:
+                    values['signal_strength'] = delta['signal_strength']
+                
+                db.session.execute(
+                    Sensor.__table__.update()
+                    .where(Sensor.id == sensor_id)
+                    .values(**values)
+                )
+            
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Erro ao gravar contadores de sensores: {e}", exc_info=True)
+            self._restore(deltas)
+            return 0
+        
+        return len(deltas)
+    
+    def _restore(self, deltas: Dict[int, dict]) -> None:
+        """Devolve deltas não gravados ao acumulador sem sobrescrever os mais novos"""
+        with self._lock:
+            for sensor_id, delta in deltas.items():
+                current = self._deltas.get(sensor_id)
+                if current is None:
+                    self._deltas[sensor_id] = delta
+                    continue
+                
+                current['count'] += delta['count']
+                if delta['last_reading_at'] > current['last_reading_at']:
+                    current['last_reading_at'] = delta['last_reading_at']
+                for key in ('battery_level', 'signal_strength'):
+                    if key in delta:
+                        current.setdefault(key, delta[key])
+
+
+# Instância compartilhada pelo processo
+sensor_stats = SensorStatsAggregator()
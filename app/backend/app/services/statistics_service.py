@@ -5,10 +5,13 @@ Lógica de negócio relacionada a estatísticas e relatórios
 
 from datetime import datetime, timedelta
 from typing import Dict, Any
-from sqlalchemy import func
+from sqlalchemy import func, case, text, literal_column
 from app import db
 from app.models.reading import Reading
 from app.models.sensor import Sensor
+from app.services.occupancy_service import occupancy
+from app.services.areas import area_index
+from occupancy_counter import ENTRY, EXIT
 
 
 class StatisticsService:
@@ -89,31 +92,44 @@ class StatisticsService:
         time_range, interval = period_map[period]
         start_date = datetime.utcnow() - time_range
         
-        # Query base
-        query = Reading.query.filter(Reading.timestamp >= start_date)
+        # Filtros base
+        filters = [Reading.timestamp >= start_date]
         
         if sensor_id:
-            query = query.filter_by(sensor_id=sensor_id)
+            filters.append(Reading.sensor_id == sensor_id)
         
-        # Contar atividades
-        total_detections = query.filter(Reading.activity == 1).count()
-        total_readings = query.count()
+        # Contar leituras e detecções em uma única query
+        total_readings, total_detections = db.session.query(
+            func.count(Reading.id),
+            func.sum(case((Reading.activity == 1, 1), else_=0))
+        ).filter(*filters).one()
+        total_readings = total_readings or 0
+        total_detections = int(total_detections or 0)
         
-        # Atividade por intervalo
-        readings = query.all()
+        # Detecções por intervalo: índice do intervalo calculado no banco
+        # (segundos desde start_date / tamanho do intervalo)
+        bucket = func.floor(
+            func.timestampdiff(text('SECOND'), start_date, Reading.timestamp)
+            / int(interval.total_seconds())
+        ).label('bucket')
+        
+        bucket_counts = {
+            int(index): count
+            for index, count in db.session.query(bucket, func.count(Reading.id))
+            .filter(*filters, Reading.activity == 1)
+            .group_by(literal_column('bucket'))
+            .all()
+        }
         
         activity_timeline = {}
         current = start_date
         end = datetime.utcnow()
+        index = 0
         
         while current <= end:
-            next_interval = current + interval
-            count = len([
-                r for r in readings 
-                if current <= r.timestamp < next_interval and r.activity == 1
-            ])
-            activity_timeline[current.isoformat()] = count
-            current = next_interval
+            activity_timeline[current.isoformat()] = bucket_counts.get(index, 0)
+            current += interval
+            index += 1
         
         return {
             'period': period,
@@ -128,44 +144,100 @@ class StatisticsService:
         }
     
     @staticmethod
-    def get_sensors_stats() -> Dict[str, Any]:
+    def count_by_hour(start: datetime, *filters) -> Dict[datetime, int]:
+        """
+        Contar leituras por hora (UTC) a partir de start, agrupando no banco
+        
+        Args:
+            start: Início do período (UTC, naive)
+            *filters: Filtros adicionais sobre Reading
+        
+        Returns:
+            Dict[datetime, int]: Início de cada hora UTC → número de leituras
+        """
+        hour_start = start.replace(minute=0, second=0, microsecond=0)
+        
+        bucket = func.floor(
+            func.timestampdiff(text('SECOND'), hour_start, Reading.timestamp) / 3600
+        ).label('bucket')
+        
+        results = db.session.query(bucket, func.count(Reading.id))\
+            .filter(Reading.timestamp >= start, *filters)\
+            .group_by(literal_column('bucket'))\
+            .all()
+        
+        return {
+            hour_start + timedelta(hours=int(index)): count
+            for index, count in results
+        }
+    
+    @staticmethod
+    def get_sensors_stats(include_battery: bool = False) -> Dict[str, Any]:
         """
         Obter estatísticas por sensor
         
+        Uma única query: as leituras são agregadas por sensor_id
+        (COUNT, SUM(activity), MAX(timestamp)) e unidas à tabela sensors,
+        independente do número de sensores.
+        
+        Args:
+            include_battery: Incluir a média de bateria das leituras
+            
         Returns:
             Dict: Estatísticas individuais dos sensores
         """
-        sensors = Sensor.query.all()
+        aggregates = [
+            Reading.sensor_id.label('sensor_id'),
+            func.count(Reading.id).label('total_readings'),
+            func.sum(Reading.activity).label('detections'),
+            func.max(Reading.timestamp).label('last_reading')
+        ]
+        
+        if include_battery:
+            aggregates.append(
+                func.avg(Reading.sensor_metadata['battery_level'].as_float()).label('avg_battery')
+            )
+        
+        reading_stats = db.session.query(*aggregates)\
+            .group_by(Reading.sensor_id)\
+            .subquery()
+        
+        results = db.session.query(
+            Sensor.id,
+            Sensor.serial_number,
+            Sensor.protocol,
+            Sensor.location,
+            Sensor.status,
+            Sensor.battery_level,
+            reading_stats
+        ).outerjoin(
+            reading_stats, reading_stats.c.sensor_id == Sensor.id
+        ).order_by(Sensor.id).all()
         
         stats = []
-        for sensor in sensors:
-            # Leituras totais
-            total_readings = Reading.query.filter_by(sensor_id=sensor.id).count()
-            
-            # Detecções
-            detections = Reading.query.filter_by(
-                sensor_id=sensor.id,
-                activity=1
-            ).count()
-            
-            # Última leitura
-            last_reading = Reading.query.filter_by(sensor_id=sensor.id)\
-                .order_by(Reading.timestamp.desc()).first()
+        for row in results:
+            total_readings = row.total_readings or 0
+            detections = int(row.detections or 0)
             
-            stats.append({
-                'sensor_id': sensor.id,
-                'serial_number': sensor.serial_number,
-                'protocol': sensor.protocol,
-                'location': sensor.location,
-                'status': sensor.status,
+            item = {
+                'sensor_id': row.id,
+                'serial_number': row.serial_number,
+                'protocol': row.protocol,
+                'location': row.location,
+                'status': row.status,
                 'total_readings': total_readings,
                 'total_detections': detections,
                 'detection_rate': round(
                     (detections / total_readings * 100), 2
                 ) if total_readings > 0 else 0,
-                'last_reading': last_reading.timestamp.isoformat() if last_reading else None,
-                'current_battery_level': sensor.battery_level
-            })
+                'last_reading': row.last_reading.isoformat() if row.last_reading else None
+            }
+            
+            if include_battery:
+                item['avg_battery_level'] = round(row.avg_battery, 2) if row.avg_battery else None
+            
+            item['current_battery_level'] = row.battery_level
+            stats.append(item)
         
         return {
             'count': len(stats),
@@ -177,44 +249,39 @@ class StatisticsService:
         """
         Obter estatísticas de capacidade
         
+        A ocupação atual e entries_today/exits_today vêm dos contadores
+        do dia mantidos em memória (desde a meia-noite de Brasília).
+        entries_24h/exits_24h mantêm o significado original: detecções
+        nos sensores de entrada/saída nas últimas 24h, agora em uma única
+        query agrupada por sensor.
+        
         Args:
             max_capacity: Capacidade máxima do parque
             
         Returns:
             Dict: Estatísticas de capacidade
         """
-        yesterday = datetime.utcnow() - timedelta(days=1)
+        state = occupancy.snapshot()
+        
+        # Entradas/saídas das últimas 24h (sensores de entrada e de saída)
+        directions = area_index.sensor_directions()
+        totals = {ENTRY: 0, EXIT: 0}
+        
+        if directions:
+            rows = db.session.query(
+                Reading.sensor_id,
+                func.count(Reading.id)
+            ).filter(
+                Reading.timestamp >= datetime.utcnow() - timedelta(days=1),
+                Reading.activity == 1,
+                Reading.sensor_id.in_(list(directions))
+            ).group_by(Reading.sensor_id).all()
+            
+            for sensor_id, count in rows:
+                totals[directions[sensor_id]] += count
         
-        # Entradas
-        entries_sensors = Sensor.query.filter(
-            Sensor.location.ilike('%entrada%')
-        ).all()
-        
-        total_entries = sum([
-            Reading.query.filter(
-                Reading.sensor_id == sensor.id,
-                Reading.timestamp >= yesterday,
-                Reading.activity == 1
-            ).count()
-            for sensor in entries_sensors
-        ])
-        
-        # Saídas
-        exits_sensors = Sensor.query.filter(
-            Sensor.location.ilike('%saída%')
-        ).all()
-        
-        total_exits = sum([
-            Reading.query.filter(
-                Reading.sensor_id == sensor.id,
-                Reading.timestamp >= yesterday,
-                Reading.activity == 1
-            ).count()
-            for sensor in exits_sensors
-        ])
-        
-        # Ocupação estimada
-        current_occupation = max(0, total_entries - total_exits)
+        # Ocupação atual
+        current_occupation = state['current']
         occupation_percentage = round((current_occupation / max_capacity * 100), 2)
         
         # Status
@@ -230,7 +297,10 @@ class StatisticsService:
             'current_occupation': current_occupation,
             'occupation_percentage': occupation_percentage,
             'status': status,
-            'entries_24h': total_entries,
-            'exits_24h': total_exits,
+            'entries_24h': totals[ENTRY],
+            'exits_24h': totals[EXIT],
+            'entries_today': state['entries'],
+            'exits_today': state['exits'],
+            'areas': state['areas'],
             'timestamp': datetime.utcnow().isoformat()
         }
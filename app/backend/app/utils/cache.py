@@ -0,0 +1,301 @@
+"""
+Cache de respostas
+Cache em memória (ou Redis, opcional) para endpoints públicos de leitura
+"""
+
+import json
+import logging
+import time
+from functools import wraps
+from threading import Event, Lock
+from typing import Any, Callable, Dict, Optional, Tuple
+from flask import request, make_response
+
+try:
+    import redis
+except ImportError:  # Redis é opcional
+    redis = None
+
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryCacheBackend:
+    """Backend em memória (local ao processo)"""
+    
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._data: Dict[str, Tuple[float, Any]] = {}
+        self._generation = 0
+        self._lock = Lock()
+    
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            return value
+    
+    def set(self, key: str, value: Any, ttl: int) -> None:
+        with self._lock:
+            if len(self._data) >= self.max_entries:
+                self._purge_expired()
+            self._data[key] = (time.monotonic() + ttl, value)
+    
+    def _purge_expired(self) -> None:
+        now = time.monotonic()
+        for key in [k for k, (expires_at, _) in self._data.items() if expires_at <= now]:
+            del self._data[key]
+        # Ainda cheio: descartar as entradas mais antigas
+        while len(self._data) >= self.max_entries:
+            del self._data[next(iter(self._data))]
+    
+    def generation(self) -> int:
+        return self._generation
+    
+    def bump_generation(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._data.clear()
+    
+    def acquire_lock(self, key: str, timeout: float) -> bool:
+        # Single-flight entre threads já é feito pelo ResponseCache
+        return True
+    
+    def release_lock(self, key: str) -> None:
+        pass
+
+
+class RedisCacheBackend:
+    """Backend Redis (compartilhado entre processos e workers)"""
+    
+    def __init__(self, client, prefix: str = 'cache'):
+        self.client = client
+        self.prefix = prefix
+    
+    def _key(self, key: str) -> str:
+        return f'{self.prefix}:{key}'
+    
+    def get(self, key: str) -> Optional[Any]:
+        raw = self.client.get(self._key(key))
+        return json.loads(raw) if raw is not None else None
+    
+    def set(self, key: str, value: Any, ttl: int) -> None:
+        self.client.set(self._key(key), json.dumps(value), ex=max(1, int(ttl)))
+    
+    def generation(self) -> int:
+        return int(self.client.get(self._key('generation')) or 0)
+    
+    def bump_generation(self) -> None:
+        self.client.incr(self._key('generation'))
+    
+    def acquire_lock(self, key: str, timeout: float) -> bool:
+        return bool(self.client.set(
+            self._key(f'lock:{key}'), 1, nx=True, px=int(timeout * 1000)
+        ))
+    
+    def release_lock(self, key: str) -> None:
+        self.client.delete(self._key(f'lock:{key}'))
+
+
+class ResponseCache:
+    """
+    Cache de respostas com chave por endpoint e janela de tempo
+    
+    A chave combina a view, query string, janela de tempo
+    (time() // ttl) e uma geração que `invalidate()` incrementa. Todas
+    as telas que consultam o mesmo endpoint na mesma janela recebem a
+    mesma resposta, calculada uma única vez: requisições concorrentes
+    para uma chave ausente aguardam o cálculo da primeira (single-flight).
+    
+    Configuração (app.config):
+        RESPONSE_CACHE_BACKEND: 'memory' (padrão) ou 'redis'
+        RESPONSE_CACHE_TTL: TTL padrão em segundos (0 desativa o cache)
+        RESPONSE_CACHE_INVALIDATE_ON_INGEST: invalidar ao gravar leituras
+            (entre processos só com o backend redis: o worker de ingestão
+            incrementa a geração compartilhada que a API consulta)
+    
+    Usage:
+        @bp.route('/current-stats')
+        @cache.cached_response()
+        def get_current_stats():
+            ...
+    """
+    
+    def __init__(self, app=None):
+        self.backend = MemoryCacheBackend()
+        self.default_ttl = 15
+        self.flight_timeout = 10.0
+        
+        self._flights: Dict[str, Event] = {}
+        self._flights_lock = Lock()
+        
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app) -> None:
+        """
+        Configura o backend a partir de app.config
+        
+        Args:
+            app: Aplicação Flask
+        """
+        self.default_ttl = app.config.get('RESPONSE_CACHE_TTL', 15)
+        backend = app.config.get('RESPONSE_CACHE_BACKEND', 'memory')
+        
+        if backend == 'redis':
+            if redis is None:
+                app.logger.warning("Pacote redis não instalado: usando cache em memória")
+                self.backend = MemoryCacheBackend()
+            else:
+                client = redis.Redis(
+                    host=app.config.get('REDIS_HOST', 'localhost'),
+                    port=app.config.get('REDIS_PORT', 6379),
+                    db=app.config.get('REDIS_DB', 0)
+                )
+                self.backend = RedisCacheBackend(client, prefix='ceu:response_cache')
+        else:
+            self.backend = MemoryCacheBackend()
+        
+        if app.config.get('RESPONSE_CACHE_INVALIDATE_ON_INGEST', False):
+            if isinstance(self.backend, MemoryCacheBackend):
+                # O worker MQTT (`flask ingest`) roda em outro processo: com
+                # cache em memória ele só invalida o próprio cache, e a API
+                # continua servindo respostas até o TTL expirar
+                app.logger.warning(
+                    "RESPONSE_CACHE_INVALIDATE_ON_INGEST exige RESPONSE_CACHE_BACKEND=redis: "
+                    "com cache em memória só leituras gravadas por este processo invalidam o cache"
+                )
+            
+            from app.services.ingestion_service import IngestionService
+            IngestionService.register_listener(_invalidate_on_ingest)
+    
+    def invalidate(self) -> None:
+        """Invalida todas as respostas em cache"""
+        try:
+            self.backend.bump_generation()
+        except Exception as e:
+            logger.warning(f"Erro ao invalidar cache: {e}")
+    
+    def _build_key(self, endpoint: str, ttl: int) -> str:
+        query = '&'.join(f'{k}={v}' for k, v in sorted(request.args.items(multi=True)))
+        bucket = int(time.time() // ttl)
+        return f'{endpoint}?{query}:{bucket}:{self.backend.generation()}'
+    
+    def get_or_compute(self, key: str, ttl: int, compute: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Busca a chave ou calcula o valor uma única vez (single-flight)
+        
+        Args:
+            key: Chave do cache
+            ttl: Tempo de vida em segundos
+            compute: Função que retorna (valor, cacheável)
+        
+        Returns:
+            Tuple: (valor, True se veio do cache)
+        """
+        value = self.backend.get(key)
+        if value is not None:
+            return value, True
+        
+        with self._flights_lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = Event()
+        
+        if not leader:
+            # Outra thread já está calculando: aguardar o resultado
+            flight.wait(self.flight_timeout)
+            value = self.backend.get(key)
+            if value is not None:
+                return value, True
+            value, _ = compute()
+            return value, False
+        
+        try:
+            # Entre processos (Redis): quem não obtém o lock aguarda o valor
+            if not self.backend.acquire_lock(key, self.flight_timeout):
+                deadline = time.monotonic() + self.flight_timeout
+                while time.monotonic() < deadline:
+                    time.sleep(0.05)
+                    value = self.backend.get(key)
+                    if value is not None:
+                        return value, True
+            
+            try:
+                value, cacheable = compute()
+                if cacheable:
+                    self.backend.set(key, value, ttl)
+            finally:
+                self.backend.release_lock(key)
+            
+            return value, False
+        finally:
+            with self._flights_lock:
+                self._flights.pop(key, None)
+            flight.set()
+    
+    def cached_response(self, ttl: Optional[int] = None):
+        """
+        Decorator que cacheia respostas JSON 200 de uma view
+        
+        Args:
+            ttl: Tempo de vida em segundos (padrão: RESPONSE_CACHE_TTL)
+        """
+        def decorator(f):
+            # Chave pela view (e não pelo path): a view pode ser chamada
+            # diretamente por outra rota, ex.: snapshot do stream SSE
+            endpoint = f'{f.__module__}.{f.__name__}'
+            
+            @wraps(f)
+            def wrapper(*args, **kwargs):
+                effective_ttl = ttl if ttl is not None else self.default_ttl
+                if not effective_ttl:
+                    return f(*args, **kwargs)
+                
+                computed = {}
+                
+                def compute():
+                    computed['started'] = True
+                    response = make_response(f(*args, **kwargs))
+                    cacheable = response.status_code == 200 and response.is_json
+                    computed['value'] = {
+                        'body': response.get_data(as_text=True),
+                        'status': response.status_code,
+                        'mimetype': response.mimetype
+                    }
+                    return computed['value'], cacheable
+                
+                try:
+                    key = self._build_key(endpoint, effective_ttl)
+                    value, hit = self.get_or_compute(key, effective_ttl, compute)
+                except Exception as e:
+                    if computed.get('started') and 'value' not in computed:
+                        # Erro da própria view, não do cache
+                        raise
+                    # Falha no backend (ex.: Redis fora do ar) não derruba o endpoint
+                    logger.warning(f"Cache indisponível: {e}")
+                    value = computed['value'] if 'value' in computed else compute()[0]
+                    hit = False
+                
+                response = make_response(value['body'], value['status'])
+                response.mimetype = value['mimetype']
+                response.headers['X-Cache'] = 'HIT' if hit else 'MISS'
+                return response
+            
+            return wrapper
+        return decorator
+
+
+# Instância compartilhada (configurada em create_app)
+cache = ResponseCache()
+
+
+def _invalidate_on_ingest(rows) -> None:
+    """Listener de ingestão: novas leituras invalidam o cache"""
+    cache.invalidate()
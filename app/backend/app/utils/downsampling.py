@@ -0,0 +1,61 @@
+"""
+Redução de séries temporais para gráficos
+Largest-Triangle-Three-Buckets (LTTB) com NumPy
+"""
+
+import numpy as np
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Seleciona `threshold` pontos representativos de uma série (LTTB)
+    
+    Divide os pontos internos em threshold - 2 faixas de mesmo tamanho e,
+    em cada faixa, mantém o ponto que forma o maior triângulo com o ponto
+    escolhido na faixa anterior e a média da faixa seguinte. O primeiro e
+    o último ponto são sempre mantidos, então o período inteiro fica
+    coberto e picos e vales são preservados. As áreas de cada faixa são
+    calculadas de forma vetorizada; o laço é só sobre as faixas.
+    
+    Args:
+        x: Eixo x crescente (ex.: segundos desde a época)
+        y: Valores
+        threshold: Número de pontos desejado
+    
+    Returns:
+        np.ndarray: Índices dos pontos escolhidos, em ordem crescente
+    """
+    n = len(x)
+    if threshold >= n:
+        return np.arange(n)
+    if threshold < 3:
+        return np.array([0, n - 1][:max(threshold, 0)], dtype=np.int64)
+    
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    
+    # Limites das faixas sobre os pontos internos [1, n - 1)
+    every = (n - 2) / (threshold - 2)
+    bounds = (np.arange(threshold - 1) * every).astype(np.int64) + 1
+    bounds[-1] = n - 1
+    
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    
+    a = 0
+    for i in range(threshold - 2):
+        start, end = bounds[i], bounds[i + 1]
+        next_end = bounds[i + 2] if i + 2 < len(bounds) else n
+        
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    
+    return selected
@@ -0,0 +1,104 @@
+"""
+Paginação por cursor (keyset)
+Cursores opacos para listagens ordenadas por colunas + id
+"""
+
+import base64
+import json
+from datetime import date, datetime, time
+from typing import Any, List, Sequence
+from sqlalchemy import and_, or_
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    if isinstance(value, date):
+        return {'d': value.isoformat()}
+    if isinstance(value, time):
+        return {'t': value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any, expected: type) -> Any:
+    try:
+        if isinstance(value, dict):
+            if 'dt' in value:
+                value = datetime.fromisoformat(value['dt'])
+            elif 'd' in value:
+                value = date.fromisoformat(value['d'])
+            elif 't' in value:
+                value = time.fromisoformat(value['t'])
+    except (ValueError, TypeError) as e:
+        raise ValueError('Valor de cursor inválido') from e
+    
+    # bool é subclasse de int; date não deve passar por datetime e vice-versa
+    if type(value) is bool or not isinstance(value, expected) or \
+            (expected is date and isinstance(value, datetime)):
+        raise ValueError('Valor de cursor inválido')
+    return value
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """
+    Gera um cursor opaco a partir dos valores de ordenação do último item
+    
+    Args:
+        values: Valores das colunas de ordenação (ex.: timestamp, id)
+    
+    Returns:
+        str: Cursor (base64 url-safe)
+    """
+    raw = json.dumps([_encode_value(v) for v in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, types: Sequence[type]) -> List[Any]:
+    """
+    Lê um cursor gerado por encode_cursor
+    
+    Os valores são conferidos contra os tipos das colunas de ordenação:
+    um cursor adulterado vira ValueError (400), não erro na query.
+    
+    Args:
+        cursor: Cursor recebido do cliente
+        types: Tipo esperado de cada valor (ex.: (datetime, int))
+    
+    Returns:
+        List: Valores de ordenação
+    
+    Raises:
+        ValueError: Cursor malformado
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError) as e:
+        raise ValueError('Cursor inválido') from e
+    
+    if not isinstance(values, list) or len(values) != len(types):
+        raise ValueError('Cursor inválido')
+    
+    return [_decode_value(v, expected) for v, expected in zip(values, types)]
+
+
+def keyset_before(columns: Sequence[Any], values: Sequence[Any]):
+    """
+    Condição "linha anterior ao cursor" para ordenação decrescente
+    
+    Expande (a, b, c) < (va, vb, vc) em a <= va AND (a < va OR ...),
+    forma que o MySQL resolve como um único range no índice das colunas
+    de ordenação.
+    
+    Args:
+        columns: Colunas de ordenação (a última deve ser única, ex.: id)
+        values: Valores do cursor
+    
+    Returns:
+        Expressão SQLAlchemy
+    """
+    clauses = []
+    for i, column in enumerate(columns):
+        equals = [columns[j] == values[j] for j in range(i)]
+        clauses.append(and_(*equals, column < values[i]))
+    return and_(columns[0] <= values[0], or_(*clauses))
@@ -6,6 +6,8 @@ Script para limpar leituras existentes e repopular com timezone correto
 from app import create_app, db
 from app.models.reading import Reading
 from app.models.pool_reading import PoolReading
+from app.models.pool_latest import PoolLatest
+from app.models.pool_daily_temperature import PoolDailyTemperature
 
 def clear_and_repopulate():
     """Limpa todas as leituras do banco de dados"""
@@ -47,6 +49,8 @@ def clear_and_repopulate():
         # Limpar pool_readings
         if pool_readings_count > 0:
             PoolReading.query.delete()
+            PoolLatest.query.delete()
+            PoolDailyTemperature.query.delete()
             print(f'   ✅ {pool_readings_count} leituras de piscina removidas')
         
         # Commit
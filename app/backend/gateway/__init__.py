@@ -7,12 +7,14 @@ Este módulo gerencia a comunicação entre sensores e o broker MQTT.
 
 from .gateway import Gateway
 from .mqtt_client import MQTTClient
+from .topic_matcher import TopicTrie
 from .message_formatter import MessageFormatter
 from .config_loader import load_mqtt_config
 
 __all__ = [
     'Gateway',
     'MQTTClient',
+    'TopicTrie',
     'MessageFormatter',
     'load_mqtt_config'
 ]
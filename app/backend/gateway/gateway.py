@@ -15,11 +15,15 @@ import os
 
 # Adicionar path dos sensores
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+# Diretório do backend: occupancy_counter é importado pelo mesmo nome no
+# backend e no gateway (um único módulo por processo)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from sensores.base_sensor import BaseSensor
 from backend.gateway.mqtt_client import MQTTClient
 from backend.gateway.message_formatter import MessageFormatter
 from backend.gateway.config_loader import load_mqtt_config, get_topic
+from occupancy_counter import OccupancyCounter, direction
 
 
 class Gateway:
@@ -49,6 +53,9 @@ class Gateway:
         self.sensors: List[BaseSensor] = []
         self.sensor_readings_buffer = []
         
+        # Ocupação do dia (entradas - saídas, zera à meia-noite local)
+        self.occupancy = OccupancyCounter()
+        
         # Controle de threads
         self.running = False
         self.publish_thread: Optional[Thread] = None
@@ -132,6 +139,7 @@ class Gateway:
                 self.stats['readings_collected'] += 1
                 
                 if reading['activity'] == 1:
+                    self.record_occupancy(sensor)
                     self.logger.debug(
                         f"🚶 Detecção em {sensor.location} "
                         f"({sensor.protocol} - {sensor.serial_number})"
@@ -141,6 +149,19 @@ class Gateway:
                 self.stats['errors'] += 1
                 self.logger.error(f"❌ Erro ao coletar do sensor {sensor.serial_number}: {e}")
     
+    def record_occupancy(self, sensor: BaseSensor):
+        """
+        Conta uma detecção como entrada ou saída do parque.
+        
+        O sentido vem da localização do sensor ("Entrada ..." / "Saída ...").
+        Detecções em sensores internos (catracas, portões) não alteram a
+        ocupação, e activity 0 significa apenas "nada detectado".
+        
+        Args:
+            sensor: Sensor que detectou a passagem
+        """
+        self.occupancy.record(direction(sensor.location))
+    
     def publish_readings(self):
         """Publica leituras no broker MQTT."""
         if not self.sensor_readings_buffer:
@@ -200,24 +221,31 @@ class Gateway:
     def check_alerts(self):
         """Verifica e envia alertas se necessário."""
         try:
-            # Verificar capacidade do parque
-            total_detections = sum(s.total_detections for s in self.sensors)
+            # Verificar capacidade do parque (pessoas presentes agora)
+            state = self.occupancy.snapshot()
+            current_people = state['current']
             max_capacity = self.config['parque']['capacidade_maxima']
-            current_percentage = (total_detections / max_capacity) * 100
+            current_percentage = (current_people / max_capacity) * 100
+            alert_data = {
+                'current': current_people,
+                'entries_today': state['entries'],
+                'exits_today': state['exits'],
+                'max': max_capacity
+            }
             
             if current_percentage >= 80 and current_percentage < 90:
                 self.send_alert(
                     'capacity',
                     'medium',
                     f'Capacidade do parque em {current_percentage:.1f}%',
-                    {'current': total_detections, 'max': max_capacity}
+                    alert_data
                 )
             elif current_percentage >= 90:
                 self.send_alert(
                     'capacity',
                     'high',
                     f'Capacidade do parque CRÍTICA: {current_percentage:.1f}%',
-                    {'current': total_detections, 'max': max_capacity}
+                    alert_data
                 )
             
             # Verificar sensores offline (exemplo)
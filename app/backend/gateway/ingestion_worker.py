@@ -0,0 +1,226 @@
+"""
+Worker de Ingestão MQTT → MySQL
+Sistema de Controle de Acesso - CEU Tres Pontes
+
+Subscreve os tópicos dos sensores e grava as leituras na tabela
+readings em lotes (INSERT multi-linha a cada N mensagens ou M ms).
+"""
+
+import logging
+import time
+from typing import Dict, Any
+from threading import Thread, Event
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.gateway.mqtt_subscriber import MQTTSubscriber
+from app.services.ingestion_service import IngestionService
+from app.services.rollup_service import RollupService
+from app.services.sensor_stats import sensor_stats
+from app.services.occupancy_service import occupancy
+from app import db
+
+
+class IngestionWorker:
+    """
+    Worker de longa duração que persiste as leituras recebidas via MQTT.
+    
+    A thread de rede do MQTT apenas enfileira as mensagens; a gravação no
+    banco acontece em uma thread própria, dentro do app context do Flask.
+    """
+    
+    def __init__(self, flask_app, config: Dict[str, Any] = None, client_id: str = "ingestion_worker_001"):
+        """
+        Inicializa o worker.
+        
+        Args:
+            flask_app: Aplicação Flask (fornece configuração e conexão ao banco)
+            config: Dicionário de configuração MQTT (opcional)
+            client_id: ID do cliente MQTT
+        """
+        self.app = flask_app
+        self.client_id = client_id
+        
+        # Rollup horário (0 = desativado)
+        self.rollup_interval = flask_app.config.get('ROLLUP_INTERVAL_SECONDS', 60)
+        self._last_rollup = 0.0
+        
+        self.ingestion = IngestionService(
+            batch_size=flask_app.config.get('INGESTION_BATCH_SIZE', 500),
+            flush_interval_ms=flask_app.config.get('INGESTION_FLUSH_INTERVAL_MS', 1000)
+        )
+        
+        self.subscriber = MQTTSubscriber(config, client_id=client_id)
+        self.subscriber.set_callback('sensor', self._on_sensor_data)
+        
+        # Controle de threads
+        self.running = False
+        self.stop_event = Event()
+        self.wakeup_event = Event()
+        self.flush_thread = None
+        
+        self.logger = logging.getLogger(f"IngestionWorker.{client_id}")
+    
+    def _on_sensor_data(self, data: Dict[str, Any]):
+        """
+        Callback do subscriber para mensagens de sensor.
+        
+        Args:
+            data: Mensagem MQTT decodificada
+        """
+        if self.ingestion.add(data):
+            # Lote cheio: acordar a thread de gravação imediatamente
+            self.wakeup_event.set()
+    
+    def _flush_loop(self):
+        """Loop de gravação (roda em thread separada)."""
+        self.logger.info("🔄 Loop de gravação iniciado")
+        
+        with self.app.app_context():
+            while not self.stop_event.is_set():
+                self.wakeup_event.wait(self.ingestion.flush_interval)
+                self.wakeup_event.clear()
+                
+                if self.ingestion.should_flush():
+                    inserted = self.ingestion.flush()
+                    self.logger.debug(f"💾 {inserted} leituras gravadas")
+                
+                # Contadores dos sensores também em sensores ociosos
+                sensor_stats.maybe_flush()
+                
+                self._maybe_rollup()
+                self._sync_occupancy()
+            
+            # Gravar o que restou no buffer antes de sair
+            self.ingestion.flush()
+            sensor_stats.flush()
+    
+    def _maybe_rollup(self):
+        """Agrega as leituras novas em statistics a cada rollup_interval."""
+        if not self.rollup_interval:
+            return
+        
+        now = time.monotonic()
+        if now - self._last_rollup < self.rollup_interval:
+            return
+        
+        self._last_rollup = now
+        try:
+            result = RollupService.catch_up()
+            self.logger.debug(f"📈 Rollup: {result['readings_processed']} leituras agregadas")
+        except Exception as e:
+            self.logger.error(f"❌ Erro no rollup horário: {e}")
+    
+    def _sync_occupancy(self):
+        """Mantém os contadores de ocupação (e seus checkpoints) em dia."""
+        try:
+            occupancy.sync()
+        except Exception as e:
+            self.logger.error(f"❌ Erro ao atualizar ocupação: {e}")
+        finally:
+            # Encerrar a transação de leitura: no REPEATABLE READ do InnoDB
+            # a próxima sincronização não enxergaria as novas linhas
+            db.session.rollback()
+    
+    def start(self) -> bool:
+        """
+        Inicia o worker.
+        
+        Returns:
+            True se iniciado com sucesso
+        """
+        if self.running:
+            self.logger.warning("⚠️  Worker já está rodando")
+            return True
+        
+        self.stop_event.clear()
+        self.flush_thread = Thread(target=self._flush_loop, daemon=True)
+        self.flush_thread.start()
+        
+        if not self.subscriber.start():
+            self.stop_event.set()
+            self.flush_thread.join(timeout=5)
+            return False
+        
+        self.running = True
+        self.logger.info(
+            f"✅ Worker de ingestão iniciado (lote: {self.ingestion.batch_size}, "
+            f"intervalo: {int(self.ingestion.flush_interval * 1000)}ms)"
+        )
+        return True
+    
+    def stop(self):
+        """Para o worker gravando as leituras pendentes."""
+        if not self.running:
+            return
+        
+        self.logger.info("🛑 Parando worker de ingestão...")
+        
+        self.subscriber.stop()
+        self.running = False
+        self.stop_event.set()
+        self.wakeup_event.set()
+        
+        if self.flush_thread:
+            self.flush_thread.join(timeout=10)
+        
+        self.logger.info("👋 Worker de ingestão parado")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retorna estatísticas do worker.
+        
+        Returns:
+            Dicionário com estatísticas
+        """
+        return {
+            'client_id': self.client_id,
+            'running': self.running,
+            'pending': self.ingestion.pending(),
+            **self.ingestion.stats,
+            'subscriber': self.subscriber.get_stats()
+        }
+    
+    def run_forever(self, stats_interval: int = 60):
+        """
+        Executa o worker até Ctrl+C, exibindo estatísticas periodicamente.
+        
+        Args:
+            stats_interval: Intervalo entre logs de estatísticas (segundos)
+        """
+        if not self.start():
+            self.logger.error("❌ Não foi possível iniciar o worker de ingestão")
+            return
+        
+        try:
+            while True:
+                time.sleep(stats_interval)
+                stats = self.get_stats()
+                self.logger.info(
+                    f"📊 Inseridas: {stats['readings_inserted']} | "
+                    f"Pendentes: {stats['pending']} | "
+                    f"Rejeitadas: {stats['messages_rejected']} | "
+                    f"Erros: {stats['flush_errors']}"
+                )
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+
+if __name__ == "__main__":
+    from app import create_app
+    
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    
+    print("=== WORKER DE INGESTÃO - CEU TRES PONTES ===\n")
+    print("⚠️  Certifique-se de que o Mosquitto e o MySQL estão rodando!\n")
+    
+    flask_app = create_app(os.getenv('FLASK_ENV', 'production'))
+    IngestionWorker(flask_app).run_forever()
@@ -11,6 +11,11 @@ import time
 from typing import Callable, Dict, Any, Optional
 from threading import Lock
 
+try:
+    from .topic_matcher import TopicTrie
+except ImportError:
+    from topic_matcher import TopicTrie
+
 
 class MQTTClient:
     """
@@ -49,7 +54,8 @@ class MQTTClient:
         # Estado
         self.connected = False
         self.subscribed_topics = []
-        self.message_callbacks = {}
+        # Filtros de tópico (com '+' e '#') → callbacks
+        self.message_callbacks = TopicTrie()
         self.lock = Lock()
         
         # Estatísticas
@@ -107,10 +113,20 @@ class MQTTClient:
         
         self.logger.debug(f"📨 Mensagem recebida no tópico: {msg.topic}")
         
-        # Executar callback específico do tópico se existir
-        if msg.topic in self.message_callbacks:
+        # Executar callbacks de todos os filtros que casam com o tópico
+        callbacks = self.message_callbacks.match(msg.topic)
+        if not callbacks:
+            return
+        
+        try:
+            payload = msg.payload.decode('utf-8')
+        except UnicodeDecodeError as e:
+            self.logger.error(f"❌ Payload inválido no tópico {msg.topic}: {e}")
+            return
+        
+        for callback in callbacks:
             try:
-                self.message_callbacks[msg.topic](msg.topic, msg.payload.decode('utf-8'))
+                callback(msg.topic, payload)
             except Exception as e:
                 self.logger.error(f"❌ Erro ao processar mensagem: {e}")
     
@@ -201,15 +217,21 @@ class MQTTClient:
         Args:
             topic: Tópico para subscrever
             callback: Função callback(topic, message) para processar mensagens
+        
+        O tópico pode conter wildcards MQTT ('+' para um nível, '#' para
+        os níveis restantes); o callback recebe o tópico concreto. Um novo
+        callback para o mesmo filtro substitui o anterior.
         """
         if not self.connected:
             self.logger.warning("⚠️  Não conectado. Subscrevendo após conexão...")
         
         self.client.subscribe(topic, self.qos)
-        self.subscribed_topics.append(topic)
+        if topic not in self.subscribed_topics:
+            self.subscribed_topics.append(topic)
         
         if callback:
-            self.message_callbacks[topic] = callback
+            self.message_callbacks.remove(topic)
+            self.message_callbacks.add(topic, callback)
         
         self.logger.info(f"📥 Subscrito ao tópico: {topic}")
     
@@ -223,8 +245,7 @@ class MQTTClient:
         self.client.unsubscribe(topic)
         if topic in self.subscribed_topics:
             self.subscribed_topics.remove(topic)
-        if topic in self.message_callbacks:
-            del self.message_callbacks[topic]
+        self.message_callbacks.remove(topic)
         
         self.logger.info(f"📤 Cancelada subscrição do tópico: {topic}")
     
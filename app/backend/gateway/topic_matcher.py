@@ -0,0 +1,171 @@
+"""
+Matcher de Tópicos MQTT
+Sistema de Controle de Acesso - CEU Tres Pontes
+
+Trie sobre os níveis dos tópicos com suporte aos wildcards '+' e '#'.
+"""
+
+from typing import Any, Dict, List
+
+
+SINGLE_LEVEL = '+'
+MULTI_LEVEL = '#'
+
+
+class _TopicNode:
+    """Nó da trie: um nível de filtro de tópico."""
+    
+    __slots__ = ('children', 'values')
+    
+    def __init__(self):
+        self.children: Dict[str, '_TopicNode'] = {}
+        self.values: List[Any] = []
+
+
+class TopicTrie:
+    """
+    Associa filtros de tópico MQTT a valores (ex.: callbacks).
+    
+    O custo de `match` depende da profundidade do tópico e dos wildcards
+    presentes no caminho, não do número de filtros cadastrados.
+    
+    Examples:
+        >>> trie = TopicTrie()
+        >>> trie.add('ceu/tres_pontes/sensores/#', 'todos')
+        >>> trie.add('ceu/tres_pontes/sensores/+', 'por_sensor')
+        >>> trie.match('ceu/tres_pontes/sensores/LORA-001')
+        ['todos', 'por_sensor']
+    """
+    
+    def __init__(self):
+        self._root = _TopicNode()
+        self._count = 0
+    
+    @staticmethod
+    def validate_filter(topic_filter: str):
+        """
+        Valida um filtro de tópico segundo a especificação MQTT.
+        
+        Args:
+            topic_filter: Filtro (pode conter '+' e '#')
+        
+        Raises:
+            ValueError: Se o filtro for inválido
+        """
+        if not topic_filter:
+            raise ValueError("Filtro de tópico vazio")
+        
+        levels = topic_filter.split('/')
+        for index, level in enumerate(levels):
+            if MULTI_LEVEL in level and (level != MULTI_LEVEL or index != len(levels) - 1):
+                raise ValueError(f"'#' deve ocupar sozinho o último nível: {topic_filter}")
+            if SINGLE_LEVEL in level and level != SINGLE_LEVEL:
+                raise ValueError(f"'+' deve ocupar um nível inteiro: {topic_filter}")
+    
+    def add(self, topic_filter: str, value: Any):
+        """
+        Cadastra um valor para o filtro de tópico.
+        
+        Args:
+            topic_filter: Filtro MQTT (ex.: 'ceu/+/sensores/#')
+            value: Valor associado ao filtro
+        """
+        self.validate_filter(topic_filter)
+        
+        node = self._root
+        for level in topic_filter.split('/'):
+            node = node.children.setdefault(level, _TopicNode())
+        
+        if value not in node.values:
+            node.values.append(value)
+            self._count += 1
+    
+    def remove(self, topic_filter: str, value: Any = None) -> bool:
+        """
+        Remove um valor (ou todos, se value for None) de um filtro.
+        
+        Args:
+            topic_filter: Filtro MQTT cadastrado
+            value: Valor a remover (opcional)
+        
+        Returns:
+            True se algo foi removido
+        """
+        path = [self._root]
+        levels = topic_filter.split('/')
+        for level in levels:
+            node = path[-1].children.get(level)
+            if node is None:
+                return False
+            path.append(node)
+        
+        node = path[-1]
+        if value is None:
+            removed = len(node.values)
+            node.values.clear()
+        elif value in node.values:
+            node.values.remove(value)
+            removed = 1
+        else:
+            removed = 0
+        
+        self._count -= removed
+        
+        # Podar nós que ficaram vazios
+        for depth in range(len(levels), 0, -1):
+            child = path[depth]
+            if child.values or child.children:
+                break
+            del path[depth - 1].children[levels[depth - 1]]
+        
+        return removed > 0
+    
+    def match(self, topic: str) -> List[Any]:
+        """
+        Retorna os valores de todos os filtros que casam com o tópico.
+        
+        Args:
+            topic: Tópico concreto de uma mensagem (sem wildcards)
+        
+        Returns:
+            Lista de valores (cada valor aparece uma única vez)
+        """
+        levels = topic.split('/')
+        # Tópicos de sistema ($SYS/...) não casam com wildcard no 1º nível
+        system_topic = topic.startswith('$')
+        
+        results: List[Any] = []
+        stack = [(self._root, 0)]
+        
+        while stack:
+            node, depth = stack.pop()
+            wildcards_allowed = not (system_topic and depth == 0)
+            
+            # '#' casa com o nível atual e todos os seguintes (inclusive o pai)
+            if wildcards_allowed:
+                multi = node.children.get(MULTI_LEVEL)
+                if multi is not None:
+                    results.extend(multi.values)
+            
+            if depth == len(levels):
+                results.extend(node.values)
+                continue
+            
+            exact = node.children.get(levels[depth])
+            if exact is not None:
+                stack.append((exact, depth + 1))
+            
+            if wildcards_allowed:
+                single = node.children.get(SINGLE_LEVEL)
+                if single is not None:
+                    stack.append((single, depth + 1))
+        
+        # Remover duplicatas preservando a ordem
+        unique = []
+        for value in results:
+            if value not in unique:
+                unique.append(value)
+        return unique
+    
+    def __len__(self) -> int:
+        return self._count
@@ -0,0 +1,22 @@
+-- ============================================================
+-- DATA/HORA COMBINADA EM POOL_READINGS
+-- Coluna gerada reading_at e índices para consultas por período
+-- ============================================================
+
+-- reading_at = reading_date + reading_time, calculada pelo MySQL
+-- (STORED: gravada na linha, indexável e sem custo na leitura).
+-- Reescreve a tabela; rodar com a ingestão da piscina parada.
+ALTER TABLE pool_readings
+    ADD COLUMN reading_at DATETIME
+        GENERATED ALWAYS AS (TIMESTAMP(reading_date, reading_time)) STORED NOT NULL
+        AFTER reading_time,
+    ADD INDEX idx_sensor_reading_at (sensor_type, reading_at),
+    ADD INDEX idx_reading_at (reading_at);
+
+-- Histórico, última leitura e períodos por sensor passam a ser range
+-- scans em idx_sensor_reading_at (o id da chave primária desempata a
+-- paginação sem filesort); listagens sem filtro de sensor usam idx_reading_at.
+--
+-- Depois de confirmar com EXPLAIN que nenhuma consulta usa mais os
+-- índices antigos (relatórios externos incluídos), eles podem ser removidos:
+-- ALTER TABLE pool_readings DROP INDEX idx_composite, DROP INDEX idx_date_time;
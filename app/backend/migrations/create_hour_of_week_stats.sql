@@ -0,0 +1,22 @@
+-- ============================================================
+-- HISTOGRAMA HORA-DA-SEMANA (PREVISÃO DE PICO)
+-- 7×24 contadores por área, horário de Brasília
+-- ============================================================
+
+CREATE TABLE IF NOT EXISTS hour_of_week_stats (
+    area VARCHAR(100) NOT NULL,
+    weekday SMALLINT NOT NULL COMMENT '0 = segunda',
+    hour SMALLINT NOT NULL COMMENT 'Hora local (0-23)',
+    mean DOUBLE NOT NULL DEFAULT 0 COMMENT 'Média móvel exponencial das ocorrências',
+    variance DOUBLE NOT NULL DEFAULT 0 COMMENT 'Variância móvel exponencial',
+    samples INT NOT NULL DEFAULT 0 COMMENT 'Ocorrências encerradas',
+    open_date DATE NULL COMMENT 'Data local da ocorrência em andamento',
+    open_count INT NOT NULL DEFAULT 0,
+    total_entries BIGINT NOT NULL DEFAULT 0,
+    updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (area, weekday, hour)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+COMMENT='Histograma de entradas por hora da semana (previsão de pico)';
+
+-- Popular a partir da tabela statistics:
+-- flask peak-rebuild
@@ -0,0 +1,15 @@
+-- ============================================================
+-- CHECKPOINTS DE OCUPAÇÃO
+-- Entradas/saídas do dia (horário de Brasília) por escopo
+-- ============================================================
+
+CREATE TABLE IF NOT EXISTS occupancy_checkpoints (
+    scope VARCHAR(100) PRIMARY KEY COMMENT 'Total ou nome da área',
+    day DATE NOT NULL COMMENT 'Data local',
+    entries INT NOT NULL DEFAULT 0,
+    exits INT NOT NULL DEFAULT 0,
+    last_reading_id BIGINT NOT NULL DEFAULT 0 COMMENT 'Maior readings.id incluído',
+    last_reading_at DATETIME NULL,
+    updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+COMMENT='Checkpoints dos contadores de ocupação do dia';
@@ -0,0 +1,20 @@
+-- ============================================================
+-- AGREGADO DIÁRIO DE TEMPERATURA DA PISCINA
+-- Soma/contagem por tipo de sensor e dia encerrado
+-- ============================================================
+
+CREATE TABLE IF NOT EXISTS pool_daily_temperatures (
+    sensor_type VARCHAR(20) NOT NULL COMMENT 'water_temp ou ambient_temp',
+    reading_date DATE NOT NULL,
+    temperature_sum DECIMAL(12,2) NOT NULL DEFAULT 0,
+    reading_count INT NOT NULL DEFAULT 0 COMMENT '0 = dia sem leituras',
+    temperature_min DECIMAL(5,2) NULL,
+    temperature_max DECIMAL(5,2) NULL,
+    updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (sensor_type, reading_date)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+COMMENT='Médias diárias de temperatura da piscina (dias encerrados)';
+
+-- Os dias são preenchidos sob demanda por GET /pool/temperature/daily-average.
+-- Para recalcular após cargas diretas em pool_readings:
+-- flask pool-temperature-rebuild --days 365
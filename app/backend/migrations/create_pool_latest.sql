@@ -0,0 +1,39 @@
+-- ============================================================
+-- ÚLTIMA LEITURA DA PISCINA
+-- Uma linha por tipo de sensor, mantida a cada nova leitura
+-- ============================================================
+
+CREATE TABLE IF NOT EXISTS pool_latest (
+    sensor_type VARCHAR(20) NOT NULL COMMENT 'water_temp, ambient_temp ou water_quality',
+    reading_id BIGINT NOT NULL COMMENT 'id em pool_readings',
+    reading_date DATE NOT NULL,
+    reading_time TIME NOT NULL,
+    reading_at DATETIME NOT NULL COMMENT 'reading_date + reading_time',
+    temperature DECIMAL(5,2) NULL,
+    water_quality VARCHAR(20) NULL,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (sensor_type)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+COMMENT='Última leitura de cada sensor da piscina';
+
+-- Carga inicial a partir das leituras existentes
+INSERT INTO pool_latest (
+    sensor_type, reading_id, reading_date, reading_time, reading_at,
+    temperature, water_quality, created_at, updated_at
+)
+SELECT
+    p.sensor_type, p.id, p.reading_date, p.reading_time,
+    TIMESTAMP(p.reading_date, p.reading_time),
+    p.temperature, p.water_quality, p.created_at, p.updated_at
+FROM pool_readings p
+WHERE p.id = (
+    SELECT p2.id FROM pool_readings p2
+    WHERE p2.sensor_type = p.sensor_type
+    ORDER BY p2.reading_date DESC, p2.reading_time DESC, p2.id DESC
+    LIMIT 1
+)
+ON DUPLICATE KEY UPDATE reading_id = reading_id;
+
+-- Após cargas diretas em pool_readings (fora de PoolService.create_reading):
+-- flask pool-latest-rebuild
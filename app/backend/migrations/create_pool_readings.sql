@@ -12,6 +12,7 @@ CREATE TABLE IF NOT EXISTS pool_readings (
     -- Data e hora da leitura
     reading_date DATE NOT NULL,
     reading_time TIME NOT NULL,
+    reading_at DATETIME GENERATED ALWAYS AS (TIMESTAMP(reading_date, reading_time)) STORED NOT NULL,
     
     -- Valores (temperatura em Celsius)
     temperature DECIMAL(5,2) NULL COMMENT 'Temperatura em Celsius (20-40°C)',
@@ -27,7 +28,9 @@ CREATE TABLE IF NOT EXISTS pool_readings (
     INDEX idx_date_time (reading_date, reading_time),
     INDEX idx_sensor_type (sensor_type),
     INDEX idx_created_at (created_at),
-    INDEX idx_composite (sensor_type, reading_date, reading_time)
+    INDEX idx_composite (sensor_type, reading_date, reading_time),
+    INDEX idx_sensor_reading_at (sensor_type, reading_at),
+    INDEX idx_reading_at (reading_at)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
 COMMENT='Leituras dos sensores de monitoramento da piscina';
 
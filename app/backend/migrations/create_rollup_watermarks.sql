@@ -0,0 +1,14 @@
+-- ============================================================
+-- ROLLUP HORÁRIO - MARCA D'ÁGUA
+-- Maior readings.id já agregado na tabela statistics
+-- ============================================================
+
+CREATE TABLE IF NOT EXISTS rollup_watermarks (
+    name VARCHAR(50) PRIMARY KEY,
+    last_reading_id BIGINT NOT NULL DEFAULT 0,
+    updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+COMMENT='Marcas d''água dos jobs de agregação incremental';
+
+-- Garante a chave única usada pelo upsert do rollup (já criada pelo ORM)
+-- ALTER TABLE statistics ADD UNIQUE KEY uix_date_hour_sensor (date, hour, sensor_id);
@@ -0,0 +1,36 @@
+-- ============================================================
+-- PARTICIONAMENTO MENSAL DA TABELA readings
+-- RANGE COLUMNS(timestamp), uma partição por mês + pmax
+--
+-- Preferir: flask readings-partitions --init
+-- (gera as partições a partir da leitura mais antiga e remove a FK
+-- pelo nome real). Depois, diariamente via cron:
+--   flask readings-partitions
+-- que pré-cria os meses futuros e remove/arquiva os expirados
+-- (READINGS_PARTITIONS_AHEAD, READINGS_RETENTION_MONTHS,
+-- READINGS_ARCHIVE_EXPIRED).
+--
+-- Reescreve a tabela: executar com a ingestão parada.
+-- ============================================================
+
+-- Tabelas particionadas não aceitam chaves estrangeiras
+-- (nome gerado pelo MySQL; conferir com SHOW CREATE TABLE readings)
+ALTER TABLE readings DROP FOREIGN KEY readings_ibfk_1;
+
+-- Toda chave única precisa conter a coluna de particionamento
+ALTER TABLE readings DROP PRIMARY KEY, ADD PRIMARY KEY (id, timestamp);
+
+-- Exemplo: ajustar o primeiro mês ao MIN(timestamp) da tabela
+ALTER TABLE readings PARTITION BY RANGE COLUMNS(timestamp) (
+    PARTITION p202609 VALUES LESS THAN ('2026-10-01'),
+    PARTITION p202610 VALUES LESS THAN ('2026-11-01'),
+    PARTITION p202611 VALUES LESS THAN ('2026-12-01'),
+    PARTITION p202612 VALUES LESS THAN ('2027-01-01'),
+    PARTITION p202701 VALUES LESS THAN ('2027-02-01'),
+    PARTITION pmax VALUES LESS THAN (MAXVALUE)
+);
+
+-- Conferir partições e pruning:
+-- SELECT partition_name, table_rows FROM information_schema.partitions
+--  WHERE table_schema = DATABASE() AND table_name = 'readings';
+-- EXPLAIN SELECT COUNT(*) FROM readings WHERE timestamp >= '2026-10-18';
@@ -0,0 +1,17 @@
+-- ============================================================
+-- SINCRONIZAÇÃO INCREMENTAL DO BANCO DE RELATÓRIOS
+-- Colunas/índices usados pelas marcas d'água de flask report-sync
+-- ============================================================
+
+-- Alertas mudam de status: updated_at identifica as linhas alteradas
+ALTER TABLE alerts
+    ADD COLUMN updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    ADD INDEX ix_alerts_updated_at (updated_at);
+
+-- statistics é atualizada pelo rollup: leitura por (updated_at, id)
+ALTER TABLE statistics ADD INDEX idx_updated_at (updated_at, id);
+
+-- No banco de relatórios, report_sync_state e as tabelas ausentes são
+-- criadas pelo próprio comando. Depois da primeira carga (completa, com
+-- create_report_db.sh ou flask report-sync --reset), agendar:
+--   */5 * * * * cd /var/www/smartceu/app/backend && flask report-sync
@@ -0,0 +1,220 @@
+"""
+Contador de ocupação
+Máquina de estados de entradas/saídas do dia, com virada à meia-noite local
+
+Fora do pacote app (sem Flask/SQLAlchemy) para que o gateway possa
+importá-lo sem carregar o backend.
+"""
+
+from datetime import date, datetime
+from threading import Lock
+from typing import Any, Dict, Optional
+import pytz
+
+
+# Timezone de Brasília
+BRASILIA_TZ = pytz.timezone('America/Sao_Paulo')
+
+# Sentido das passagens
+ENTRY = 'entrada'
+EXIT = 'saida'
+
+
+def direction(location: Optional[str]) -> Optional[str]:
+    """
+    Sentido de um sensor pela sua localização
+    
+    Sensores "Entrada ..." contam entradas e "Saída ..." contam saídas
+    (mesma regra da consulta de capacidade original, location LIKE
+    '%entrada%' / '%saída%'). Os demais (banheiros, portaria, catracas)
+    não alteram a ocupação.
+    
+    Args:
+        location: Localização do sensor
+    
+    Returns:
+        str: ENTRY, EXIT ou None
+    """
+    location = (location or '').lower()
+    if 'entrada' in location:
+        return ENTRY
+    if 'saída' in location or 'saida' in location:
+        return EXIT
+    return None
+
+
+class OccupancyCounter:
+    """
+    Contadores de entradas e saídas do dia (total e por área)
+    
+    Não depende do banco: recebe passagens (detecções, activity 1, dos
+    sensores de entrada e de saída; ver `direction`) e zera tudo quando a
+    data local muda. Eventos de um dia anterior ao atual são ignorados.
+    Usado pelo backend (OccupancyTracker) e pelo gateway para os alertas
+    de capacidade.
+    
+    Timestamps sem timezone são interpretados como UTC.
+    """
+    
+    def __init__(self, tz=BRASILIA_TZ):
+        """
+        Inicializa os contadores zerados
+        
+        Args:
+            tz: Timezone que define a meia-noite da virada
+        """
+        self.tz = tz
+        self.day: Optional[date] = None
+        self.entries = 0
+        self.exits = 0
+        self.areas: Dict[str, Dict[str, int]] = {}
+        self.last_reading: Optional[datetime] = None
+        self._lock = Lock()
+    
+    def local_date(self, timestamp: Optional[datetime] = None) -> date:
+        """Data local de um timestamp (padrão: agora)"""
+        if timestamp is None:
+            return datetime.now(self.tz).date()
+        if timestamp.tzinfo is None:
+            timestamp = pytz.UTC.localize(timestamp)
+        return timestamp.astimezone(self.tz).date()
+    
+    def local_midnight_utc(self, day: Optional[date] = None) -> datetime:
+        """Meia-noite local do dia, em UTC sem timezone (como readings.timestamp)"""
+        day = day or self.local_date()
+        midnight = self.tz.localize(datetime.combine(day, datetime.min.time()))
+        return midnight.astimezone(pytz.UTC).replace(tzinfo=None)
+    
+    def _roll(self, day: date) -> bool:
+        """Zera os contadores se `day` for posterior ao dia atual"""
+        if self.day is not None and day <= self.day:
+            return False
+        self.day = day
+        self.entries = 0
+        self.exits = 0
+        self.areas = {}
+        return True
+    
+    def roll(self, day: Optional[date] = None) -> bool:
+        """
+        Vira o dia se a data local mudou
+        
+        Args:
+            day: Data local (padrão: hoje)
+        
+        Returns:
+            bool: True se os contadores foram zerados
+        """
+        with self._lock:
+            return self._roll(day or self.local_date())
+    
+    def restore(self, day: date, entries: int, exits: int,
+                areas: Optional[Dict[str, Dict[str, int]]] = None,
+                last_reading: Optional[datetime] = None) -> None:
+        """
+        Substitui o estado (ex.: a partir de um checkpoint)
+        
+        Args:
+            day: Data local dos contadores
+            entries: Entradas do dia
+            exits: Saídas do dia
+            areas: Área → {'entries', 'exits'}
+            last_reading: Timestamp da leitura mais recente
+        """
+        with self._lock:
+            self.day = day
+            self.entries = entries
+            self.exits = exits
+            self.areas = {
+                area: {'entries': counters['entries'], 'exits': counters['exits']}
+                for area, counters in (areas or {}).items()
+            }
+            self.last_reading = last_reading
+    
+    def add(self, entries: int = 0, exits: int = 0, area: Optional[str] = None,
+            last_reading: Optional[datetime] = None) -> None:
+        """
+        Soma contagens ao dia atual (sem verificar data)
+        
+        Args:
+            entries: Entradas
+            exits: Saídas
+            area: Área das contagens (opcional, o total sempre é somado)
+            last_reading: Timestamp mais recente das contagens
+        """
+        with self._lock:
+            self.entries += entries
+            self.exits += exits
+            
+            if area:
+                counters = self.areas.setdefault(area, {'entries': 0, 'exits': 0})
+                counters['entries'] += entries
+                counters['exits'] += exits
+            
+            if last_reading is not None and (self.last_reading is None or last_reading > self.last_reading):
+                self.last_reading = last_reading
+    
+    def record(self, sense: Optional[str], timestamp: Optional[datetime] = None,
+               area: Optional[str] = None) -> bool:
+        """
+        Processa uma detecção (activity 1)
+        
+        Leituras com activity 0 ("nada detectado") não devem ser passadas
+        aqui; detecções de sensores sem sentido (None) são ignoradas.
+        
+        Args:
+            sense: ENTRY, EXIT ou None (ver `direction`)
+            timestamp: Momento da leitura (padrão: agora)
+            area: Área do sensor (opcional)
+        
+        Returns:
+            bool: False se a detecção foi ignorada (sem sentido ou de um
+            dia já encerrado)
+        """
+        if sense not in (ENTRY, EXIT):
+            return False
+        
+        timestamp = timestamp or datetime.utcnow()
+        day = self.local_date(timestamp)
+        
+        with self._lock:
+            self._roll(day)
+            if day < self.day:
+                return False
+        
+        if sense == ENTRY:
+            self.add(entries=1, area=area, last_reading=timestamp)
+        else:
+            self.add(exits=1, area=area, last_reading=timestamp)
+        return True
+    
+    @property
+    def current(self) -> int:
+        """Pessoas no local (entradas - saídas)"""
+        return max(0, self.entries - self.exits)
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Retorna o estado atual (virando o dia se necessário)
+        
+        Returns:
+            Dict: date, entries, exits, current, areas e last_reading
+        """
+        self.roll()
+        
+        with self._lock:
+            return {
+                'date': self.day.isoformat() if self.day else None,
+                'entries': self.entries,
+                'exits': self.exits,
+                'current': max(0, self.entries - self.exits),
+                'areas': {
+                    area: {
+                        'entries': counters['entries'],
+                        'exits': counters['exits'],
+                        'current': max(0, counters['entries'] - counters['exits'])
+                    }
+                    for area, counters in self.areas.items()
+                },
+                'last_reading': self.last_reading
+            }
@@ -51,8 +51,8 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from app import create_app, db
 from app.models.reading import Reading
-from app.models.pool_reading import PoolReading
 from app.models.sensor import Sensor
+from app.services.pool_service import PoolService
 
 # Configurações
 TIMEZONE = ZoneInfo('America/Sao_Paulo')
@@ -331,15 +331,14 @@ def save_pool_reading(pool_data):
             else:
                 water_quality = 'Imprópria'
         
-        reading = PoolReading(
-            sensor_type=pool_data['sensor_type'],
-            reading_date=now.date(),
-            reading_time=now.time(),
-            temperature=temperature,
-            water_quality=water_quality
-        )
-        db.session.add(reading)
-        db.session.commit()
+        # Via PoolService para manter pool_latest e os agregados diários
+        PoolService.create_reading({
+            'sensor_type': pool_data['sensor_type'],
+            'reading_date': now.date(),
+            'reading_time': now.time(),
+            'temperature': temperature,
+            'water_quality': water_quality
+        })
         return True
     except Exception as e:
         db.session.rollback()
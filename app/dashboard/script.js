@@ -12,6 +12,109 @@ const randomBetweenFloat = (min, max) => {
 };
 const randomBetween = (min, max) => Math.floor(Math.random() * (max - min) + min);
 
+// ========== STREAM AO VIVO (SSE) ==========
+// Uma única conexão EventSource por página. Cada página registra, por
+// evento, uma função que aplica o payload recebido (snapshot ou delta)
+// direto na tela, sem novas requisições à API; a função de polling só é
+// usada sem suporte a SSE (ou enquanto o stream estiver fora do ar).
+const POLL_INTERVAL = 30000;
+const LIVE_DEBOUNCE = 1000;
+const AREAS_REFRESH_DELAY = 10000;
+const LIVE_EVENTS = ['snapshot', 'occupancy', 'pool', 'alert'];
+const liveHandlers = [];
+let liveSource = null;
+
+function liveRefresh(poll, events) {
+    const handler = { poll, events, pollTimer: null };
+    liveHandlers.push(handler);
+    
+    if (!window.EventSource) {
+        handler.pollTimer = setInterval(poll, POLL_INTERVAL);
+        return;
+    }
+    connectLiveStream();
+}
+
+function debounce(callback, delay = LIVE_DEBOUNCE) {
+    // Agrupa rajadas de eventos em uma única chamada (widgets que ainda
+    // precisam buscar dados na API)
+    let timer = null;
+    return () => {
+        if (timer) return;
+        timer = setTimeout(() => {
+            timer = null;
+            callback();
+        }, delay);
+    };
+}
+
+function liveData(data) {
+    // Seções do snapshot que falharam no servidor chegam como {error: ...}
+    return data && !data.error ? data : null;
+}
+
+function applyOccupancy(stats, occupancy) {
+    // O evento traz os totais do dia do servidor: substitui, não soma
+    if (!stats) return stats;
+    
+    return {
+        ...stats,
+        entries_today: occupancy.entries,
+        exits_today: occupancy.exits,
+        current_people: occupancy.current,
+        capacity_percentage: Math.round((occupancy.current / stats.max_capacity) * 1000) / 10,
+        // O evento traz o horário em UTC sem fuso
+        last_reading: occupancy.last_reading ? `${occupancy.last_reading}Z` : stats.last_reading,
+        has_data_today: occupancy.entries + occupancy.exits > 0
+    };
+}
+
+function prependAlert(alerts, alert) {
+    // Mesmo limite do endpoint de alertas ativos
+    const list = [alert, ...(alerts ? alerts.alerts : [])].slice(0, 10);
+    return { ...alerts, alerts: list, total: list.length };
+}
+
+function connectLiveStream() {
+    if (liveSource) return;
+    
+    liveSource = new EventSource(`${API_BASE}/stream`);
+    
+    LIVE_EVENTS.forEach(eventName => {
+        liveSource.addEventListener(eventName, (event) => {
+            let data;
+            try {
+                data = JSON.parse(event.data);
+            } catch (error) {
+                console.error(`Evento ${eventName} inválido:`, error);
+                return;
+            }
+            
+            liveHandlers
+                .filter(handler => handler.events[eventName])
+                .forEach(handler => handler.events[eventName](data));
+        });
+    });
+    
+    liveSource.onopen = () => {
+        liveHandlers.forEach(handler => {
+            if (handler.pollTimer) {
+                clearInterval(handler.pollTimer);
+                handler.pollTimer = null;
+            }
+        });
+    };
+    
+    liveSource.onerror = () => {
+        // O EventSource reconecta sozinho; até lá, polling
+        liveHandlers.forEach(handler => {
+            if (!handler.pollTimer) {
+                handler.pollTimer = setInterval(handler.poll, POLL_INTERVAL);
+            }
+        });
+    };
+}
+
 // ========== FUNÇÕES DE API ==========
 async function fetchCurrentStats() {
     try {
@@ -399,18 +502,11 @@ async function initMainPage() {
         }
     };
     
-    const updateMetrics = async () => {
-        // Buscar dados reais da API
-        const stats = await fetchCurrentStats();
-        const alerts = await fetchActiveAlerts();
-        const peak = await fetchPeakPrediction();
-        const advanced = await fetchAdvancedStats();
-        
-        console.log('📊 Stats recebidos da API:', stats);
-        console.log('🔔 Alertas:', alerts);
-        console.log('📈 Previsão de pico:', peak);
-        console.log('📉 Stats avançadas:', advanced);
-        
+    // Último estado recebido (API ou stream); os deltas são aplicados sobre ele
+    let stats = null;
+    let alerts = null;
+    
+    const renderMetrics = (peak, advanced) => {
         // ========== CARD 1: PESSOAS NO CEU ==========
         if (stats) {
             // Atualizar valor principal
@@ -571,8 +667,44 @@ async function initMainPage() {
         }
     };
 
-    // Atualizar a cada 30 segundos
-    setInterval(updateMetrics, 30000);
+    const updateMetrics = async () => {
+        // Buscar dados reais da API
+        stats = await fetchCurrentStats();
+        alerts = await fetchActiveAlerts();
+        const peak = await fetchPeakPrediction();
+        const advanced = await fetchAdvancedStats();
+        
+        console.log('📊 Stats recebidos da API:', stats);
+        console.log('🔔 Alertas:', alerts);
+        console.log('📈 Previsão de pico:', peak);
+        console.log('📉 Stats avançadas:', advanced);
+        
+        renderMetrics(peak, advanced);
+    };
+    
+    // Previsão de pico e estatísticas avançadas não vêm no stream:
+    // buscadas só junto com o snapshot periódico
+    const updateForecasts = async () => {
+        renderMetrics(await fetchPeakPrediction(), await fetchAdvancedStats());
+    };
+
+    // Aplicar os eventos do stream ao vivo direto nos cards
+    liveRefresh(updateMetrics, {
+        snapshot: (snapshot) => {
+            stats = liveData(snapshot.current_stats) || stats;
+            alerts = liveData(snapshot.alerts) || alerts;
+            renderMetrics(null, null);
+            updateForecasts();
+        },
+        occupancy: (occupancy) => {
+            stats = applyOccupancy(stats, occupancy);
+            renderMetrics(null, null);
+        },
+        alert: (alert) => {
+            alerts = prependAlert(alerts, alert);
+            renderMetrics(null, null);
+        }
+    });
     await updateMetrics();
 }
 
@@ -580,10 +712,10 @@ async function initMainPage() {
 async function initAreasPage() {
     if (!$('.areas-grid')) return;
     
-    const updateAreaMetrics = async () => {
-        // Buscar dados reais da API
-        const areasData = await fetchAreasOccupation();
-        
+    // Último estado recebido (API ou stream); os deltas são aplicados sobre ele
+    let areasData = null;
+    
+    const renderAreaMetrics = () => {
         if (areasData && areasData.areas) {
             // Atualizar cada card de área com dados reais
             $$('.area-card .metric-value').forEach((el, i) => {
@@ -617,8 +749,24 @@ async function initAreasPage() {
         }
     };
 
-    // Atualizar a cada 30 segundos
-    setInterval(updateAreaMetrics, 30000);
+    const updateAreaMetrics = async () => {
+        // Buscar dados reais da API
+        areasData = await fetchAreasOccupation();
+        renderAreaMetrics();
+    };
+    
+    // Ocupação por área é uma janela de 15 min de detecções calculada no
+    // servidor: a cada mudança de ocupação só este widget é recarregado
+    const refreshAreas = debounce(updateAreaMetrics, AREAS_REFRESH_DELAY);
+
+    // Aplicar os eventos do stream ao vivo direto nos cards
+    liveRefresh(updateAreaMetrics, {
+        snapshot: (snapshot) => {
+            areasData = liveData(snapshot.areas) || areasData;
+            renderAreaMetrics();
+        },
+        occupancy: refreshAreas
+    });
     await updateAreaMetrics();
 }
 
@@ -674,10 +822,10 @@ async function initAlertsPage() {
         updateStatus('.metric-card:nth-child(1)', state.active, 1, 3, 'Sistema estável', 'Monitorar', 'Atenção necessária');
     };
 
-    // Carregar alertas reais da API
-    const loadAlerts = async () => {
-        const alertsData = await fetchActiveAlerts();
-        
+    // Último estado recebido (API ou stream); novos alertas entram no topo
+    let alertsData = null;
+    
+    const renderAlerts = () => {
         if (alertsData && alertsData.alerts) {
             // Limpar lista
             const activeList = $('#active-alerts-list');
@@ -767,14 +915,24 @@ async function initAlertsPage() {
         });
     };
 
-    // Carregar alertas inicialmente e atualizar a cada 30 segundos
-    await loadAlerts();
-    setInterval(loadAlerts, 30000);
+    // Carregar alertas reais da API
+    const loadAlerts = async () => {
+        alertsData = await fetchActiveAlerts();
+        renderAlerts();
+    };
 
-    updateAlertsMetrics();
-            `);
+    // Carregar alertas inicialmente e aplicar cada novo alerta do stream
+    await loadAlerts();
+    liveRefresh(loadAlerts, {
+        snapshot: (snapshot) => {
+            alertsData = liveData(snapshot.alerts) || alertsData;
+            renderAlerts();
+        },
+        alert: (alert) => {
+            alertsData = prependAlert(alertsData, alert);
+            renderAlerts();
         }
-    }, 30000);
+    });
 
     updateAlertsMetrics();
 }
@@ -807,11 +965,10 @@ document.addEventListener('DOMContentLoaded', () => {
 async function initPoolPage() {
     if (!$('#pool-occupancy')) return;
 
-    const updatePoolMetrics = async () => {
-        // Buscar dados reais da API
-        const poolData = await fetchPoolCurrent();
-        const qualityData = await fetchPoolQuality();
-        
+    // Último estado recebido (API ou stream); os deltas são aplicados sobre ele
+    let poolData = null;
+    
+    const renderPoolMetrics = (qualityData) => {
         if (poolData) {
             // Atualizar ocupação
             const occupancy = poolData.occupancy_percentage;
@@ -882,8 +1039,44 @@ async function initPoolPage() {
         }
     };
 
-    // Atualizar a cada 30 segundos
-    setInterval(updatePoolMetrics, 30000);
+    const updatePoolMetrics = async () => {
+        // Buscar dados reais da API
+        poolData = await fetchPoolCurrent();
+        renderPoolMetrics(await fetchPoolQuality());
+    };
+    
+    // Qualidade da água não vem no stream: buscada só no snapshot e quando
+    // chega uma leitura nova do sensor de qualidade
+    const updatePoolQuality = debounce(async () => {
+        renderPoolMetrics(await fetchPoolQuality());
+    });
+    
+    const applyPoolDelta = (reading) => {
+        if (!poolData || reading.temperature === null) return;
+        
+        if (reading.sensor_type === 'water_temp') {
+            poolData.water_temperature = reading.temperature;
+        } else if (reading.sensor_type === 'ambient_temp') {
+            poolData.ambient_temperature = reading.temperature;
+        }
+    };
+
+    // Aplicar os eventos do stream ao vivo direto nos cards
+    liveRefresh(updatePoolMetrics, {
+        snapshot: (snapshot) => {
+            poolData = liveData(snapshot.pool) || poolData;
+            renderPoolMetrics(null);
+            updatePoolQuality();
+        },
+        pool: (reading) => {
+            if (reading.sensor_type === 'water_quality') {
+                updatePoolQuality();
+                return;
+            }
+            applyPoolDelta(reading);
+            renderPoolMetrics(null);
+        }
+    });
     await updatePoolMetrics();
 }
 
@@ -932,20 +1125,11 @@ async function initControleAcessoPage() {
         }
     };
     
-    const updateCAMetrics = async () => {
-        console.log('📊 Atualizando métricas de Controle de Acesso...');
-        
-        // Buscar dados das APIs
-        const stats = await fetchCurrentStats();
-        const alerts = await fetchActiveAlerts();
-        const peak = await fetchPeakPrediction();
-        const advanced = await fetchAdvancedStats();
-        
-        console.log('📊 Stats CA:', stats);
-        console.log('🔔 Alertas CA:', alerts);
-        console.log('📈 Pico CA:', peak);
-        console.log('📉 Avançadas CA:', advanced);
-        
+    // Último estado recebido (API ou stream); os deltas são aplicados sobre ele
+    let stats = null;
+    let alerts = null;
+    
+    const renderCAMetrics = (peak, advanced) => {
         // ========== CARD 1: PESSOAS NO CEU ==========
         if (stats) {
             $('#ca-current-people').textContent = stats.current_people;
@@ -1079,8 +1263,35 @@ async function initControleAcessoPage() {
                 }
             }
         }
+    };
+    
+    const updateCAMetrics = async () => {
+        console.log('📊 Atualizando métricas de Controle de Acesso...');
         
-        // ========== GRÁFICO DE FLUXO ==========
+        // Buscar dados das APIs
+        stats = await fetchCurrentStats();
+        alerts = await fetchActiveAlerts();
+        const peak = await fetchPeakPrediction();
+        const advanced = await fetchAdvancedStats();
+        
+        console.log('📊 Stats CA:', stats);
+        console.log('🔔 Alertas CA:', alerts);
+        console.log('📈 Pico CA:', peak);
+        console.log('📉 Avançadas CA:', advanced);
+        
+        renderCAMetrics(peak, advanced);
+        await updateCAFlow();
+    };
+    
+    // Previsão de pico, estatísticas avançadas e fluxo não vêm no stream:
+    // buscados só junto com o snapshot periódico
+    const updateCAForecasts = async () => {
+        renderCAMetrics(await fetchPeakPrediction(), await fetchAdvancedStats());
+        await updateCAFlow();
+    };
+    
+    // ========== GRÁFICO DE FLUXO ==========
+    const updateCAFlow = async () => {
         const flowData = await fetchPeopleFlow();
         if (flowData) {
             updateCAFlowChart(flowData);
@@ -1145,9 +1356,24 @@ async function initControleAcessoPage() {
         });
     };
     
-    // Atualizar métricas imediatamente e depois a cada 30 segundos
+    // Atualizar métricas imediatamente e depois aplicar os eventos do stream ao vivo
     await updateCAMetrics();
-    setInterval(updateCAMetrics, 30000);
+    liveRefresh(updateCAMetrics, {
+        snapshot: (snapshot) => {
+            stats = liveData(snapshot.current_stats) || stats;
+            alerts = liveData(snapshot.alerts) || alerts;
+            renderCAMetrics(null, null);
+            updateCAForecasts();
+        },
+        occupancy: (occupancy) => {
+            stats = applyOccupancy(stats, occupancy);
+            renderCAMetrics(null, null);
+        },
+        alert: (alert) => {
+            alerts = prependAlert(alerts, alert);
+            renderCAMetrics(null, null);
+        }
+    });
     
     console.log('✅ Página Controle de Acesso inicializada com sucesso!');
 }
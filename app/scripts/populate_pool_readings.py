@@ -11,6 +11,7 @@ Média de 87 a 253 leituras diárias por tipo de sensor
 
 from app import create_app, db
 from app.models.pool_reading import PoolReading
+from app.services.pool_service import PoolService
 from datetime import datetime, timedelta, date, time
 from zoneinfo import ZoneInfo
 import random
@@ -128,6 +129,11 @@ def generate_pool_readings():
             print(f'   ✅ {len(sensor_readings)} leituras criadas')
             print()
         
+        # Inserção em lote não passa por PoolService.create_reading:
+        # recalcular a última leitura e descartar as médias diárias
+        PoolService.rebuild_latest()
+        PoolService.rebuild_daily_temperatures(days_back + 1)
+        
         print('='*70)
         print(f'✅ Total de {total_readings_created} leituras da piscina criadas!')
         print('='*70)